@@ -0,0 +1,84 @@
+# backend/accounts/authentication.py
+"""
+JWT authentication without a user or organization query per request.
+
+Tokens from accounts.tokens carry organization_id, role, is_active and
+username. ClaimsJWTAuthentication turns them into a TokenPrincipal: a
+read-only User that was never loaded, so request.user.id, .organization_id
+and .role cost nothing. request.user.organization still runs a query; use
+organization_id for scoping and load the User when other fields are needed
+(MeView does).
+
+Tokens without the claims (issued before they existed) fall back to a lookup
+of those four fields, cached for PRINCIPAL_CACHE_TTL seconds.
+
+A token's claims are as old as the token. When a user's role, organization,
+active flag or username changes, or the user is deleted, forget() records
+the time in ClaimsChange (accounts.revocation keeps every worker's copy
+current). Tokens issued up to then take the lookup path, and cached lookups
+older than the change are read again. The change applies in the worker
+that made it on the next request, and in the others within
+REVOCATION_SYNC_SECONDS (at once with a shared CACHE_DIR), not when the
+access token expires.
+"""
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from core import metrics
+
+from . import revocation
+from .models import TokenPrincipal
+from .tokens import CLAIMS
+
+TTL = getattr(settings, "PRINCIPAL_CACHE_TTL", 60)
+
+
+def _key(user_id):
+    return f"principal:claims:{user_id}"
+
+
+def forget(user_id):
+    """Make requests of `user_id` with tokens issued until now read the user row."""
+    cache.delete(_key(user_id))
+    revocation.claims_changed(user_id)
+
+
+def _lookup(user_id, changed=None):
+    entry = cache.get(_key(user_id))  # (claims, epoch seconds read)
+    if entry is not None and changed is not None and entry[1] <= changed:
+        entry = None  # read before the change, possibly by another worker
+    metrics.inc("cache_requests_total", cache="principal", result="miss" if entry is None else "hit")
+    if entry is None:
+        claims = get_user_model().objects.filter(pk=user_id).values(*CLAIMS).first()
+        if claims is None:
+            return None
+        entry = (claims, int(time.time()))
+        cache.set(_key(user_id), entry, timeout=TTL)
+    return entry[0]
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        try:
+            # simplejwt writes the id as a string
+            user_id = get_user_model()._meta.pk.to_python(validated_token[api_settings.USER_ID_CLAIM])
+        except (KeyError, ValidationError):
+            raise InvalidToken("Token contained no recognizable user identification")
+
+        claims = {c: validated_token.payload[c] for c in CLAIMS if c in validated_token.payload}
+        changed = revocation.claims_changed_at(user_id)
+        if len(claims) < len(CLAIMS) or (changed is not None and validated_token.get("iat", 0) <= changed):
+            claims = _lookup(user_id, changed)
+            if claims is None:
+                raise AuthenticationFailed("User not found", code="user_not_found")
+        if not claims["is_active"]:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        return TokenPrincipal.from_claims(user_id, claims)
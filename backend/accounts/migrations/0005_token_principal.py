@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:45
+
+import django.contrib.auth.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_alter_organization_invite_code'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TokenPrincipal',
+            fields=[
+            ],
+            options={
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('accounts.user',),
+            managers=[
+                ('objects', django.contrib.auth.models.UserManager()),
+            ],
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_token_revocation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClaimsChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_id', models.BigIntegerField(unique=True)),
+                ('changed_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
@@ -33,3 +33,60 @@ class User(AbstractUser):
         Organization, on_delete=models.CASCADE, null=True, blank=True
     )
     role = models.CharField(max_length=20, choices=Roles.choices, default=Roles.AGENT)
+
+
+class TokenPrincipal(User):
+    """
+    request.user as built from JWT claims by accounts.authentication: a User
+    that was never loaded from the database. Read-only; load the User to
+    change it.
+    """
+    class Meta:
+        proxy = True
+
+    @classmethod
+    def from_claims(cls, user_id, claims):
+        principal = cls(id=user_id, **claims)
+        principal._state.adding = False
+        principal._state.db = "default"
+        return principal
+
+    def save(self, *args, **kwargs):
+        raise TypeError("TokenPrincipal is read-only; load the User to change it.")
+
+    def delete(self, *args, **kwargs):
+        raise TypeError("TokenPrincipal is read-only; load the User to change it.")
+
+
+class RevokedToken(models.Model):
+    """A refresh token (by JTI) that can no longer be used; kept until it would have expired."""
+    jti = models.CharField(max_length=64, unique=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name="+")
+    expires_at = models.DateTimeField(db_index=True)
+
+
+class TokenCutoff(models.Model):
+    """Refresh tokens of a user, or of every user of an organization, issued up to `revoked_at` are revoked."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, null=True, blank=True, related_name="+")
+    organization = models.OneToOneField(
+        Organization, on_delete=models.CASCADE, null=True, blank=True, related_name="+"
+    )
+    revoked_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(user__isnull=True) ^ models.Q(organization__isnull=True),
+                name="tokencutoff_user_xor_org",
+            ),
+        ]
+
+
+class ClaimsChange(models.Model):
+    """
+    The claims in tokens of `user_id` issued up to `changed_at` are stale
+    (role, organization, active flag or username changed, or the user was
+    deleted: no foreign key). Kept for one access-token lifetime.
+    """
+    user_id = models.BigIntegerField(unique=True)
+    changed_at = models.DateTimeField(db_index=True)
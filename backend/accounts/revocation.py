@@ -0,0 +1,200 @@
+# backend/accounts/revocation.py
+"""
+Refresh-token revocation: rotation, sign-out, and per-user / per-org revocation.
+
+RevokedToken holds revoked JTIs until the token would have expired anyway.
+TokenCutoff revokes every refresh token of a user or organization issued up
+to a time (deactivating a user sets one). prune(), a daily job, drops rows
+that can no longer match a live token.
+
+is_revoked() answers from process memory: a Bloom filter of revoked JTIs and
+the cutoff times. A JTI the filter has not seen is not revoked, at no query
+cost. A filter hit is confirmed with one indexed lookup and remembered in a
+small LRU. The memory copy reads the rows added since it last looked when
+the shared-cache head key moves, and at least every REVOCATION_SYNC_SECONDS
+(5) otherwise.
+
+Rotation does not depend on that copy being current. revoke_token() inserts
+the JTI under a unique constraint, and the refresh serializer rejects the
+token when the JTI is already there. Of two refreshes racing with one token,
+only one succeeds.
+
+Access tokens are not checked: they expire within ACCESS_TOKEN_LIFETIME, and
+deactivation already stops them (accounts.authentication).
+
+The same copy holds ClaimsChange times for accounts.authentication: when a
+user's token claims went stale. Every worker therefore sees a role change or
+deactivation within the sync interval, with or without a shared cache.
+"""
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from core import metrics
+
+from .models import ClaimsChange, RevokedToken, TokenCutoff, User
+
+SYNC_SECONDS = getattr(settings, "REVOCATION_SYNC_SECONDS", 5)
+LRU_SIZE = 10000
+HEAD_KEY = "revoked:head"
+
+
+class BloomFilter:
+    """Set membership with false positives (about `error_rate`) and no false negatives."""
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = max(capacity, 1024)
+        self.size = math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        # double hashing: k positions from one 128-bit digest
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        a, b = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return [(a + i * b) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for p in self._positions(key):
+            self.bits[p >> 3] |= 1 << (p & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+
+class _Front:
+    """This process's copy of the revocation tables."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.bloom = BloomFilter(0)
+        self.last_id = 0
+        self.head = None
+        self.synced = 0.0
+        self.users, self.orgs = {}, {}
+        self.claims_changed = {}  # user id -> epoch seconds
+        self.confirmed = OrderedDict()  # jti -> revoked, for filter hits
+
+    def sync(self):
+        head = cache.get(HEAD_KEY)
+        if head == self.head and time.monotonic() - self.synced < SYNC_SECONDS:
+            return
+        with self.lock:
+            rows = RevokedToken.objects.filter(id__gt=self.last_id).order_by("id").values_list("id", "jti")
+            if self.bloom.count + len(rows) > self.bloom.capacity:
+                # full: rebuild at twice the live size (this also forgets pruned rows)
+                rows = RevokedToken.objects.order_by("id").values_list("id", "jti")
+                self.bloom = BloomFilter(2 * len(rows))
+            for pk, jti in rows:
+                self.bloom.add(jti)
+                self.confirmed.pop(jti, None)
+                self.last_id = max(self.last_id, pk)
+            self.users, self.orgs = {}, {}
+            for user_id, org_id, at in TokenCutoff.objects.values_list("user_id", "organization_id", "revoked_at"):
+                (self.users if user_id else self.orgs)[user_id or org_id] = int(at.timestamp())
+            since = timezone.now() - api_settings.ACCESS_TOKEN_LIFETIME
+            self.claims_changed = {
+                user_id: int(at.timestamp())
+                for user_id, at in ClaimsChange.objects.filter(changed_at__gte=since).values_list("user_id", "changed_at")
+            }
+            self.head, self.synced = head, time.monotonic()
+
+    def has_jti(self, jti):
+        if jti not in self.bloom:
+            metrics.inc("cache_requests_total", cache="revocation", result="hit")
+            return False
+        with self.lock:
+            revoked = self.confirmed.get(jti)
+            if revoked is not None:
+                self.confirmed.move_to_end(jti)
+        if revoked is not None:
+            metrics.inc("cache_requests_total", cache="revocation", result="hit")
+            return revoked
+        metrics.inc("cache_requests_total", cache="revocation", result="miss")
+        revoked = RevokedToken.objects.filter(jti=jti).exists()
+        with self.lock:
+            self.confirmed[jti] = revoked
+            while len(self.confirmed) > LRU_SIZE:
+                self.confirmed.popitem(last=False)
+        return revoked
+
+
+_front = _Front()
+
+
+def _moved():
+    transaction.on_commit(lambda: cache.set(HEAD_KEY, time.time_ns(), timeout=None))
+
+
+def is_revoked(token, user_id, organization_id):
+    """token: a validated refresh token of `user_id` (whose org is `organization_id`)."""
+    _front.sync()
+    issued = token.get("iat", 0)
+    for cutoff in (_front.users.get(user_id), _front.orgs.get(organization_id)):
+        if cutoff is not None and issued <= cutoff:
+            return True
+    jti = token.get(api_settings.JTI_CLAIM)
+    return jti is not None and _front.has_jti(jti)
+
+
+def claims_changed(user_id):
+    """Record, once the transaction commits, that tokens of `user_id` issued until now carry stale claims."""
+    def record():
+        ClaimsChange.objects.update_or_create(user_id=user_id, defaults={"changed_at": timezone.now()})
+        cache.set(HEAD_KEY, time.time_ns(), timeout=None)
+    # after the commit: a lookup made after changed_at reads the new row
+    transaction.on_commit(record)
+
+
+def claims_changed_at(user_id):
+    """Epoch seconds of the last claims change of `user_id` within an access-token lifetime, or None."""
+    _front.sync()
+    return _front.claims_changed.get(user_id)
+
+
+def revoke_token(token):
+    """Revoke one refresh token; False if it was already revoked."""
+    user_id = User._meta.pk.to_python(token.get(api_settings.USER_ID_CLAIM))
+    try:
+        with transaction.atomic():
+            RevokedToken.objects.create(
+                jti=token[api_settings.JTI_CLAIM], user_id=user_id, expires_at=datetime_from_epoch(token["exp"]),
+            )
+    except IntegrityError:
+        return False
+    _moved()
+    return True
+
+
+def revoke_user(user_id):
+    """Revoke every refresh token the user holds now."""
+    TokenCutoff.objects.update_or_create(user_id=user_id, defaults={"revoked_at": timezone.now()})
+    _moved()
+
+
+def revoke_organization(organization_id):
+    """Revoke every refresh token held now by users of the organization."""
+    TokenCutoff.objects.update_or_create(organization_id=organization_id, defaults={"revoked_at": timezone.now()})
+    _moved()
+
+
+def prune(now=None):
+    """Drop JTIs past their expiry, and cutoffs and claims changes older than any live token."""
+    now = now or timezone.now()
+    n = RevokedToken.objects.filter(expires_at__lt=now).delete()[0]
+    n += TokenCutoff.objects.filter(revoked_at__lt=now - api_settings.REFRESH_TOKEN_LIFETIME).delete()[0]
+    n += ClaimsChange.objects.filter(changed_at__lt=now - api_settings.ACCESS_TOKEN_LIFETIME).delete()[0]
+    if n:
+        _moved()
+    return n
@@ -1,15 +1,16 @@
 from rest_framework import serializers
+from core.instrumentation import TimedSerializerMixin
 from .models import User, Organization
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
 
 
-class OrganizationSerializer(serializers.ModelSerializer):
+class OrganizationSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Organization
         fields = ["id","name","domain"]
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     organization = OrganizationSerializer(read_only=True)
     class Meta:
         model = User
@@ -72,7 +73,7 @@ class RegistrationSerializer(serializers.Serializer):
         user.save()
         return user
 
-class OrgUserSerializer(serializers.ModelSerializer):
+class OrgUserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ["id", "username", "email", "first_name", "last_name", "role", "is_active"]
@@ -87,7 +88,7 @@ class OrgUserSerializer(serializers.ModelSerializer):
             last_name=validated_data.get("last_name", ""),
             role=validated_data.get("role") or "AGENT",
             is_active=validated_data.get("is_active", True),
-            organization=req.user.organization,
+            organization_id=req.user.organization_id,
         )
         raw_pw = self.initial_data.get("password")
         if raw_pw:
@@ -0,0 +1,25 @@
+# backend/accounts/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import revocation
+from .authentication import forget
+from .models import User
+from .tokens import CLAIMS
+
+CLAIM_FIELDS = {"organization", *CLAIMS} - {"organization_id"}
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    # tokens carry these fields; a save that cannot have changed them keeps the tokens trusted
+    if created or (update_fields is not None and not CLAIM_FIELDS & set(update_fields)):
+        return
+    forget(instance.pk)
+    if not instance.is_active:
+        revocation.revoke_user(instance.pk)  # deactivation ends every session
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    forget(instance.pk)
@@ -0,0 +1,146 @@
+# backend/accounts/tests.py
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from core import throttling
+
+from . import revocation
+from .models import Organization, User
+
+PASSWORD = "pw-12345678"
+
+
+class AccountsTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        throttling.backend().reset()
+        revocation._front.__init__()  # the test database rolls back under it
+        self.org = Organization.objects.create(name="Acme")
+        self.admin = self.make_user("admin", "ADMIN")
+        self.agent = self.make_user("agent")
+
+    def make_user(self, username, role="AGENT", org=None):
+        return User.objects.create_user(username=username, password=PASSWORD, organization=org or self.org, role=role)
+
+    def obtain(self, username, password=PASSWORD, **extra):
+        return self.client.post("/api/token/", {"username": username, "password": password}, format="json", **extra)
+
+    def bearer(self, username):
+        access = self.obtain(username).data["access"]
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+
+
+class ClaimsPrincipalTests(AccountsTestCase):
+    def other_worker(self):
+        """This process as another worker sees it: no shared cache, and past the sync interval."""
+        cache.clear()
+        return mock.patch.object(revocation, "SYNC_SECONDS", 0)
+
+    def test_tokens_carry_claims(self):
+        self.bearer("agent")
+        r = self.client.get("/api/me/")
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.data["username"], "agent")
+
+    def test_role_change_applies_before_the_token_expires(self):
+        self.bearer("agent")
+        self.assertEqual(self.client.get("/api/org-admin/users/").status_code, 403)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.agent.role = "ADMIN"
+            self.agent.save()
+        self.assertEqual(self.client.get("/api/org-admin/users/").status_code, 200)
+
+    def test_deactivation_reaches_workers_without_a_shared_cache(self):
+        self.bearer("agent")
+        self.assertEqual(self.client.get("/api/groups/").status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.agent.is_active = False
+            self.agent.save()
+        with self.other_worker():
+            self.assertEqual(self.client.get("/api/groups/").status_code, 401)
+
+    def test_stale_cached_lookup_is_not_reused_after_a_change(self):
+        self.bearer("agent")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.agent.role = "ADMIN"
+            self.agent.save()
+        with self.other_worker():
+            # another worker cached the lookup before the change
+            cache.set(f"principal:claims:{self.agent.pk}",
+                      ({"organization_id": self.org.pk, "role": "AGENT", "is_active": True, "username": "agent"}, 0))
+            self.assertEqual(self.client.get("/api/org-admin/users/").status_code, 200)
+
+    def test_deleted_user_is_refused(self):
+        self.bearer("agent")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.agent.delete()
+        self.assertEqual(self.client.get("/api/groups/").status_code, 401)
+
+
+class RefreshRevocationTests(AccountsTestCase):
+    def refresh(self, token):
+        return self.client.post("/api/token/refresh/", {"refresh": token}, format="json")
+
+    def test_rotation_rejects_a_replayed_token(self):
+        first = self.obtain("agent").data["refresh"]
+        with self.captureOnCommitCallbacks(execute=True):
+            r = self.refresh(first)
+        self.assertEqual(r.status_code, 200, r.data)
+        self.assertNotEqual(r.data["refresh"], first)
+        self.assertEqual(self.refresh(first).status_code, 401)
+        self.assertEqual(self.refresh(r.data["refresh"]).status_code, 200)
+
+    def test_sign_out(self):
+        token = self.obtain("agent").data["refresh"]
+        self.assertEqual(self.client.post("/api/token/revoke/", {"refresh": token}, format="json").status_code, 204)
+        self.assertEqual(self.refresh(token).status_code, 401)
+        self.assertEqual(self.client.post("/api/token/revoke/", {"refresh": "junk"}, format="json").status_code, 400)
+
+    def test_admin_revokes_a_user_or_the_org(self):
+        agent_token = self.obtain("agent").data["refresh"]
+        admin_token = self.obtain("admin").data["refresh"]
+        self.bearer("admin")
+        with self.captureOnCommitCallbacks(execute=True):
+            r = self.client.post(f"/api/org-admin/users/{self.agent.pk}/revoke-sessions/")
+        self.assertEqual(r.status_code, 204)
+        self.assertEqual(self.refresh(agent_token).status_code, 401)
+        self.assertEqual(self.refresh(admin_token).status_code, 200)
+        admin_token = self.obtain("admin").data["refresh"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.post("/api/org-admin/org/revoke-sessions/").status_code, 204)
+        self.assertEqual(self.refresh(admin_token).status_code, 401)
+
+    def test_agents_cannot_revoke_the_org(self):
+        self.bearer("agent")
+        self.assertEqual(self.client.post("/api/org-admin/org/revoke-sessions/").status_code, 403)
+
+    def test_deactivation_revokes_refresh_tokens(self):
+        token = self.obtain("agent").data["refresh"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.agent.is_active = False
+            self.agent.save()
+        self.assertEqual(self.refresh(token).status_code, 401)
+
+    def test_pruned_rows_expire_with_the_token(self):
+        token = self.obtain("agent").data["refresh"]
+        self.client.post("/api/token/revoke/", {"refresh": token}, format="json")
+        self.assertEqual(revocation.prune(), 0)
+        self.assertEqual(self.refresh(token).status_code, 401)
+
+
+@override_settings(THROTTLE_RATES={"auth": {"ip": "5/min"}})
+class AuthThrottleTests(AccountsTestCase):
+    def test_forwarded_for_does_not_pick_the_bucket(self):
+        codes = [self.obtain("agent", "wrong", HTTP_X_FORWARDED_FOR=f"10.0.0.{i}").status_code for i in range(8)]
+        self.assertEqual(codes[:5], [401] * 5)
+        self.assertEqual(codes[5:], [429] * 3)
+
+    def test_refusal_has_retry_after(self):
+        for _ in range(5):
+            self.obtain("agent", "wrong")
+        r = self.obtain("agent")
+        self.assertEqual(r.status_code, 429)
+        self.assertGreaterEqual(int(r["Retry-After"]), 1)
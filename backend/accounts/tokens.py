@@ -0,0 +1,67 @@
+# backend/accounts/tokens.py
+"""
+JWTs that carry the claims accounts.authentication needs to build
+request.user without a query: organization_id, role, is_active, username.
+
+/api/token/ issues them (SIMPLE_JWT TOKEN_OBTAIN_SERIALIZER), and so do
+signup and register. /api/token/refresh/ re-reads the user row and stamps the
+current values into the new tokens, so claims are never older than one
+access-token lifetime. It also checks and records revocation
+(accounts.revocation) in place of simplejwt's token_blacklist app.
+"""
+from django.contrib.auth import get_user_model
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from . import revocation
+
+CLAIMS = ("organization_id", "role", "is_active", "username")
+
+
+def claims_for(user):
+    return {c: getattr(user, c) for c in CLAIMS}
+
+
+class ClaimsRefreshToken(RefreshToken):
+    """A refresh token whose access tokens carry CLAIMS (they are copied over)."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token.payload.update(claims_for(user))
+        return token
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = ClaimsRefreshToken
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = ClaimsRefreshToken
+
+    def validate(self, attrs):
+        # simplejwt's validate, with the claims re-stamped from the user row
+        # and revocation kept by accounts.revocation
+        refresh = self.token_class(attrs["refresh"])
+        user_id = refresh.payload.get(api_settings.USER_ID_CLAIM)
+        user = get_user_model().objects.filter(**{api_settings.USER_ID_FIELD: user_id}).first()
+        if not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages["no_active_account"], "no_active_account")
+        if revocation.is_revoked(refresh, user.pk, user.organization_id):
+            raise InvalidToken("Token has been revoked")
+        if api_settings.ROTATE_REFRESH_TOKENS and api_settings.BLACKLIST_AFTER_ROTATION:
+            if not revocation.revoke_token(refresh):
+                raise InvalidToken("Token has been revoked")  # a concurrent refresh used it first
+        refresh.payload.update(claims_for(user))
+
+        data = {"access": str(refresh.access_token)}
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            refresh.outstand()
+            data["refresh"] = str(refresh)
+        return data
@@ -1,8 +1,9 @@
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework import status, viewsets, generics, serializers
+from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.exceptions import TokenError
 from django.conf import settings
 from django.contrib.auth import get_user_model
 
@@ -14,18 +15,23 @@ from .serializers import (
 )
 from accounts.permissions import IsOrgAdmin
 from accounts.models import Organization
+from accounts import revocation
+from accounts.tokens import ClaimsRefreshToken
+from core.instrumentation import TimedSerializerMixin
 
 # local mixin to avoid circular import
 class OrgScopedMixin:
     def get_queryset(self):
-        return self.queryset.filter(organization=self.request.user.organization)
+        return self.queryset.filter(organization_id=self.request.user.organization_id)
 
 User = get_user_model()
 
 class MeView(APIView):
     permission_classes = [IsAuthenticated]
     def get(self, request):
-        return Response(UserSerializer(request.user).data)
+        # request.user holds only the token's claims
+        user = User.objects.select_related("organization").get(pk=request.user.pk)
+        return Response(UserSerializer(user).data)
 
 class SignupView(APIView):
     permission_classes = [AllowAny]
@@ -35,7 +41,7 @@ class SignupView(APIView):
         ser = RegistrationSerializer(data=request.data)
         ser.is_valid(raise_exception=True)
         user = ser.save()
-        refresh = RefreshToken.for_user(user)
+        refresh = ClaimsRefreshToken.for_user(user)
         return Response({
             "user": UserSerializer(user).data,
             "access": str(refresh.access_token),
@@ -55,7 +61,13 @@ class OrgUserViewSet(OrgScopedMixin, viewsets.ModelViewSet):
         qs = super().get_queryset()
         return qs.filter(is_staff=False, is_superuser=False)
 
-class MeSerializer(serializers.ModelSerializer):
+    @action(detail=True, methods=["post"], url_path="revoke-sessions")
+    def revoke_sessions(self, request, pk=None):
+        """Sign the user out everywhere: their refresh tokens stop working."""
+        revocation.revoke_user(self.get_object().pk)
+        return Response(status=204)
+
+class MeSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     organization_name = serializers.CharField(source="organization.name", read_only=True)
     class Meta:
         model = User
@@ -72,7 +84,7 @@ class RegisterView(generics.CreateAPIView):
         ser = self.get_serializer(data=request.data)
         ser.is_valid(raise_exception=True)
         user = ser.save()
-        refresh = RefreshToken.for_user(user)
+        refresh = ClaimsRefreshToken.for_user(user)
         data = MeSerializer(user).data
         data.update({"access": str(refresh.access_token), "refresh": str(refresh)})
         return Response(data, status=201)
@@ -99,3 +111,26 @@ class RotateInviteView(APIView):
             return Response({"detail": "No organization on your account."}, status=400)
         org.rotate_invite()  # generates and saves a fresh code
         return Response({"invite_code": org.invite_code})
+
+class RevokeSessionsView(APIView):
+    """Sign everyone in the organization out (their refresh tokens stop working)."""
+    permission_classes = [IsOrgAdmin]
+
+    def post(self, request):
+        if not request.user.organization_id:
+            return Response({"detail": "No organization on your account."}, status=400)
+        revocation.revoke_organization(request.user.organization_id)
+        return Response(status=204)
+
+class RevokeTokenView(APIView):
+    """Sign out: revoke the posted refresh token."""
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def post(self, request):
+        try:
+            token = ClaimsRefreshToken(request.data.get("refresh") or "")
+        except TokenError as e:
+            return Response({"detail": str(e)}, status=400)
+        revocation.revoke_token(token)
+        return Response(status=204)
@@ -1,3 +1,11 @@
+"""
+ASGI entry point. Serves the whole API and the long-lived
+/api/events/tickets/ streams, e.g.:
+    gunicorn core.asgi:application -k uvicorn.workers.UvicornWorker
+Streaming responses must hand Django an async iterator here (a sync one is
+read into memory first): see tickets.export.alines. Attachment downloads
+should go through ATTACHMENT_SENDFILE.
+"""
 import os
 from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
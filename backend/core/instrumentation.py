@@ -0,0 +1,292 @@
+# backend/core/instrumentation.py
+"""
+Per-request timing: Server-Timing headers, a slow-request log and per-route stats.
+
+RequestTimingMiddleware times every request. It adds `Server-Timing:
+app;dur=<ms>` and updates per-route totals, keyed by method and URL name,
+e.g. "GET ticket-list".
+
+A sample of requests is also traced: INSTRUMENT_SAMPLE_RATE of them, or all
+under DEBUG. A traced request records:
+  - db: SQL count and time. Every connection gets one execute wrapper when
+    it opens; it reads the request's Trace from a context variable, which
+    also reaches the thread a sync view runs in under ASGI. Queries are
+    grouped by shape (the SQL text with IN/VALUES lists collapsed; params
+    are already separate). A shape run N_PLUS_ONE or more times is flagged
+    as a likely N+1.
+  - view: from the view being called until it returns its response.
+  - serialize: time in to_representation() of serializers that use
+    TimedSerializerMixin (the project's output serializers).
+  - render: DRF/template response rendering.
+These are added to Server-Timing. They overlap: db time spent while
+serializing counts in db, view and serialize.
+
+The middleware works in both modes, so under ASGI it does not push the
+request into a thread itself.
+
+Requests slower than SLOW_REQUEST_MS write one JSON line to the
+"core.instrumentation" logger. Streaming responses (export, SSE) are timed
+up to the start of the body.
+
+Tracing costs a few microseconds per query; untraced requests cost about as
+much as a dict update. stats() returns this process's route totals, which
+/api/admin/stats/routes/ serves; core.metrics exports them for Prometheus.
+"""
+import contextvars
+import copy
+import json
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+log = logging.getLogger(__name__)
+
+SAMPLE_RATE = getattr(settings, "INSTRUMENT_SAMPLE_RATE", 1.0 if settings.DEBUG else 0.05)
+SLOW_MS = getattr(settings, "SLOW_REQUEST_MS", 1000)
+N_PLUS_ONE = 5
+METHODS = {"GET", "HEAD", "OPTIONS", "POST", "PUT", "PATCH", "DELETE"}
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)  # latency histogram upper bounds
+
+_LISTS = re.compile(r"\((?:%s, )*%s\)(?:, \((?:%s, )*%s\))*")  # IN (...) and VALUES (...), (...)
+_trace = contextvars.ContextVar("request_trace", default=None)
+
+
+def shape(sql):
+    return _LISTS.sub("(...)", sql)
+
+
+class Trace:
+    """Counters for one traced request; also the execute_wrapper."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.serialize = 0.0
+        self.serializing = False
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - started
+            self.queries += 1
+            self.shapes[sql] += 1
+
+    def repeated(self):
+        shapes = Counter()
+        for sql, n in self.shapes.items():
+            shapes[shape(sql)] += n
+        return [(sql, n) for sql, n in shapes.most_common() if n >= N_PLUS_ONE]
+
+
+def _execute(execute, sql, params, many, context):
+    trace = _trace.get()
+    if trace is None:
+        return execute(sql, params, many, context)
+    return trace(execute, sql, params, many, context)
+
+
+def _install(conn):
+    if _execute not in conn.execute_wrappers:
+        conn.execute_wrappers.append(_execute)
+
+
+@receiver(connection_created, dispatch_uid="core.instrumentation.install")
+def _connection_created(sender, connection, **kwargs):
+    _install(connection)
+
+
+class TimedSerializerMixin:
+    """
+    Counts to_representation() of a traced request as serialize time. Only
+    the outermost call is timed: nested serializers run inside it, and the
+    rows of a many=True list one after another.
+    """
+    def to_representation(self, instance):
+        trace = _trace.get()
+        if trace is None or trace.serializing:
+            return super().to_representation(instance)
+        trace.serializing, started = True, time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            trace.serialize += time.perf_counter() - started
+            trace.serializing = False
+
+
+# -- per-route totals ------------------------------------------------------
+class RouteStats:
+    __slots__ = ("count", "errors", "statuses", "total_ms", "max_ms", "buckets",
+                 "traced", "queries", "db_ms", "n_plus_one")
+
+    def __init__(self):
+        self.count = self.errors = self.traced = self.queries = self.n_plus_one = 0
+        self.total_ms = self.max_ms = self.db_ms = 0.0
+        self.statuses = Counter()
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)  # last: slower than every bound
+
+    def copy(self):
+        other = copy.copy(self)
+        other.statuses, other.buckets = Counter(self.statuses), list(self.buckets)
+        return other
+
+    def as_dict(self):
+        return {
+            "count": self.count, "errors": self.errors, "statuses": dict(self.statuses),
+            "mean_ms": round(self.total_ms / self.count, 2) if self.count else 0,
+            "p95_ms": _quantile(self.buckets, 0.95), "max_ms": round(self.max_ms, 2),
+            "traced": self.traced,
+            "queries_per_request": round(self.queries / self.traced, 1) if self.traced else None,
+            "db_ms_per_request": round(self.db_ms / self.traced, 2) if self.traced else None,
+            "n_plus_one": self.n_plus_one,
+            "buckets": dict(zip([*map(str, BUCKETS_MS), "inf"], self.buckets)),
+        }
+
+
+def _quantile(buckets, q):
+    """Upper bound of the histogram bucket holding quantile q (None past the last bound)."""
+    total = sum(buckets)
+    if not total:
+        return 0
+    seen = 0
+    for bound, n in zip(BUCKETS_MS, buckets):
+        seen += n
+        if seen >= q * total:
+            return bound
+    return None
+
+
+_routes = {}
+_lock = threading.Lock()
+
+
+def _record(route, ms, status, trace, repeated):
+    with _lock:
+        s = _routes.get(route)
+        if s is None:
+            s = _routes[route] = RouteStats()
+        s.count += 1
+        s.errors += status >= 500
+        s.statuses[status] += 1
+        s.total_ms += ms
+        s.max_ms = max(s.max_ms, ms)
+        s.buckets[next((i for i, b in enumerate(BUCKETS_MS) if ms <= b), len(BUCKETS_MS))] += 1
+        if trace is not None:
+            s.traced += 1
+            s.queries += trace.queries
+            s.db_ms += trace.db * 1000
+            s.n_plus_one += bool(repeated)
+
+
+def stats():
+    """{route: totals} for this process."""
+    with _lock:
+        return {route: s.as_dict() for route, s in sorted(_routes.items())}
+
+
+def snapshot():
+    """{route: RouteStats copy} for this process (core.metrics)."""
+    with _lock:
+        return {route: s.copy() for route, s in _routes.items()}
+
+
+def reset():
+    with _lock:
+        _routes.clear()
+
+
+# -- middleware ------------------------------------------------------------
+class RequestTimingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        trace, token, started = self._start(request)
+        if trace is not None:
+            _install(connection)  # a connection opened before this module was imported
+        try:
+            response = self.get_response(request)
+        finally:
+            if token is not None:
+                _trace.reset(token)
+        return self._finish(request, response, trace, started)
+
+    async def __acall__(self, request):
+        trace, token, started = self._start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            if token is not None:
+                _trace.reset(token)
+        return self._finish(request, response, trace, started)
+
+    def _start(self, request):
+        trace = Trace() if random.random() < SAMPLE_RATE else None
+        token = _trace.set(trace) if trace is not None else None
+        request._timing = {}
+        return trace, token, time.perf_counter()
+
+    def _finish(self, request, response, trace, started):
+        ended = time.perf_counter()
+        ms = (ended - started) * 1000
+        match = getattr(request, "resolver_match", None)
+        method = request.method if request.method in METHODS else "OTHER"  # bounded route keys
+        route = f"{method} {match.view_name if match else 'other'}"
+        repeated = trace.repeated() if trace is not None else []
+        _record(route, ms, response.status_code, trace, repeated)
+
+        timing = [f"app;dur={ms:.1f}"]
+        view_ms = render_ms = None
+        if trace is not None:
+            t = request._timing
+            if "view" in t:
+                view_end = t.get("template", ended)
+                view_ms = (view_end - t["view"]) * 1000
+                render_ms = (ended - view_end) * 1000 if "template" in t else 0.0
+            desc = f"{trace.queries} quer{'y' if trace.queries == 1 else 'ies'}"
+            if repeated:
+                desc += f", {len(repeated)} repeated"
+            timing.append(f'db;dur={trace.db * 1000:.1f};desc="{desc}"')
+            if view_ms is not None:
+                timing.append(f"view;dur={view_ms:.1f}")
+                timing.append(f"render;dur={render_ms:.1f}")
+            timing.append(f"serialize;dur={trace.serialize * 1000:.1f}")
+        response["Server-Timing"] = ", ".join(timing)
+
+        if ms >= SLOW_MS:
+            line = {"event": "slow_request", "method": request.method, "path": request.path,
+                    "route": route, "status": response.status_code, "ms": round(ms, 1),
+                    "traced": trace is not None}
+            if trace is not None:
+                line.update(queries=trace.queries, db_ms=round(trace.db * 1000, 1),
+                            view_ms=view_ms and round(view_ms, 1),
+                            serialize_ms=round(trace.serialize * 1000, 1),
+                            repeated=[{"sql": sql[:300], "count": n} for sql, n in repeated])
+            log.warning(json.dumps(line))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._timing["view"] = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # the view has returned; what follows is rendering
+        request._timing["template"] = time.perf_counter()
+        return response
@@ -0,0 +1,299 @@
+# backend/core/metrics.py
+"""
+Prometheus metrics at /metrics, in the text exposition format, with no
+client library and no agent.
+
+Each worker process keeps its own numbers:
+  - per-route request counters and latency histograms (core.instrumentation).
+    Routes are DRF/URL names such as ticket-list or ticket-assign. DB
+    query counts and time cover the traced sample of requests.
+  - counters passed to inc(), e.g. cache hits and misses.
+  - gauges registered with gauge(), read from this process.
+With METRICS_DIR set, each worker writes its numbers to
+METRICS_DIR/<pid>-<start>.json after a request, at most every
+METRICS_FLUSH_SECONDS, and again at exit. <start> is the process start time
+from /proc (a random token elsewhere), so a new worker that reuses a dead
+worker's pid gets its own file. /metrics sums every file in the directory,
+so any worker can answer a scrape for all of them. A scrape also folds the
+counters of exited workers into retired.json and deletes their files, under
+a lock, so totals never drop when gunicorn recycles a worker. Exited
+workers' gauges are dropped. Without METRICS_DIR, /metrics shows the
+answering process only.
+
+Values that are the same from every process, such as job counts in the
+database, come from collector() functions run at scrape time.
+
+Set METRICS_TOKEN to require `Authorization: Bearer <token>` on /metrics.
+"""
+import atexit
+import fcntl
+import glob
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.signals import request_finished
+from django.http import HttpResponse
+
+from . import instrumentation
+
+log = logging.getLogger(__name__)
+
+DIR = getattr(settings, "METRICS_DIR", "")
+FLUSH_SECONDS = getattr(settings, "METRICS_FLUSH_SECONDS", 5)
+PREFIX = "csp_"
+
+FAMILIES = {
+    # name: (type, help)
+    "http_requests_total": ("counter", "Requests by route, method and status code."),
+    "http_request_duration_seconds": ("histogram", "Request latency by route and method."),
+    "http_traced_requests_total": ("counter", "Requests traced for SQL (INSTRUMENT_SAMPLE_RATE)."),
+    "db_queries_total": ("counter", "SQL queries run by traced requests."),
+    "db_query_seconds_total": ("counter", "SQL time of traced requests."),
+    "http_repeated_queries_total": ("counter", "Traced requests that ran one query shape 5+ times (likely N+1)."),
+    "cache_requests_total": ("counter", "Cache lookups by cache and result (hit/miss)."),
+    "throttled_requests_total": ("counter", "Requests refused with 429, by endpoint class."),
+}
+
+_counters = Counter()  # (name, ((label, value), ...)) -> value
+_gauges = {}           # name -> func
+_collectors = []
+_lock = threading.Lock()
+_flushed = 0.0
+_instance = (None, None)  # (pid, start) of this process
+RETIRED = "retired.json"
+
+
+def inc(name, value=1, **labels):
+    with _lock:
+        _counters[name, tuple(sorted(labels.items()))] += value
+
+
+def describe(name, kind, help):
+    FAMILIES[name] = (kind, help)
+
+
+def gauge(name, help, func):
+    """func() -> number, or {((label, value), ...): number}; read from each process."""
+    describe(name, "gauge", help)
+    _gauges[name] = func
+
+
+def collector(name, kind, help, func):
+    """func() -> {((label, value), ...): number}; run once per scrape."""
+    describe(name, kind, help)
+    _collectors.append((name, func))
+
+
+# -- per-process snapshot ----------------------------------------------------
+def _route_samples():
+    out = Counter()
+    bounds = [b / 1000 for b in instrumentation.BUCKETS_MS]
+    for route, s in instrumentation.snapshot().items():
+        method, _, name = route.partition(" ")
+        labels = (("method", method), ("route", name))
+        for status, n in s.statuses.items():
+            out["http_requests_total", labels + (("status", str(status)),)] += n
+        seen = 0
+        for le, n in zip([*bounds, "+Inf"], s.buckets):
+            seen += n
+            out["http_request_duration_seconds_bucket", labels + (("le", str(le)),)] += seen
+        out["http_request_duration_seconds_sum", labels] += s.total_ms / 1000
+        out["http_request_duration_seconds_count", labels] += s.count
+        if s.traced:
+            out["http_traced_requests_total", labels] += s.traced
+            out["db_queries_total", labels] += s.queries
+            out["db_query_seconds_total", labels] += s.db_ms / 1000
+            out["http_repeated_queries_total", labels] += s.n_plus_one
+    return out
+
+
+def _gauge_samples():
+    out = {}
+    for name, func in _gauges.items():
+        value = func()
+        for labels, v in (value.items() if isinstance(value, dict) else [((), value)]):
+            out[name, tuple(labels)] = v
+    return out
+
+
+def _proc_start(pid):
+    """Start time of `pid` in clock ticks since boot (Linux), or None."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(")", 1)[1].split()[19]
+    except (OSError, IndexError):
+        return None
+
+
+def _identity():
+    global _instance
+    pid = os.getpid()
+    if _instance[0] != pid:  # first call, or a forked child
+        _instance = (pid, _proc_start(pid) or uuid.uuid4().hex)
+    return _instance
+
+
+def snapshot():
+    with _lock:
+        counters = Counter(_counters)
+    counters.update(_route_samples())
+    pid, start = _identity()
+    return {"pid": pid, "start": start, "counters": [[n, l, v] for (n, l), v in counters.items()],
+            "gauges": [[n, l, v] for (n, l), v in _gauge_samples().items()]}
+
+
+def _write(path, data):
+    """Atomically: temp file + rename."""
+    fd, tmp = tempfile.mkstemp(dir=DIR, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def flush():
+    """Write this process's snapshot to METRICS_DIR."""
+    global _flushed
+    if not DIR:
+        return
+    _flushed = time.monotonic()
+    os.makedirs(DIR, exist_ok=True)
+    pid, start = _identity()
+    _write(os.path.join(DIR, f"{pid}-{start}.json"), snapshot())
+
+
+def _maybe_flush(**kwargs):
+    if DIR and time.monotonic() - _flushed >= FLUSH_SECONDS:
+        flush()
+
+
+def _forked():
+    # a child starts from zero: the parent's numbers are the parent's
+    global _counters, _lock
+    _counters, _lock = Counter(), threading.Lock()
+    instrumentation.reset()
+
+
+request_finished.connect(_maybe_flush, dispatch_uid="core.metrics.flush")
+atexit.register(flush)
+os.register_at_fork(after_in_child=_forked)
+
+
+# -- aggregation and exposition -------------------------------------------
+def _alive(pid, start):
+    if (pid, start) == _identity():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    now = _proc_start(pid)
+    return now is None or now == start  # a different start time: the pid was reused
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None  # gone, or (retired.json) not written yet
+
+
+def _snapshots():
+    """Snapshots of live processes, plus the retired counters of exited ones."""
+    if not DIR:
+        return [snapshot()]
+    flush()
+    retired_path = os.path.join(DIR, RETIRED)
+    with open(os.path.join(DIR, ".lock"), "a") as lock:
+        # one scrape at a time folds exited workers in, so none is counted twice
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        retired = _read(retired_path) or {"counters": [], "merged": []}
+        live, dead = [], []
+        for path in glob.glob(os.path.join(DIR, "*-*.json")):
+            snap = _read(path)
+            if snap is not None:
+                (live if _alive(snap["pid"], snap.get("start")) else dead).append((path, snap))
+        if dead:
+            totals = Counter({(n, tuple(map(tuple, l))): v for n, l, v in retired["counters"]})
+            # "merged" guards against a crash between the write and the unlinks below
+            merged = [m for m in retired["merged"] if os.path.exists(os.path.join(DIR, m))]
+            for path, snap in dead:
+                name = os.path.basename(path)
+                if name not in merged:
+                    for n, l, v in snap["counters"]:
+                        totals[n, tuple(map(tuple, l))] += v
+                    merged.append(name)
+            retired = {"counters": [[n, l, v] for (n, l), v in totals.items()], "merged": merged}
+            _write(retired_path, retired)
+            for path, _snap in dead:
+                os.unlink(path)
+    return [snap for _path, snap in live] + [{"counters": retired["counters"], "gauges": []}]
+
+
+def collect():
+    """{(name, labels): value} summed over every process, plus the collectors."""
+    totals = defaultdict(float)
+    for snap in _snapshots():
+        for name, labels, value in snap["counters"] + snap["gauges"]:
+            totals[name, tuple(map(tuple, labels))] += value
+    for name, func in _collectors:
+        try:
+            samples = func()
+        except Exception:
+            # e.g. the database is down: still report the rest
+            log.exception("metrics collector %s failed", name)
+            continue
+        for labels, value in samples.items():
+            totals[name, tuple(labels)] = value
+    return totals
+
+
+def _family(name):
+    for suffix in ("_bucket", "_sum", "_count"):
+        if name.endswith(suffix) and name[: -len(suffix)] in FAMILIES:
+            return name[: -len(suffix)]
+    return name
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(v):
+    v = float(v)
+    return str(int(v)) if v.is_integer() else repr(v)
+
+
+def _order(sample):
+    name, labels, _value = sample
+    return name, tuple((k, float(v)) if k == "le" else (k, v) for k, v in labels)  # buckets by bound
+
+
+def render(totals):
+    by_family = defaultdict(list)
+    for (name, labels), value in totals.items():
+        by_family[_family(name)].append((name, labels, value))
+    lines = []
+    for family in sorted(by_family):
+        kind, help = FAMILIES.get(family, ("untyped", ""))
+        lines += [f"# HELP {PREFIX}{family} {help}", f"# TYPE {PREFIX}{family} {kind}"]
+        for name, labels, value in sorted(by_family[family], key=_order):
+            label_text = "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}" if labels else ""
+            lines.append(f"{PREFIX}{name}{label_text} {_number(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def metrics_view(request):
+    token = getattr(settings, "METRICS_TOKEN", "")
+    if token and request.headers.get("Authorization") != f"Bearer {token}":
+        return HttpResponse("Unauthorized\n", status=401, content_type="text/plain")
+    return HttpResponse(render(collect()), content_type="text/plain; version=0.0.4; charset=utf-8")
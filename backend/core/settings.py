@@ -32,6 +32,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "core.instrumentation.RequestTimingMiddleware",  # first, so its time covers the rest
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "corsheaders.middleware.CorsMiddleware",
@@ -47,6 +48,8 @@ ROOT_URLCONF = "core.urls"
 STATIC_URL = "static/"
 STATIC_ROOT = os.path.join(BASE_DIR, "staticfiles")
 STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"  # Fixed typo: was STAATICFILES_STORAGE
+MEDIA_URL = "media/"
+MEDIA_ROOT = os.getenv("MEDIA_ROOT", os.path.join(BASE_DIR, "media"))
 
 # Database Configuration
 # Priority: DATABASE_URL (production) > DB_BACKEND env var > default to sqlite for dev
@@ -95,12 +98,95 @@ else:
 
 AUTH_USER_MODEL = "accounts.User"
 
+# Cache: per-process memory by default; set CACHE_DIR to share entries
+# between gunicorn workers through the filesystem (no external service).
+if os.getenv("CACHE_DIR"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.getenv("CACHE_DIR"),
+        }
+    }
+else:
+    CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    }
+
+# Seconds a dashboard stats entry may live (writes invalidate it sooner)
+STATS_CACHE_TTL = int(os.getenv("STATS_CACHE_TTL", "300"))
+
+# Seconds a cached user's groups / group's members may live (tickets.membership);
+# membership writes invalidate sooner. Needs CACHE_DIR when running several workers.
+MEMBERSHIP_CACHE_TTL = int(os.getenv("MEMBERSHIP_CACHE_TTL", "300"))
+
+# Seconds a user lookup for a JWT without claims, or issued before the user
+# changed, may be reused (accounts.authentication)
+PRINCIPAL_CACHE_TTL = int(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+
+# Max seconds before a worker sees refresh-token revocations and user changes
+# (role, org, deactivation) made by another worker (accounts.revocation);
+# sooner when they share CACHE_DIR
+REVOCATION_SYNC_SECONDS = int(os.getenv("REVOCATION_SYNC_SECONDS", "5"))
+
+# Chunked attachment uploads (tickets.uploads). Chunks are staged under
+# UPLOAD_TEMP_DIR, which must be on the same filesystem as MEDIA_ROOT.
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(4 * 1024 * 1024)))
+UPLOAD_MAX_SIZE = int(os.getenv("UPLOAD_MAX_SIZE", str(100 * 1024 * 1024)))
+UPLOAD_SESSION_TTL = timedelta(hours=int(os.getenv("UPLOAD_SESSION_TTL_HOURS", "24")))
+UPLOAD_TEMP_DIR = os.getenv("UPLOAD_TEMP_DIR", os.path.join(MEDIA_ROOT, "uploads", "tmp"))
+
+# Attachment downloads: "" serves in-process (under ASGI Django reads the file
+# into memory and sends it from Python; only a WSGI server can use sendfile);
+# "x-accel-redirect" (nginx) or "x-sendfile" hands the transfer to the proxy,
+# the recommended setup under uvicorn. ATTACHMENT_ACCEL_PREFIX is nginx's
+# internal location.
+ATTACHMENT_SENDFILE = os.getenv("ATTACHMENT_SENDFILE", "")
+ATTACHMENT_ACCEL_PREFIX = os.getenv("ATTACHMENT_ACCEL_PREFIX", "/protected-media/")
+
+# Real-time ticket events (tickets.events). LocalBroker only reaches streams
+# in the same process; use PostgresBroker (LISTEN/NOTIFY) with several workers.
+EVENTS_BROKER = os.getenv("EVENTS_BROKER", "tickets.events.LocalBroker")
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "500"))
+
+# Background jobs (tickets.jobs, `manage.py runworker`): days to keep finished jobs
+JOB_RETENTION_DAYS = int(os.getenv("JOB_RETENTION_DAYS", "7"))
+
+# Delta-sync change log (tickets.changelog) retention
+CHANGES_RETENTION_DAYS = int(os.getenv("CHANGES_RETENTION_DAYS", "30"))
+
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "accounts.authentication.ClaimsJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
+    "DEFAULT_THROTTLE_CLASSES": ("core.throttling.BucketThrottle",),
+    # Proxies in front of the app that append to X-Forwarded-For. The client IP
+    # for rate limits is that many hops from the right; 0 uses REMOTE_ADDR, so
+    # a client cannot pick its own IP bucket with the header.
+    "NUM_PROXIES": int(os.getenv("NUM_PROXIES", "0")),
+}
+
+# Request timing (core.instrumentation): share of requests traced for SQL,
+# view and serializer time, and the threshold for the slow-request log line
+INSTRUMENT_SAMPLE_RATE = float(os.getenv("INSTRUMENT_SAMPLE_RATE", "1.0" if DEBUG else "0.05"))
+SLOW_REQUEST_MS = int(os.getenv("SLOW_REQUEST_MS", "1000"))
+
+# Prometheus /metrics (core.metrics). With several workers, set METRICS_DIR to
+# a directory they share (emptied at deploy) so any worker reports them all.
+METRICS_DIR = os.getenv("METRICS_DIR", "")
+METRICS_FLUSH_SECONDS = int(os.getenv("METRICS_FLUSH_SECONDS", "5"))
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# Rate limits per endpoint class (core.throttling): "N/period" token buckets
+# per user, org and client IP. Buckets live in process memory (limits per
+# worker); set THROTTLE_FILE to share them between workers on one host.
+THROTTLE_FILE = os.getenv("THROTTLE_FILE", "")
+THROTTLE_RATES = {
+    "auth": {"ip": os.getenv("THROTTLE_AUTH_IP", "30/min")},
+    "list": {"user": os.getenv("THROTTLE_LIST_USER", "600/min"), "org": os.getenv("THROTTLE_LIST_ORG", "6000/min")},
+    "write": {"user": os.getenv("THROTTLE_WRITE_USER", "120/min"), "org": os.getenv("THROTTLE_WRITE_ORG", "1200/min")},
+    "stats": {"user": os.getenv("THROTTLE_STATS_USER", "60/min"), "org": os.getenv("THROTTLE_STATS_ORG", "600/min")},
 }
 
 SPECTACULAR_SETTINGS = {"TITLE": "CSP API", "VERSION": "1.0.0"}
@@ -109,7 +195,10 @@ SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=30),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
     "ROTATE_REFRESH_TOKENS": True,
-    "BLACKLIST_AFTER_ROTATION": True,
+    "BLACKLIST_AFTER_ROTATION": True,  # kept by accounts.revocation, not the token_blacklist app
+    # tokens carry org/role claims so requests skip the user lookup (accounts.authentication)
+    "TOKEN_OBTAIN_SERIALIZER": "accounts.tokens.ClaimsTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "accounts.tokens.ClaimsTokenRefreshSerializer",
 }
 
 TEMPLATES = [
@@ -0,0 +1,215 @@
+# backend/core/throttling.py
+"""
+Rate limits: token buckets per user, per organization and per client IP.
+
+Each API request falls in one endpoint class:
+  - auth: no authenticated user (token, refresh, signup, register)
+  - stats: views with throttle_scope = "stats" (dashboards, reports)
+  - list: other GET/HEAD/OPTIONS requests
+  - write: everything else
+THROTTLE_RATES gives each class its limits, e.g. {"user": "600/min",
+"org": "6000/min"}. "N/period" is a bucket of N tokens that refills at N per
+period, so a client can burst N requests and then keep to the rate. A request
+takes one token from each of its buckets, or none when any is empty, so a
+request refused by the org quota does not spend the user's tokens. Refused
+requests get 429 with Retry-After (seconds until every bucket has a token).
+
+The client IP is DRF's get_ident(): REMOTE_ADDR, or with NUM_PROXIES set, the
+address that many X-Forwarded-For hops from the right. Headers the client
+sends itself are never trusted.
+
+Backends hold the buckets and make each take atomic: read, refill, decide and
+write happen in one critical section. (DRF's cache throttles get and then set,
+which races between workers.)
+  - LocalBackend: process memory under a lock. The default and the stand-in
+    for tests; limits are per worker process.
+  - SharedFileBackend (THROTTLE_FILE): a fixed table of buckets in a
+    memory-mapped file locked with flock, shared by every worker on the host.
+
+`manage.py bench_throttle` measures the cost per request.
+"""
+import fcntl
+import functools
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle
+
+from . import metrics
+
+PERIODS = {"s": 1, "sec": 1, "second": 1, "m": 60, "min": 60, "minute": 60,
+           "h": 3600, "hour": 3600, "d": 86400, "day": 86400}
+
+
+@functools.lru_cache(maxsize=None)
+def parse_rate(rate):
+    """"600/min" -> (capacity 600, refill 10.0 tokens per second)."""
+    n, period = rate.split("/")
+    return int(n), int(n) / PERIODS[period]
+
+
+class _Backend:
+    def __init__(self):
+        self.lock = threading.Lock()
+
+    def take(self, buckets, now):
+        """
+        buckets: [(key, capacity, tokens per second)]. Take one token from each,
+        or none; returns seconds to wait, 0 when the request may go ahead.
+        """
+        with self._critical():
+            levels = []
+            for key, capacity, per_sec in buckets:
+                state = self._load(key, now)
+                if state is None:
+                    levels.append(capacity)
+                else:
+                    tokens, stamp = state
+                    levels.append(min(capacity, tokens + max(now - stamp, 0) * per_sec))
+            wait = max((((1 - level) / b[2]) for b, level in zip(buckets, levels) if level < 1), default=0)
+            if not wait:
+                for (key, capacity, per_sec), level in zip(buckets, levels):
+                    # full_at: when the bucket is back to capacity and its slot can be reused
+                    self._store(key, level - 1, now, now + (capacity - level + 1) / per_sec)
+            return wait
+
+    @contextmanager
+    def _critical(self):
+        with self.lock:
+            yield
+
+
+class LocalBackend(_Backend):
+    """Buckets in process memory."""
+    MAX_KEYS = 100_000
+
+    def __init__(self):
+        super().__init__()
+        self.buckets = {}  # key -> (tokens, stamp, full_at)
+
+    def _load(self, key, now):
+        state = self.buckets.get(key)
+        return state and state[:2]
+
+    def _store(self, key, tokens, stamp, full_at):
+        self.buckets[key] = (tokens, stamp, full_at)
+        if len(self.buckets) > self.MAX_KEYS:
+            # a full bucket is the same as no bucket
+            self.buckets = {k: v for k, v in self.buckets.items() if v[2] > stamp}
+
+    def reset(self):
+        with self.lock:
+            self.buckets.clear()
+
+
+class SharedFileBackend(_Backend):
+    """
+    Buckets in a memory-mapped file: SLOTS fixed slots, open addressing over
+    PROBE slots. A new key takes an empty slot or one whose bucket is full
+    again; if every probed slot is busy it evicts the one closest to full,
+    which hands that client a fresh bucket.
+    """
+    SLOTS = 1 << 16
+    PROBE = 8
+    SLOT = struct.Struct("<Qddd")  # key hash, tokens, stamp, full_at
+
+    def __init__(self, path):
+        super().__init__()
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        size = self.SLOTS * self.SLOT.size
+        if os.fstat(self.fd).st_size < size:
+            os.ftruncate(self.fd, size)
+        self.map = mmap.mmap(self.fd, size)
+
+    @contextmanager
+    def _critical(self):
+        # flock excludes other processes; the thread lock, other threads of this one
+        with self.lock:
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self.fd, fcntl.LOCK_UN)
+
+    def _find(self, key, now):
+        """(hash, slot offset, slot holds this key)."""
+        h = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little") or 1
+        start, free, victim = h % self.SLOTS, None, None
+        for i in range(self.PROBE):
+            offset = ((start + i) % self.SLOTS) * self.SLOT.size
+            held, _tokens, _stamp, full_at = self.SLOT.unpack_from(self.map, offset)
+            if held == h:
+                return h, offset, True
+            if free is None and (held == 0 or full_at <= now):
+                free = offset
+            if victim is None or full_at < victim[1]:
+                victim = (offset, full_at)
+        return h, free if free is not None else victim[0], False
+
+    def _load(self, key, now):
+        _h, offset, found = self._find(key, now)
+        return self.SLOT.unpack_from(self.map, offset)[1:3] if found else None
+
+    def _store(self, key, tokens, stamp, full_at):
+        h, offset, _found = self._find(key, stamp)
+        self.SLOT.pack_into(self.map, offset, h, tokens, stamp, full_at)
+
+    def reset(self):
+        with self._critical():
+            self.map[:] = bytes(len(self.map))
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def backend():
+    # created on first use, so each forked worker maps the file itself
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                path = getattr(settings, "THROTTLE_FILE", "")
+                _backend = SharedFileBackend(path) if path else LocalBackend()
+    return _backend
+
+
+def scope_for(request, view):
+    if not request.user.is_authenticated:
+        return "auth"
+    scope = getattr(view, "throttle_scope", None)
+    if scope:
+        return scope
+    return "list" if request.method in SAFE_METHODS else "write"
+
+
+class BucketThrottle(BaseThrottle):
+    def allow_request(self, request, view):
+        scope = scope_for(request, view)
+        limits = getattr(settings, "THROTTLE_RATES", {}).get(scope)
+        if not limits:
+            return True
+        user = request.user
+        idents = {
+            "user": user.pk if user.is_authenticated else None,
+            "org": getattr(user, "organization_id", None),
+            "ip": self.get_ident(request),
+        }
+        buckets = [
+            (f"{scope}:{kind}:{idents[kind]}", *parse_rate(rate))
+            for kind, rate in limits.items() if idents.get(kind) is not None
+        ]
+        self._wait = backend().take(buckets, time.time()) if buckets else 0
+        if self._wait:
+            metrics.inc("throttled_requests_total", scope=scope)
+        return not self._wait
+
+    def wait(self):
+        return self._wait
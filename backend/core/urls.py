@@ -7,15 +7,23 @@ from rest_framework_simplejwt.views import (
     TokenRefreshView,
     TokenVerifyView,
 )
+from core.metrics import metrics_view
 
 # ---- tickets app views ----
 from tickets.views import (
     TicketViewSet,
+    CommentViewSet,
+    AttachmentViewSet,
     GroupViewSet,
     OrgGroupViewSet,
     OrgMembershipViewSet,
     AdminStatsView,
     MyStatsView,
+    StatsCacheView,
+    RouteTimingView,
+    TicketReportView,
+    UploadViewSet,
+    ticket_events,
 )
 
 # ---- accounts app views ----
@@ -26,6 +34,8 @@ from accounts.views import (
     OrgUserViewSet, 
     OrgSettingsView,
     RotateInviteView,
+    RevokeSessionsView,
+    RevokeTokenView,
 )
 from drf_spectacular.views import (
     SpectacularAPIView,
@@ -39,6 +49,7 @@ router = DefaultRouter()
 # Public/org-scoped resources
 router.register(r"tickets", TicketViewSet, basename="ticket")
 router.register(r"groups", GroupViewSet, basename="group")
+router.register(r"uploads", UploadViewSet, basename="upload")
 
 # Org-admin resources (ADMIN/SUPERVISOR only via IsOrgAdmin)
 router.register(r"org-admin/users", OrgUserViewSet, basename="org-users")
@@ -46,6 +57,9 @@ router.register(r"org-admin/groups", OrgGroupViewSet, basename="org-groups")
 router.register(r"org-admin/memberships", OrgMembershipViewSet, basename="org-memberships")
 
 urlpatterns = [
+    # Prometheus (core.metrics)
+    path("metrics", metrics_view, name="metrics"),
+
     # Django admin
     path("admin/", admin.site.urls),
 
@@ -53,6 +67,21 @@ urlpatterns = [
     path("api/token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
     path("api/token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
     path("api/token/verify/", TokenVerifyView.as_view(), name="token_verify"),
+    path("api/token/revoke/", RevokeTokenView.as_view(), name="token_revoke"),
+
+    # Ticket comments/attachments (nested; cursor-paginated newest first)
+    path("api/tickets/<int:ticket_pk>/comments/",
+         CommentViewSet.as_view({"get": "list", "post": "create"}), name="ticket-comments"),
+    path("api/tickets/<int:ticket_pk>/comments/<int:pk>/",
+         CommentViewSet.as_view({"get": "retrieve", "patch": "partial_update", "delete": "destroy"}),
+         name="ticket-comment-detail"),
+    path("api/tickets/<int:ticket_pk>/attachments/",
+         AttachmentViewSet.as_view({"get": "list", "post": "create"}), name="ticket-attachments"),
+    path("api/tickets/<int:ticket_pk>/attachments/<int:pk>/",
+         AttachmentViewSet.as_view({"get": "retrieve", "delete": "destroy"}),
+         name="ticket-attachment-detail"),
+    path("api/tickets/<int:ticket_pk>/attachments/<int:pk>/download/",
+         AttachmentViewSet.as_view({"get": "download"}), name="ticket-attachment-download"),
 
     # Router-backed endpoints
     path("api/", include(router.urls)),
@@ -61,6 +90,10 @@ urlpatterns = [
     path("api/me/", MeView.as_view(), name="me"),
     path("api/admin/stats/", AdminStatsView.as_view(), name="admin-stats"),
     path("api/my/stats/", MyStatsView.as_view(), name="my-stats"),
+    path("api/admin/stats/cache/", StatsCacheView.as_view(), name="admin-stats-cache"),
+    path("api/admin/stats/routes/", RouteTimingView.as_view(), name="admin-stats-routes"),
+    path("api/reports/tickets/", TicketReportView.as_view(), name="ticket-report"),
+    path("api/events/tickets/", ticket_events, name="ticket-events"),
 
     # Signup/Register (create/join organization)
     path("api/register/", RegisterView.as_view(), name="register"),
@@ -68,6 +101,7 @@ urlpatterns = [
 
     path("api/org-admin/org/", OrgSettingsView.as_view(), name="org-settings"),
     path("api/org-admin/org/rotate-invite/", RotateInviteView.as_view(), name="org-rotate-invite"),
+    path("api/org-admin/org/revoke-sessions/", RevokeSessionsView.as_view(), name="org-revoke-sessions"),
 ]
 
 # ---- Optional: API schema & docs (drf-spectacular) ----
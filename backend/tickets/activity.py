@@ -0,0 +1,135 @@
+# backend/tickets/activity.py
+"""
+Maintenance of TicketHourlyActivity, the pre-aggregated source of the
+time-series report (tickets.reports).
+
+Works on the bucket keys of tickets.rollup, (org, day, group, assignee,
+status, priority), so the same pre/post-save snapshots drive both tables.
+Per (group, assignee, priority) and UTC hour it records:
+  created        tickets created
+  resolved       tickets entering RESOLVED/CLOSED
+  backlog_delta  net change of open tickets (create, resolve, reopen,
+                 reassignment between keys, delete)
+"""
+from collections import Counter
+from datetime import timezone as dt_timezone
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from .models import Ticket, TicketHourlyActivity
+
+OPEN_STATUSES = (Ticket.Status.OPEN, Ticket.Status.IN_PROGRESS)
+
+
+def hour_of(dt):
+    return dt.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def _split(key):
+    org_id, _day, group_id, assignee_id, status, priority = key
+    return (org_id, group_id, assignee_id, priority), status in OPEN_STATUSES
+
+
+def _add(hour, dims, **deltas):
+    org_id, group_id, assignee_id, priority = dims
+    match = TicketHourlyActivity.objects.filter(
+        organization_id=org_id, hour=hour, group_id=group_id,
+        assignee_id=assignee_id, priority=priority,
+    )
+    pk = match.values_list("pk", flat=True).first()
+    if pk is not None:
+        TicketHourlyActivity.objects.filter(pk=pk).update(
+            **{name: F(name) + d for name, d in deltas.items()})
+    else:
+        TicketHourlyActivity.objects.create(
+            organization_id=org_id, hour=hour, group_id=group_id,
+            assignee_id=assignee_id, priority=priority, **deltas)
+
+
+def _events(before, after, created_at, now):
+    """(hour, dims, {counter: delta}) implied by one ticket moving from `before` to `after`."""
+    if before == after:
+        return
+    if before is None:
+        dims, is_open = _split(after)
+        yield hour_of(created_at), dims, {"created": 1, "backlog_delta": 1 if is_open else 0}
+        if not is_open:
+            yield now, dims, {"resolved": 1, "backlog_delta": -1}
+        return
+    old_dims, was_open = _split(before)
+    if after is None:
+        if was_open:
+            yield now, old_dims, {"backlog_delta": -1}
+        return
+    new_dims, is_open = _split(after)
+    if was_open and not is_open:
+        yield now, new_dims, {"resolved": 1}
+    if (old_dims, was_open) != (new_dims, is_open):
+        if was_open:
+            yield now, old_dims, {"backlog_delta": -1}
+        if is_open:
+            yield now, new_dims, {"backlog_delta": 1}
+
+
+def record(before, after, created_at=None):
+    """Record the events implied by a ticket moving from `before` to `after` (rollup keys, None = absent)."""
+    record_many([(before, after, created_at)])
+
+
+def record_many(changes):
+    """record() for many (before, after, created_at) changes, one write per touched row."""
+    now = hour_of(timezone.now())
+    acc = {}
+    for before, after, created_at in changes:
+        for hour, dims, deltas in _events(before, after, created_at, now):
+            slot = acc.setdefault((hour, dims), Counter())
+            slot.update(deltas)
+    with transaction.atomic():
+        for (hour, dims), deltas in acc.items():
+            deltas = {k: v for k, v in deltas.items() if v}
+            if deltas:
+                _add(hour, dims, **deltas)
+
+
+def rebuild(organization_id=None):
+    """
+    Recompute from Ticket. Exact resolution times aren't stored, so a
+    currently resolved/closed ticket is taken to have been resolved at its
+    last update; reassignment history is collapsed onto the current key.
+    """
+    tickets = Ticket.objects.all()
+    rows = TicketHourlyActivity.objects.all()
+    if organization_id is not None:
+        tickets = tickets.filter(organization_id=organization_id)
+        rows = rows.filter(organization_id=organization_id)
+
+    dims = ("organization_id", "group_id", "assignee_id", "priority")
+    done = ~Q(status__in=OPEN_STATUSES)
+    acc = {}
+
+    def add(hour, r, **deltas):
+        slot = acc.setdefault((hour,) + tuple(r[d] for d in dims), {"created": 0, "resolved": 0, "backlog_delta": 0})
+        for name, d in deltas.items():
+            slot[name] += d
+
+    created = (tickets.annotate(h=TruncHour("created_at", tzinfo=dt_timezone.utc))
+               .values("h", *dims).annotate(n=Count("id")).order_by())
+    for r in created.iterator():
+        add(r["h"], r, created=r["n"], backlog_delta=r["n"])
+    resolved = (tickets.filter(done).annotate(h=TruncHour("updated_at", tzinfo=dt_timezone.utc))
+                .values("h", *dims).annotate(n=Count("id")).order_by())
+    for r in resolved.iterator():
+        add(r["h"], r, resolved=r["n"], backlog_delta=-r["n"])
+
+    with transaction.atomic():
+        rows.delete()
+        objs = TicketHourlyActivity.objects.bulk_create(
+            (TicketHourlyActivity(hour=k[0], organization_id=k[1], group_id=k[2],
+                                  assignee_id=k[3], priority=k[4], **v)
+             for k, v in acc.items()),
+            batch_size=2000,
+        )
+    return len(objs)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Ticket, Comment, Attachment, Group, GroupMembership
+from .models import Ticket, Comment, Attachment, Blob, Group, GroupMembership, Job
 
 @admin.register(Ticket)
 class TicketAdmin(admin.ModelAdmin):
@@ -11,6 +11,12 @@ admin.site.register(Comment)
 admin.site.register(Attachment)
 
 
+@admin.register(Blob)
+class BlobAdmin(admin.ModelAdmin):
+    list_display = ("sha256","size","ref_count","created_at")
+    search_fields = ("sha256",)
+
+
 @admin.register(Group)
 class GroupAdmin(admin.ModelAdmin):
     list_display = ("id","name","organization","manager")
@@ -21,3 +27,10 @@ class GroupMembershipAdmin(admin.ModelAdmin):
     list_display = ("group","user")
     list_filter = ("group__organization","group")
 
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("id","name","status","run_at","attempts","max_attempts","locked_by","finished_at")
+    list_filter = ("status","name")
+    search_fields = ("name","key","last_error")
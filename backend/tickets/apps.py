@@ -2,3 +2,6 @@ from django.apps import AppConfig
 class TicketsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "tickets"
+
+    def ready(self):
+        from . import signals, tasks  # noqa: F401
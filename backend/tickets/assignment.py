@@ -0,0 +1,178 @@
+# backend/tickets/assignment.py
+"""
+Automatic assignment of new tickets, configured per Group (Group.assignment).
+
+Strategies choose among the group's members whose user is active and whose
+open_tickets is below their capacity (if set):
+  - ROUND_ROBIN: the next member by user id after Group.last_assignee_id.
+  - LEAST_LOADED: fewest open tickets; ties go to the lowest user id.
+  - SKILL_WEIGHTED: highest (1 + 2 * matching skills) / (1 + open tickets).
+    Skills are keywords matched against the subject, description and
+    priority, so a matching agent is preferred until their load is about
+    three times that of an agent without the skill.
+
+The load is GroupMembership.open_tickets: OPEN/IN_PROGRESS tickets of the
+group assigned to that member. move_load() keeps it current from the same
+(before, after) rollup keys as TicketDailyStats (signals and
+bulk.after_write), so a pick reads one row per member instead of running a
+COUNT per agent.
+
+An Assigner locks its Group row until the transaction ends. Concurrent
+creates in one group therefore take turns, and each one sees the loads the
+previous one wrote. Picks also update the Assigner's in-memory copy, so one
+Assigner can place a whole batch (bulk create, assign_backlog) from a single
+read of the members.
+
+Add a strategy by adding a Group.Assignment choice and a STRATEGIES entry:
+func(assigner, members, ticket) -> member dict.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from . import events, rollup
+from .models import Group, GroupMembership, Ticket
+
+OPEN = (Ticket.Status.OPEN, Ticket.Status.IN_PROGRESS)
+
+
+def _round_robin(assigner, members, ticket):
+    after = [m for m in members if m["user_id"] > (assigner.last or 0)]
+    return (after or members)[0]
+
+
+def _least_loaded(assigner, members, ticket):
+    return min(members, key=lambda m: (m["open_tickets"], m["user_id"]))
+
+
+def skill_hits(skills, ticket):
+    text = f"{ticket.subject} {ticket.description} {ticket.priority}".lower()
+    return sum(1 for s in skills if s and s.lower() in text)
+
+
+def _skill_weighted(assigner, members, ticket):
+    def score(m):
+        return ((1 + 2 * skill_hits(m["skills"], ticket)) / (1 + m["open_tickets"]),
+                -m["open_tickets"], -m["user_id"])
+    return max(members, key=score)
+
+
+STRATEGIES = {
+    Group.Assignment.ROUND_ROBIN: _round_robin,
+    Group.Assignment.LEAST_LOADED: _least_loaded,
+    Group.Assignment.SKILL_WEIGHTED: _skill_weighted,
+}
+
+
+class Assigner:
+    """Assignment state of one group, locked for the rest of the transaction."""
+
+    def __init__(self, group_id, strategy=None, members=None, last=None):
+        # strategy/members/last are for simulations; normally read from the database
+        self.group_id = group_id
+        self.moved = False
+        if members is not None:
+            self.strategy, self.members, self.last = STRATEGIES.get(strategy), members, last
+            return
+        row = (Group.objects.select_for_update().filter(pk=group_id)
+               .values("assignment", "last_assignee_id").first())
+        self.strategy = STRATEGIES.get(row["assignment"]) if row else None
+        self.last = row["last_assignee_id"] if row else None
+        self.members = [] if self.strategy is None else list(
+            GroupMembership.objects.filter(group_id=group_id, user__is_active=True)
+            .order_by("user_id").values("user_id", "open_tickets", "capacity", "skills")
+        )
+
+    def pick(self, ticket):
+        """User id to assign `ticket` to, or None (manual group, nobody free, or not open)."""
+        if self.strategy is None or ticket.status not in OPEN:
+            return None
+        free = [m for m in self.members if m["capacity"] is None or m["open_tickets"] < m["capacity"]]
+        if not free:
+            return None
+        member = self.strategy(self, free, ticket)
+        member["open_tickets"] += 1  # local copy; the stored counter moves when the ticket is written
+        self.last = member["user_id"]
+        self.moved = True
+        return member["user_id"]
+
+    def save(self):
+        if self.moved:
+            Group.objects.filter(pk=self.group_id).update(last_assignee_id=self.last)
+
+
+def assign_new(tickets):
+    """
+    Fill in assignee_id on unsaved, unassigned tickets whose group auto-assigns.
+    Call inside the transaction that inserts them.
+    """
+    todo = [t for t in tickets if t.assignee_id is None and t.group_id is not None]
+    # lock groups in id order so concurrent batches cannot deadlock
+    assigners = {gid: Assigner(gid) for gid in sorted({t.group_id for t in todo})}
+    for t in todo:
+        t.assignee_id = assigners[t.group_id].pick(t)
+    for a in assigners.values():
+        a.save()
+
+
+def assign_backlog(group_id, limit=500):
+    """Assign the group's oldest unassigned open tickets; returns how many got an assignee."""
+    from .bulk import after_write  # bulk imports this module
+
+    with transaction.atomic():
+        assigner = Assigner(group_id)
+        if assigner.strategy is None:
+            return 0
+        done, now = [], timezone.now()
+        for t in (Ticket.objects.filter(group_id=group_id, assignee__isnull=True, status__in=OPEN)
+                  .order_by("created_at", "id")[:limit]):
+            before = rollup.key_for(t)
+            t.assignee_id = assigner.pick(t)
+            if t.assignee_id is None:
+                break  # everyone is at capacity
+            t.updated_at = now
+            done.append((before, t))
+        if not done:
+            return 0
+        Ticket.objects.bulk_update([t for _, t in done], ["assignee", "updated_at"], batch_size=500)
+        org_id = done[0][1].organization_id
+        ids = [t.pk for _, t in done]
+        after_write(org_id, [(b, rollup.key_for(t), t.created_at) for b, t in done],
+                    resync_ids=ids, ticket_ids=ids)
+        events.tickets_changed(org_id, done)
+        assigner.save()
+    return len(done)
+
+
+# -- load counters -------------------------------------------------------
+def move_load(pairs):
+    """Apply (before, after) rollup keys of ticket writes to GroupMembership.open_tickets."""
+    deltas = Counter()
+    for before, after in pairs:
+        if before == after:
+            continue
+        for key, sign in ((before, -1), (after, 1)):
+            # key: (org, day, group, assignee, status, priority)
+            if key is not None and key[3] is not None and key[4] in OPEN:
+                deltas[key[2], key[3]] += sign
+    for (group_id, user_id), delta in deltas.items():
+        if delta:
+            GroupMembership.objects.filter(group_id=group_id, user_id=user_id).update(
+                open_tickets=Greatest(F("open_tickets") + delta, 0))
+
+
+def recount(memberships):
+    """Recompute open_tickets for a GroupMembership queryset; returns rows updated."""
+    n = (Ticket.objects.filter(group_id=OuterRef("group_id"), assignee_id=OuterRef("user_id"), status__in=OPEN)
+         .order_by().values("group_id").annotate(n=Count("id")).values("n"))
+    return memberships.update(open_tickets=Coalesce(Subquery(n), 0))
+
+
+def rebuild_loads(organization_id=None):
+    qs = GroupMembership.objects.all()
+    if organization_id is not None:
+        qs = qs.filter(group__organization_id=organization_id)
+    return recount(qs)
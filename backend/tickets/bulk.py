@@ -0,0 +1,174 @@
+# backend/tickets/bulk.py
+"""
+Bulk ticket writes: create, status change and assign for up to
+MAX_ITEMS items per call.
+
+Each operation validates every item against lookup tables built with one
+query per table. It writes the valid items with one bulk_create/bulk_update
+in a single transaction and returns one result per input item. Bulk
+writes skip model signals, so after_write() applies the derived-table
+updates (visibility, rollups, stats cache) for the whole batch.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import activity, assignment, changelog, events, rollup, stats_cache, visibility
+from .models import Group, GroupMembership, Ticket
+from .serializers import TicketBulkItemSerializer
+from .visibility import sees_whole_org, visible_tickets
+
+MAX_ITEMS = getattr(settings, "TICKET_BULK_MAX_ITEMS", 2000)
+
+
+def after_write(org_id, changes, resync_ids=(), ticket_ids=()):
+    """
+    Keep derived tables in step with a batch of ticket writes.
+    changes: (before_key, after_key, created_at) per ticket, keys as in tickets.rollup.
+    ticket_ids: the tickets written, for the change log.
+    """
+    rollup.move_many([(b, a) for b, a, _ in changes])
+    assignment.move_load([(b, a) for b, a, _ in changes])
+    activity.record_many(changes)
+    visibility.sync_tickets(resync_ids)
+    changelog.record(org_id, ticket_ids)
+    stats_cache.bump_on_commit(org_id)
+
+
+def _ok(i, ticket_id, **extra):
+    return {"index": i, "ok": True, "id": ticket_id, **extra}
+
+
+def _error(i, errors):
+    return {"index": i, "ok": False, "errors": errors}
+
+
+def _id(value):
+    """An id from client JSON: an int or a digit string (as IntegerField takes), else None."""
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value)
+    return value if isinstance(value, int) and not isinstance(value, bool) else None
+
+
+def _field_ids(items, name):
+    return {_id(it.get(name)) for it in items if isinstance(it, dict)} - {None}
+
+
+def create_tickets(user, items):
+    org_id = user.organization_id
+    group_ids = _field_ids(items, "group")
+    assignee_ids = _field_ids(items, "assignee")
+    ctx = {
+        "groups": set(Group.objects.filter(organization_id=org_id, id__in=group_ids).values_list("id", flat=True)),
+        "members": set(
+            GroupMembership.objects.filter(group_id__in=group_ids, user_id__in=assignee_ids).values_list("group_id", "user_id")
+        ),
+    }
+
+    results, pending = [], []
+    for i, item in enumerate(items):
+        ser = TicketBulkItemSerializer(data=item, context=ctx)
+        if not ser.is_valid():
+            results.append(_error(i, ser.errors))
+            continue
+        d = ser.validated_data
+        pending.append((i, Ticket(
+            organization_id=org_id, created_by_id=user.id,
+            group_id=d["group"], assignee_id=d.get("assignee"),
+            customer_name=d["customer_name"], subject=d["subject"],
+            description=d.get("description", ""), status=d["status"], priority=d["priority"],
+        )))
+
+    if pending:
+        with transaction.atomic():
+            assignment.assign_new([t for _, t in pending])
+            created = Ticket.objects.bulk_create([t for _, t in pending], batch_size=500)
+            ids = [t.pk for t in created]
+            after_write(org_id, [(None, rollup.key_for(t), t.created_at) for t in created],
+                        resync_ids=ids, ticket_ids=ids)
+            events.tickets_changed(org_id, [(None, t) for t in created], created=True)
+        results.extend(_ok(i, t.pk, assignee=t.assignee_id) for i, t in pending)
+    results.sort(key=lambda r: r["index"])
+    return results
+
+
+def _load(user, items):
+    """Split items into errors and {index: (item, ticket)} for the tickets the user can see."""
+    ids = _field_ids(items, "id")
+    tickets = {
+        t.pk: t for t in visible_tickets(user, Ticket.objects.filter(organization_id=user.organization_id))
+        .filter(id__in=ids).select_related("group")
+    }
+    errors, found = [], {}
+    for i, item in enumerate(items):
+        tid = _id(item.get("id")) if isinstance(item, dict) else None
+        if tid not in tickets:
+            errors.append(_error(i, {"id": ["Ticket not found."]}))
+        else:
+            found[i] = (item, tickets[tid])
+    return errors, found
+
+
+def _may_triage(user, ticket):
+    return sees_whole_org(user) or ticket.group.manager_id == user.id
+
+
+def _save(user, found, fields, resync=False):
+    now = timezone.now()
+    with transaction.atomic():
+        changes = []
+        for _, (before, t) in found.items():
+            t.updated_at = now
+            changes.append((before, rollup.key_for(t), t.created_at))
+        Ticket.objects.bulk_update([t for _, t in found.values()], fields + ["updated_at"], batch_size=500)
+        ids = [t.pk for _, t in found.values()]
+        after_write(user.organization_id, changes, resync_ids=ids if resync else (), ticket_ids=ids)
+        events.tickets_changed(user.organization_id, list(found.values()))
+
+
+def set_status(user, items):
+    """items: [{"id": <ticket id>, "status": <Ticket.Status>}]"""
+    results, found = _load(user, items)
+    valid = set(Ticket.Status.values)
+    todo = {}
+    for i, (item, t) in found.items():
+        target = item.get("status")
+        if not isinstance(target, str) or target not in valid:
+            results.append(_error(i, {"status": [f'"{target}" is not a valid choice.']}))
+        elif not (_may_triage(user, t) or t.assignee_id == user.id):
+            results.append(_error(i, {"detail": ["You are not allowed to change this ticket."]}))
+        else:
+            todo[i] = (rollup.key_for(t), t)
+            t.status = target
+    if todo:
+        _save(user, todo, ["status"])
+    results.extend(_ok(i, t.pk, status=t.status) for i, (_, t) in todo.items())
+    results.sort(key=lambda r: r["index"])
+    return results
+
+
+def assign(user, items):
+    """items: [{"id": <ticket id>, "assignee": <user id>}]"""
+    results, found = _load(user, items)
+    group_ids = {t.group_id for _, t in found.values()}
+    assignee_ids = {_id(item.get("assignee")) for item, _ in found.values()}
+    members = set(
+        GroupMembership.objects.filter(group_id__in=group_ids, user_id__in=assignee_ids - {None}).values_list("group_id", "user_id")
+    )
+    todo = {}
+    for i, (item, t) in found.items():
+        assignee_id = _id(item.get("assignee"))
+        if not _may_triage(user, t):
+            results.append(_error(i, {"detail": ["You are not allowed to assign this ticket."]}))
+        elif assignee_id is None:
+            results.append(_error(i, {"assignee": ["Provide 'assignee' user id."]}))
+        elif (t.group_id, assignee_id) not in members:
+            results.append(_error(i, {"assignee": ["Assignee must be a member of the ticket's group."]}))
+        else:
+            todo[i] = (rollup.key_for(t), t)
+            t.assignee_id = assignee_id
+    if todo:
+        _save(user, todo, ["assignee"], resync=True)
+    results.extend(_ok(i, t.pk, assignee=t.assignee_id) for i, (_, t) in todo.items())
+    results.sort(key=lambda r: r["index"])
+    return results
@@ -0,0 +1,121 @@
+# backend/tickets/changelog.py
+"""
+Ticket change log and the delta-sync feed built on it.
+
+Every ticket write appends a TicketChange row (UPSERT or DELETE) for the
+org; comments count as an UPSERT of their ticket. When visibility moves
+without the ticket changing, tickets.visibility appends per-user rows:
+HIDDEN for every lost (ticket, user) pair, and SHOWN for pairs gained
+through membership or manager changes. A deleted ticket's DELETE rows name
+its audience (record_deleted), so a tombstone never tells a user about a
+ticket they could not see.
+
+feed(user, cursor) reads rows after the cursor on the (organization, id)
+index. The cost depends on how many changes happened since the last poll,
+not on the size of the org. The result holds the current state of the
+changed tickets the caller can see, plus tombstones for tickets that were
+deleted or that the caller can no longer see.
+
+Rows older than CHANGES_RETENTION_DAYS are pruned by a periodic job. A
+cursor older than the oldest remaining row gets `reset: true`: the client
+refetches the list and continues from the returned cursor.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Max, Min, Q
+from django.utils import timezone
+
+from .models import Ticket, TicketChange
+
+RETENTION = timedelta(days=getattr(settings, "CHANGES_RETENTION_DAYS", 30))
+MAX_LIMIT = 1000
+
+Op = TicketChange.Op
+
+
+def record(org_id, ticket_ids, op=Op.UPSERT):
+    """Org-wide rows for tickets that were written (or deleted)."""
+    ids = list(dict.fromkeys(ticket_ids))
+    if org_id is not None and ids:
+        TicketChange.objects.bulk_create(
+            [TicketChange(organization_id=org_id, ticket_id=t, op=op) for t in ids], batch_size=1000)
+
+
+def record_visibility(pairs, op):
+    """Per-user rows for (ticket_id, user_id) pairs that gained/lost visibility."""
+    pairs = list(pairs)
+    if not pairs:
+        return
+    orgs = dict(Ticket.objects.filter(id__in={t for t, _ in pairs}).values_list("id", "organization_id"))
+    TicketChange.objects.bulk_create(
+        [TicketChange(organization_id=orgs[t], ticket_id=t, user_id=u, op=op) for t, u in pairs if t in orgs],
+        batch_size=1000,
+    )
+
+
+def record_deleted(org_id, ticket_id, viewer_ids):
+    """
+    DELETE rows for a deleted ticket: one per user who could see it (its
+    TicketVisibility rows, read before the delete) and one org-wide row,
+    which only org-wide roles read.
+    """
+    TicketChange.objects.bulk_create(
+        [TicketChange(organization_id=org_id, ticket_id=ticket_id, user_id=u, op=Op.DELETE)
+         for u in [None, *viewer_ids]],
+        batch_size=1000,
+    )
+
+
+def touch(ticket_id):
+    """UPSERT row for a ticket whose comments/attachments changed."""
+    org_id = Ticket.objects.filter(pk=ticket_id).values_list("organization_id", flat=True).first()
+    record(org_id, [ticket_id])
+
+
+def head():
+    return TicketChange.objects.aggregate(m=Max("id"))["m"] or 0
+
+
+def feed(user, cursor, limit, tickets_qs):
+    """
+    -> {"cursor", "has_more", "reset", "tickets": [Ticket], "deleted": [id]}
+    tickets_qs: the caller's visible, org-scoped ticket queryset (annotated as the list is).
+    """
+    from .visibility import sees_whole_org  # visibility writes through this module
+
+    if cursor is None or cursor < _oldest() - 1:
+        return {"cursor": head(), "has_more": False, "reset": True, "tickets": [], "deleted": []}
+
+    rows = list(
+        TicketChange.objects.filter(organization_id=user.organization_id, id__gt=cursor)
+        .filter(Q(user__isnull=True) | Q(user=user))
+        .order_by("id").values_list("id", "ticket_id", "op", "user_id")[:limit + 1]
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    whole_org = sees_whole_org(user)
+    # an org-wide DELETE is for org-wide roles; everyone else gets their own row
+    deleted = {t for _, t, op, uid in rows if op == Op.DELETE and (uid is not None or whole_org)}
+    hidden = {t for _, t, op, _ in rows if op == Op.HIDDEN}
+    tickets = list(tickets_qs.filter(id__in={t for _, t, op, _ in rows if op != Op.DELETE}).order_by("id"))
+    # org-wide rows for tickets this user never saw are simply skipped
+    gone = deleted | (hidden - {t.pk for t in tickets})
+    return {
+        "cursor": rows[-1][0] if rows else cursor,
+        "has_more": has_more,
+        "reset": False,
+        "tickets": tickets,
+        "deleted": sorted(gone),
+    }
+
+
+def _oldest():
+    return TicketChange.objects.aggregate(m=Min("id"))["m"] or 0
+
+
+def prune(now=None):
+    """Drop rows past retention, always keeping the newest so cursors stay comparable."""
+    newest = head()
+    cutoff = (now or timezone.now()) - RETENTION
+    return TicketChange.objects.filter(created_at__lt=cutoff, id__lt=newest).delete()[0]
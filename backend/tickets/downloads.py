@@ -0,0 +1,142 @@
+# backend/tickets/downloads.py
+"""
+Attachment downloads with HTTP Range, conditional requests and optional
+proxy offload.
+
+In-process, a whole file is returned as a FileResponse on the open file.
+Under ASGI (uvicorn, which the SSE stream needs) there is no
+wsgi.file_wrapper and no sendfile: Django consumes the file iterator in a
+thread, holding the whole file (or range) in memory, before sending it from
+Python. Only a WSGI server such as gunicorn's sync worker hands the file to
+os.sendfile.
+A single "bytes=a-b" range is served the same way: the file is positioned
+at `a`, Content-Length is set to the range length, and _Slice stops at the
+end of the range. Multi-range requests get the whole file (allowed by
+RFC 9110).
+
+With ATTACHMENT_SENDFILE = "x-accel-redirect" (nginx) or "x-sendfile"
+(Apache/lighttpd), the view only authorizes the request and names the file.
+The proxy then streams the file and handles Range itself. Use it in the
+ASGI deployment.
+"""
+import mimetypes
+import os
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe, quote_etag
+
+BLOCK_SIZE = 64 * 1024
+ENCODED_TYPES = {
+    "br": "application/x-brotli",
+    "bzip2": "application/x-bzip",
+    "compress": "application/x-compress",
+    "gzip": "application/gzip",
+    "xz": "application/x-xz",
+}
+
+
+class _Slice:
+    """Read-only view of `length` bytes of an open file from its current position."""
+    def __init__(self, f, length):
+        self._f = f
+        self._left = length
+
+    def read(self, size=-1):
+        if self._left <= 0:
+            return b""
+        n = self._left if size is None or size < 0 else min(size, self._left)
+        data = self._f.read(n)
+        self._left -= len(data)
+        return data
+
+    def fileno(self):
+        return self._f.fileno()
+
+    def close(self):
+        self._f.close()
+
+
+def parse_range(header, size):
+    """
+    "bytes=a-b" -> (start, end) inclusive; None to send the whole file;
+    ValueError if the range cannot be satisfied.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[len("bytes="):].strip().partition("-")
+    try:
+        if first == "":
+            n = int(last)  # suffix: the last n bytes
+            if n <= 0:
+                raise ValueError
+            return max(size - n, 0), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None  # malformed: ignore the header, as RFC 9110 allows
+    if start >= size or start > end:
+        raise ValueError
+    return start, min(end, size - 1)
+
+
+def _if_range_matches(request, etag, last_modified):
+    value = request.META.get("HTTP_IF_RANGE")
+    if not value:
+        return True
+    if value.startswith(('"', "W/")):
+        return value == etag  # strong comparison; weak tags never match
+    return parse_http_date_safe(value) == last_modified
+
+
+def serve(request, path, filename, etag_value=None, storage_name=""):
+    """
+    Response for the file at `path`. etag_value is unquoted (the blob's
+    sha256); files without one get a size+mtime tag.
+    """
+    st = os.stat(path)
+    size, last_modified = st.st_size, int(st.st_mtime)
+    etag = quote_etag(etag_value or f"{size:x}-{last_modified:x}")
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    content_type, encoding = mimetypes.guess_type(filename)
+    # as FileResponse does: never label foo.tar.gz as tar + Content-Encoding
+    content_type = ENCODED_TYPES.get(encoding, content_type) or "application/octet-stream"
+    mode = getattr(settings, "ATTACHMENT_SENDFILE", "")
+    if mode:
+        response = HttpResponse(content_type=content_type)
+        if mode == "x-accel-redirect":
+            prefix = getattr(settings, "ATTACHMENT_ACCEL_PREFIX", "/protected-media/")
+            response["X-Accel-Redirect"] = prefix.rstrip("/") + "/" + storage_name
+        else:
+            response["X-Sendfile"] = path
+    else:
+        span = None
+        if _if_range_matches(request, etag, last_modified):
+            try:
+                span = parse_range(request.META.get("HTTP_RANGE"), size)
+            except ValueError:
+                response = HttpResponse(status=416)
+                response["Content-Range"] = f"bytes */{size}"
+                return response
+        f = open(path, "rb")
+        if span is None:
+            response = FileResponse(f, content_type=content_type)
+        else:
+            start, end = span
+            f.seek(start)
+            response = FileResponse(_Slice(f, end - start + 1), status=206, content_type=content_type)
+            response["Content-Length"] = end - start + 1
+            response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response.block_size = BLOCK_SIZE
+
+    response["Content-Disposition"] = content_disposition_header(True, filename)
+    response["Accept-Ranges"] = "bytes"
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    response["Cache-Control"] = "private, max-age=0, must-revalidate"
+    return response
@@ -0,0 +1,267 @@
+# backend/tickets/events.py
+"""
+Real-time ticket events: in-process fan-out plus a pluggable cross-process broker.
+
+Writers (signals, bulk.after_write) call ticket_changed() / comment_added()
+/ membership_changed(). Events are handed to the broker after the
+transaction commits. The broker delivers them to the Hub of every process,
+and the Hub puts each one on the queue of each open stream (SSE connection)
+in that org. Each stream applies visibility.can_see() to the event's
+`audience`, using the subscriber's role and group ids held in memory.
+Filtering therefore costs no query per subscriber or per event. A user who
+could see a ticket before a change but not after gets `ticket.hidden`.
+
+Brokers (settings.EVENTS_BROKER):
+  - tickets.events.LocalBroker: single process (runserver, tests, one ASGI worker).
+  - tickets.events.PostgresBroker: NOTIFY on publish and one LISTEN thread per
+    process. Postgres sends a NOTIFY only on commit and drops it on rollback.
+
+A stream is a coroutine waiting on an asyncio.Queue, so one ASGI worker can
+hold thousands of idle connections. A stream that falls EVENTS_QUEUE_SIZE
+events behind gets a single `tickets.refresh` in their place.
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.utils.module_loading import import_string
+
+from core import metrics
+
+from .models import Group, Ticket
+from .visibility import can_see
+
+log = logging.getLogger(__name__)
+
+QUEUE_SIZE = getattr(settings, "EVENTS_QUEUE_SIZE", 500)
+BULK_LIMIT = 200  # larger batches publish one tickets.refresh instead of per-ticket events
+CLOSED = ("RESOLVED", "CLOSED")
+
+
+# -- fan-out ---------------------------------------------------------------
+class Subscription:
+    def __init__(self, org_id, viewer):
+        self.org_id = org_id
+        self.viewer = viewer  # {"id", "role", "groups"}
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self.overflowed = False
+
+    def push(self, event):
+        # may run on any thread; the queue belongs to the subscriber's loop
+        self.loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    def render(self, event):
+        """The client-facing form of `event` for this viewer, or None to skip it."""
+        kind = event["type"]
+        if kind == "membership":
+            if event["user"] != self.viewer["id"]:
+                return None
+            groups = self.viewer["groups"]
+            (groups.add if event["member"] else groups.discard)(event["group"])
+            return {"type": "tickets.refresh"}  # a whole group's tickets appeared/disappeared
+        if kind == "tickets.refresh":
+            return {"type": kind}
+        if can_see(self.viewer, event["audience"]):
+            return {"type": kind, "ticket": event["ticket"], **event.get("extra", {})}
+        if event.get("was") and can_see(self.viewer, event["was"]):
+            return {"type": "ticket.hidden", "ticket": {"id": event["ticket"]["id"]}}
+        return None
+
+
+class Hub:
+    def __init__(self):
+        self._subs = defaultdict(set)
+        self._lock = threading.Lock()
+        self._broker = None
+
+    @property
+    def broker(self):
+        if self._broker is None:
+            with self._lock:
+                if self._broker is None:
+                    cls = import_string(getattr(settings, "EVENTS_BROKER", "tickets.events.LocalBroker"))
+                    self._broker = cls(self.deliver)
+        return self._broker
+
+    def subscribe(self, org_id, viewer):
+        self.broker.listen()
+        sub = Subscription(org_id, viewer)
+        with self._lock:
+            self._subs[org_id].add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subs[sub.org_id].discard(sub)
+            if not self._subs[sub.org_id]:
+                del self._subs[sub.org_id]
+
+    def deliver(self, event):
+        with self._lock:
+            subs = list(self._subs.get(event["org"], ()))
+        for sub in subs:
+            sub.push(event)
+
+    def count(self):
+        with self._lock:
+            return sum(len(s) for s in self._subs.values())
+
+
+hub = Hub()
+metrics.gauge("event_streams", "Open ticket event (SSE) streams.", hub.count)
+
+
+# -- brokers ---------------------------------------------------------------
+class LocalBroker:
+    """Delivers to this process only."""
+    def __init__(self, deliver):
+        self.deliver = deliver
+
+    def listen(self):
+        pass
+
+    def publish(self, event):
+        transaction.on_commit(lambda: self.deliver(event))
+
+
+class PostgresBroker:
+    """LISTEN/NOTIFY on the default database; every process receives every event."""
+    channel = "ticket_events"
+
+    def __init__(self, deliver):
+        self.deliver = deliver
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def publish(self, event):
+        # part of the surrounding transaction: sent on commit, dropped on rollback
+        with connection.cursor() as cur:
+            cur.execute("SELECT pg_notify(%s, %s)", [self.channel, json.dumps(event, cls=DjangoJSONEncoder)])
+
+    def listen(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="ticket-events-listen", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        import psycopg2
+
+        db = settings.DATABASES["default"]
+        while True:
+            try:
+                conn = psycopg2.connect(
+                    dbname=db["NAME"], user=db.get("USER"), password=db.get("PASSWORD"),
+                    host=db.get("HOST") or None, port=db.get("PORT") or None,
+                )
+                conn.autocommit = True
+                conn.cursor().execute(f"LISTEN {self.channel}")
+                while True:
+                    if select.select([conn], [], [], 30) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        self.deliver(json.loads(conn.notifies.pop(0).payload))
+            except Exception:
+                log.exception("ticket event listener lost its connection; reconnecting")
+                threading.Event().wait(5)
+
+
+# -- publishing helpers ----------------------------------------------------
+def _audience(created_by, assignee, group, manager):
+    return {"created_by": created_by, "assignee": assignee, "group": group, "manager": manager}
+
+
+def _kind(before, after, created):
+    """before/after are tickets.rollup keys: (org, day, group, assignee, status, priority)."""
+    if created:
+        return "ticket.created"
+    if after[4] in CLOSED and before[4] not in CLOSED:
+        return "ticket.closed"
+    if after[3] != before[3]:
+        return "ticket.assigned"
+    return "ticket.updated"
+
+
+def _ticket_event(ticket, before, created, managers):
+    """ticket: the saved Ticket; before: its rollup key before the write (None if unknown)."""
+    after = (ticket.organization_id, None, ticket.group_id, ticket.assignee_id, ticket.status, ticket.priority)
+    event = {
+        "type": _kind(before, after, created) if before or created else "ticket.updated",
+        "org": ticket.organization_id,
+        "ticket": {
+            "id": ticket.pk, "subject": ticket.subject, "status": ticket.status,
+            "priority": ticket.priority, "group": ticket.group_id, "assignee": ticket.assignee_id,
+            "updated_at": ticket.updated_at,
+        },
+        "audience": _audience(ticket.created_by_id, ticket.assignee_id, ticket.group_id,
+                              managers.get(ticket.group_id)),
+    }
+    if before and (before[2], before[3]) != (ticket.group_id, ticket.assignee_id):
+        event["was"] = _audience(ticket.created_by_id, before[3], before[2], managers.get(before[2]))
+    return json.loads(json.dumps(event, cls=DjangoJSONEncoder))
+
+
+def _managers(group_ids):
+    return dict(Group.objects.filter(pk__in=set(group_ids)).values_list("id", "manager_id"))
+
+
+def ticket_changed(ticket, before=None, created=False):
+    tickets_changed(ticket.organization_id, [(before, ticket)], created=created)
+
+
+def tickets_changed(org_id, pairs, created=False):
+    """pairs: [(before rollup key or None, Ticket)] written in one batch."""
+    if not pairs:
+        return
+    if len(pairs) > BULK_LIMIT:
+        hub.broker.publish({"type": "tickets.refresh", "org": org_id})
+        return
+    groups = {t.group_id for _, t in pairs} | {b[2] for b, _ in pairs if b}
+    managers = _managers(groups)
+    for before, t in pairs:
+        hub.broker.publish(_ticket_event(t, before, created, managers))
+
+
+def ticket_deleted(ticket):
+    event = _ticket_event(ticket, None, False, _managers([ticket.group_id]))
+    event["type"] = "ticket.deleted"
+    event["ticket"] = {"id": ticket.pk}
+    hub.broker.publish(event)
+
+
+def comment_added(comment):
+    t = (Ticket.objects.filter(pk=comment.ticket_id)
+         .values("organization_id", "created_by_id", "assignee_id", "group_id", "group__manager_id").first())
+    if t is None:
+        return
+    hub.broker.publish({
+        "type": "ticket.commented",
+        "org": t["organization_id"],
+        "ticket": {"id": comment.ticket_id},
+        "extra": {"comment": {"id": comment.pk, "author": comment.author_id}},
+        "audience": _audience(t["created_by_id"], t["assignee_id"], t["group_id"], t["group__manager_id"]),
+    })
+
+
+def membership_changed(org_id, user_id, group_id, member):
+    hub.broker.publish({"type": "membership", "org": org_id, "user": user_id,
+                        "group": group_id, "member": member})
+
+
+def refresh(org_id):
+    """Tell every stream of the org to refetch (imports, rebuilds, manager changes)."""
+    hub.broker.publish({"type": "tickets.refresh", "org": org_id})
@@ -0,0 +1,126 @@
+# backend/tickets/export.py
+"""
+Streaming ticket export (CSV or NDJSON), shared by
+GET /api/tickets/export/ and `manage.py export_tickets`.
+
+Tickets are read with values().iterator(chunk_size) and, when requested,
+the comments of each chunk are fetched with one query per chunk. Memory
+therefore depends on the chunk size, not on the export size.
+
+Under ASGI, Django drains a sync iterator given to StreamingHttpResponse
+into a list before sending anything, so the view hands it alines()
+instead: the same lines, pulled in batches through sync_to_async.
+"""
+import csv
+import json
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+
+from .models import Comment
+
+# (output column, ORM path)
+TICKET_COLUMNS = [
+    ("id", "id"),
+    ("created_at", "created_at"),
+    ("updated_at", "updated_at"),
+    ("status", "status"),
+    ("priority", "priority"),
+    ("group", "group__name"),
+    ("customer_name", "customer_name"),
+    ("subject", "subject"),
+    ("description", "description"),
+    ("assignee", "assignee__username"),
+    ("created_by", "created_by__username"),
+]
+COMMENT_COLUMNS = [
+    ("comment_id", "id"),
+    ("comment_author", "author__username"),
+    ("comment_created_at", "created_at"),
+    ("comment_body", "body"),
+]
+FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+def iter_tickets(qs, with_comments=False, chunk_size=1000):
+    """Yield (ticket dict, [comment dicts]) in id order."""
+    rows = (qs.order_by("id")
+            .values(*(path for _, path in TICKET_COLUMNS))
+            .iterator(chunk_size=chunk_size))
+    while True:
+        batch = list(islice(rows, chunk_size))
+        if not batch:
+            return
+        comments = {}
+        if with_comments:
+            for c in (Comment.objects.filter(ticket_id__in=[r["id"] for r in batch])
+                      .order_by("ticket_id", "created_at", "id")
+                      .values("ticket_id", *(path for _, path in COMMENT_COLUMNS))):
+                comments.setdefault(c["ticket_id"], []).append(
+                    {col: c[path] for col, path in COMMENT_COLUMNS})
+        for r in batch:
+            yield {col: r[path] for col, path in TICKET_COLUMNS}, comments.get(r["id"], [])
+
+
+class _Echo:
+    """File-like object for csv.writer that hands each row back instead of buffering it."""
+    def write(self, value):
+        return value
+
+
+def _cell(v):
+    return v.isoformat() if hasattr(v, "isoformat") else v
+
+
+def _json_default(v):
+    # full isoformat (microseconds), so an import round-trip keeps timestamps;
+    # DjangoJSONEncoder cuts them to milliseconds
+    if hasattr(v, "isoformat"):
+        return v.isoformat()
+    raise TypeError(f"{type(v).__name__} is not JSON serializable")
+
+
+def csv_lines(qs, with_comments=False, chunk_size=1000):
+    """One row per ticket, or one per comment (ticket columns repeated) with comments."""
+    writer = csv.writer(_Echo())
+    header = [col for col, _ in TICKET_COLUMNS]
+    if with_comments:
+        header += [col for col, _ in COMMENT_COLUMNS]
+    yield writer.writerow(header)
+    blank = [""] * len(COMMENT_COLUMNS)
+    for ticket, comments in iter_tickets(qs, with_comments, chunk_size):
+        base = [_cell(v) for v in ticket.values()]
+        if not with_comments:
+            yield writer.writerow(base)
+        elif not comments:
+            yield writer.writerow(base + blank)
+        else:
+            for c in comments:
+                yield writer.writerow(base + [_cell(v) for v in c.values()])
+
+
+def ndjson_lines(qs, with_comments=False, chunk_size=1000):
+    """One JSON object per ticket; comments nested as a list."""
+    for ticket, comments in iter_tickets(qs, with_comments, chunk_size):
+        if with_comments:
+            ticket["comments"] = comments
+        yield json.dumps(ticket, default=_json_default) + "\n"
+
+
+def lines(qs, fmt="csv", with_comments=False, chunk_size=1000):
+    writer = csv_lines if fmt == "csv" else ndjson_lines
+    return writer(qs, with_comments=with_comments, chunk_size=chunk_size)
+
+
+async def alines(lines, batch=500):
+    """Async iterator over `lines` (a generator from lines()), `batch` lines per chunk."""
+    take = sync_to_async(lambda: "".join(islice(lines, batch)), thread_sensitive=True)
+    try:
+        while True:
+            chunk = await take()
+            if not chunk:
+                return
+            yield chunk
+    finally:
+        # a client that goes away mid-export: end the query in its thread
+        await sync_to_async(lines.close, thread_sensitive=True)()
@@ -0,0 +1,249 @@
+# backend/tickets/importer.py
+"""
+High-volume ticket import (CSV or NDJSON), shared by
+`manage.py import_tickets` and POST /api/tickets/import/.
+
+Input is the export format of tickets.export. NDJSON has one ticket per line,
+with optional "comments" and "attachments" lists. CSV has one row per
+ticket, or per comment with the ticket columns repeated; consecutive rows
+sharing an "id" are merged. Groups, assignees, creators and comment authors
+are referenced by name/username and resolved through lookup tables built
+once per org.
+
+Records are written in chunks: tickets, then comments, then attachment
+metadata, each with bulk_create, and every chunk commits on its own.
+Attachment rows only point at files the org already holds: "file" must be
+the storage name of an attachment of one of its tickets (as in an export
+of the same org), so an import cannot expose another org's files. Blob
+ref_counts rise with the new rows. A run
+that stops can resume with skip=<records already committed>; the count is
+reported after every chunk.
+"""
+import csv
+import json
+import posixpath
+import time
+from collections import Counter
+from itertools import groupby, islice
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import events, rollup
+from .bulk import after_write
+from .models import Attachment, Blob, Comment, Group, GroupMembership, Ticket
+from .serializers import TicketBulkItemSerializer
+
+FORMATS = ("csv", "ndjson")
+MAX_REPORTED_ERRORS = 1000
+ATTACHMENT_DIRS = ("attachments/", "blobs/")
+
+
+def read_records(stream, fmt):
+    """Yield one dict per source ticket from an iterable of text lines."""
+    if fmt == "ndjson":
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+        return
+    rows = csv.DictReader(stream)
+    for _, group in groupby(rows, key=lambda r: r.get("id") or object()):
+        group = list(group)
+        record = {k: v for k, v in group[0].items() if not k.startswith("comment_")}
+        record["comments"] = [
+            {"author": r.get("comment_author"), "created_at": r.get("comment_created_at"),
+             "body": r.get("comment_body")}
+            for r in group if r.get("comment_body")
+        ]
+        yield record
+
+
+def _when(raw):
+    if not raw:
+        return None
+    dt = parse_datetime(raw) if isinstance(raw, str) else None
+    if dt is None:
+        raise ValueError(f"Invalid datetime: {raw!r}")
+    return timezone.make_aware(dt) if timezone.is_naive(dt) else dt
+
+
+class Importer:
+    def __init__(self, organization_id, default_creator_id, chunk_size=1000, dry_run=False):
+        self.org_id = organization_id
+        self.default_creator_id = default_creator_id
+        self.chunk_size = chunk_size
+        self.dry_run = dry_run
+        self.files = {}  # storage name -> (blob_id, size) of this org's attachments, or None
+
+        # lookup tables, built once per org
+        User = get_user_model()
+        groups = Group.objects.filter(organization_id=organization_id).values_list("id", "name")
+        self.groups = {name.lower(): gid for gid, name in groups}
+        users = User.objects.filter(organization_id=organization_id).values_list("id", "username")
+        self.users = {username.lower(): uid for uid, username in users}
+        self.members = set(
+            GroupMembership.objects.filter(group__organization_id=organization_id)
+            .values_list("group_id", "user_id")
+        )
+        self.ctx = {"groups": set(self.groups.values()), "members": self.members}
+
+        self.stats = {"records": 0, "tickets": 0, "comments": 0, "attachments": 0,
+                      "failed": 0, "errors": [], "committed_through": 0}
+        self.started = None
+
+    # -- resolution --------------------------------------------------------
+    def _user(self, name):
+        return self.users.get(str(name).lower()) if name else None
+
+    def _attachment(self, a):
+        """Unsaved Attachment for a file this org's attachments already use, or raises ValueError."""
+        name = a["file"]
+        if (not isinstance(name, str) or posixpath.normpath(name) != name
+                or not name.startswith(ATTACHMENT_DIRS) or ".." in name.split("/")):
+            raise ValueError(f"Attachment file must be a storage path under attachments/ or blobs/: {name!r}")
+        if name not in self.files:
+            # only files this org already references: a bare storage path may be another org's
+            self.files[name] = (
+                Attachment.objects.filter(file=name, ticket__organization_id=self.org_id)
+                .values_list("blob_id", "size").first())
+        known = self.files[name]
+        if known is None:
+            raise ValueError(f"No attachment of this organization uses {name!r}.")
+        blob_id, size = known
+        return Attachment(file=name, blob_id=blob_id, size=size,
+                          filename=str(a.get("filename") or posixpath.basename(name))[:255])
+
+    def _prepare(self, record):
+        """Record -> (Ticket, comments, attachments) or raises ValueError with the reasons."""
+        if not isinstance(record, dict):
+            raise ValueError({"non_field_errors": ["Expected an object."]})
+        group_id = self.groups.get(str(record.get("group") or "").lower())
+        if group_id is None:
+            raise ValueError({"group": [f"Unknown group {record.get('group')!r}."]})
+        assignee_name = record.get("assignee") or None
+        assignee_id = self._user(assignee_name)
+        if assignee_name and assignee_id is None:
+            raise ValueError({"assignee": [f"Unknown user {assignee_name!r}."]})
+
+        ser = TicketBulkItemSerializer(data={
+            "group": group_id, "assignee": assignee_id,
+            "customer_name": record.get("customer_name"), "subject": record.get("subject"),
+            "description": record.get("description") or "",
+            "status": record.get("status") or Ticket.Status.OPEN,
+            "priority": record.get("priority") or Ticket.Priority.MEDIUM,
+        }, context=self.ctx)
+        if not ser.is_valid():
+            raise ValueError(ser.errors)
+        d = ser.validated_data
+
+        try:
+            created_at = _when(record.get("created_at"))
+            updated_at = _when(record.get("updated_at")) or created_at
+            ticket = Ticket(
+                organization_id=self.org_id, group_id=group_id, assignee_id=assignee_id,
+                created_by_id=self._user(record.get("created_by")) or self.default_creator_id,
+                customer_name=d["customer_name"], subject=d["subject"], description=d["description"],
+                status=d["status"], priority=d["priority"],
+            )
+            ticket._import_times = (created_at, updated_at)
+            comments = [
+                (Comment(author_id=self._user(c.get("author")) or self.default_creator_id,
+                         body=c.get("body") or ""), _when(c.get("created_at")))
+                for c in record.get("comments") or []
+            ]
+            attachments = []
+            for a in record.get("attachments") or []:
+                attachment = self._attachment(a)
+                attachment.uploaded_by_id = self._user(a.get("uploaded_by")) or self.default_creator_id
+                attachments.append((attachment, _when(a.get("uploaded_at"))))
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError({"non_field_errors": [str(e)]})
+        return ticket, comments, attachments
+
+    # -- writing -----------------------------------------------------------
+    @staticmethod
+    def _restore_times(objs, field):
+        """auto_now_add overwrote the source timestamps on insert; put them back in one UPDATE."""
+        fixed = []
+        for obj, when in objs:
+            if when is not None:
+                setattr(obj, field, when)
+                fixed.append(obj)
+        return fixed
+
+    def _write(self, prepared):
+        with transaction.atomic():
+            tickets = Ticket.objects.bulk_create([t for t, _, _ in prepared], batch_size=500)
+            restored = []
+            for t in tickets:
+                created_at, updated_at = t._import_times
+                if created_at is not None:
+                    t.created_at, t.updated_at = created_at, updated_at
+                    restored.append(t)
+            if restored:
+                Ticket.objects.bulk_update(restored, ["created_at", "updated_at"], batch_size=500)
+
+            comments, attachments = [], []
+            for t, cs, atts in prepared:
+                for c, when in cs:
+                    c.ticket_id = t.pk
+                    comments.append((c, when))
+                for a, when in atts:
+                    a.ticket_id = t.pk
+                    attachments.append((a, when))
+            Comment.objects.bulk_create([c for c, _ in comments], batch_size=1000)
+            fixed = self._restore_times(comments, "created_at")
+            if fixed:
+                Comment.objects.bulk_update(fixed, ["created_at"], batch_size=1000)
+            Attachment.objects.bulk_create([a for a, _ in attachments], batch_size=1000)
+            for blob_id, n in Counter(a.blob_id for a, _ in attachments if a.blob_id).items():
+                Blob.objects.filter(pk=blob_id).update(ref_count=F("ref_count") + n)
+            fixed = self._restore_times(attachments, "uploaded_at")
+            if fixed:
+                Attachment.objects.bulk_update(fixed, ["uploaded_at"], batch_size=1000)
+
+            ids = [t.pk for t in tickets]
+            after_write(self.org_id, [(None, rollup.key_for(t), t.created_at) for t in tickets],
+                        resync_ids=ids, ticket_ids=ids)
+            events.refresh(self.org_id)
+        self.stats["tickets"] += len(tickets)
+        self.stats["comments"] += len(comments)
+        self.stats["attachments"] += len(attachments)
+
+    def run(self, records, skip=0, progress=None):
+        """Import `records` (after skipping `skip`); progress(stats) is called after each chunk."""
+        self.started = time.monotonic()
+        records = islice(records, skip, None)
+        n = skip
+        while True:
+            chunk = list(islice(records, self.chunk_size))
+            if not chunk:
+                break
+            prepared = []
+            for record in chunk:
+                n += 1
+                try:
+                    prepared.append(self._prepare(record))
+                except ValueError as e:
+                    self.stats["failed"] += 1
+                    if len(self.stats["errors"]) < MAX_REPORTED_ERRORS:
+                        self.stats["errors"].append({"record": n, "errors": e.args[0]})
+            if prepared and not self.dry_run:
+                self._write(prepared)
+            self.stats["records"] = n - skip
+            self.stats["committed_through"] = n
+            if progress:
+                progress(self.summary())
+        return self.summary()
+
+    def summary(self):
+        elapsed = time.monotonic() - self.started if self.started else 0.0
+        return {
+            **self.stats,
+            "dry_run": self.dry_run,
+            "seconds": round(elapsed, 3),
+            "rows_per_second": round(self.stats["records"] / elapsed, 1) if elapsed else None,
+        }
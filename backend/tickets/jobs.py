@@ -0,0 +1,235 @@
+# backend/tickets/jobs.py
+"""
+Database-backed background jobs, run by `manage.py runworker`.
+
+    @jobs.task("tickets.notify_assignee", max_attempts=3, concurrency=2)
+    def notify_assignee(payload): ...
+
+    jobs.enqueue("tickets.notify_assignee", {"ticket": t.pk})
+
+    @jobs.periodic("uploads.gc", every=timedelta(hours=1))
+    def gc_uploads(payload): ...
+
+enqueue() inserts a Job row in the caller's transaction: the job exists
+only if the request's writes commit. Workers claim due jobs with
+SELECT ... FOR UPDATE SKIP LOCKED where the database supports it. On
+SQLite and SQL Server they instead race a conditional UPDATE
+(status QUEUED -> RUNNING) and the loser moves on. A failed job is
+retried with exponential backoff until max_attempts. `concurrency` limits
+how many jobs of one name run at once across all workers. A job whose
+worker died is re-queued after its task's `timeout`.
+
+Periodic tasks keep exactly one pending job each, thanks to the
+job_pending_key_uniq constraint on key "periodic:<name>". Every worker
+loop tops them up.
+"""
+import logging
+import os
+import random
+import socket
+import traceback
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from core import metrics
+
+from .models import Job
+
+log = logging.getLogger(__name__)
+
+RETENTION = timedelta(days=getattr(settings, "JOB_RETENTION_DAYS", 7))
+BACKOFF_BASE = 10      # seconds before the first retry
+BACKOFF_CAP = 3600     # never wait longer than this between retries
+
+
+@dataclass
+class Task:
+    name: str
+    func: object
+    max_attempts: int = 5
+    concurrency: int = None
+    timeout: timedelta = timedelta(minutes=10)
+    every: timedelta = None  # periodic tasks only
+
+
+REGISTRY = {}
+
+
+def task(name, max_attempts=5, concurrency=None, timeout=timedelta(minutes=10)):
+    """Register func(payload) as the handler for jobs called `name`."""
+    def register(func):
+        REGISTRY[name] = Task(name, func, max_attempts, concurrency, timeout)
+        return func
+    return register
+
+
+def periodic(name, every, **options):
+    """Like task(), and also run it every `every` (measured from the end of the last run)."""
+    def register(func):
+        task(name, **options)(func)
+        REGISTRY[name].every = every
+        return func
+    return register
+
+
+def enqueue(name, payload=None, run_at=None, delay=None, key=None):
+    """
+    Queue a job. With `key`, returns the pending job of that key instead of
+    adding a second one.
+    """
+    if name not in REGISTRY:
+        raise KeyError(f"Unknown job {name!r}")
+    now = timezone.now()
+    job = Job(
+        name=name, payload=payload or {}, key=key,
+        run_at=run_at or now + (delay or timedelta()),
+        max_attempts=REGISTRY[name].max_attempts,
+    )
+    if key is None:
+        job.save()
+        return job
+    try:
+        with transaction.atomic():
+            job.save()
+        return job
+    except IntegrityError:
+        return Job.objects.filter(key=key, status__in=[Job.Status.QUEUED, Job.Status.RUNNING]).first()
+
+
+def backoff(attempts):
+    """Seconds to wait before retry number `attempts` (1-based), with jitter."""
+    delay = min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_CAP)
+    return delay * random.uniform(0.8, 1.2)
+
+
+# -- worker side ---------------------------------------------------------
+def worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def schedule_periodic(now=None):
+    """Make sure every periodic task has its one pending job."""
+    now = now or timezone.now()
+    for t in REGISTRY.values():
+        if t.every is None:
+            continue
+        key = f"periodic:{t.name}"
+        if Job.objects.filter(key=key, status__in=[Job.Status.QUEUED, Job.Status.RUNNING]).exists():
+            continue
+        last = (Job.objects.filter(name=t.name, finished_at__isnull=False)
+                .order_by("-finished_at").values_list("finished_at", flat=True).first())
+        enqueue(t.name, run_at=max(now, last + t.every) if last else now, key=key)
+
+
+def reap(now=None):
+    """Re-queue (or fail) RUNNING jobs whose worker stopped reporting back."""
+    now = now or timezone.now()
+    n = 0
+    for t in REGISTRY.values():
+        stale = Job.objects.filter(name=t.name, status=Job.Status.RUNNING, locked_at__lt=now - t.timeout)
+        n += stale.filter(attempts__lt=F("max_attempts")).update(
+            status=Job.Status.QUEUED, run_at=now, locked_by="", last_error="Worker timed out.")
+        n += stale.update(status=Job.Status.FAILED, finished_at=now, last_error="Worker timed out.")
+    return n
+
+
+def _full_names():
+    """Task names already running at their concurrency limit."""
+    limited = {t.name: t.concurrency for t in REGISTRY.values() if t.concurrency}
+    if not limited:
+        return set()
+    running = (Job.objects.filter(status=Job.Status.RUNNING, name__in=limited)
+               .values("name").annotate(n=Count("id")))
+    return {r["name"] for r in running if r["n"] >= limited[r["name"]]}
+
+
+def _due(now, names):
+    qs = Job.objects.filter(status=Job.Status.QUEUED, run_at__lte=now).exclude(name__in=_full_names())
+    if names:
+        qs = qs.filter(name__in=names)
+    return qs.order_by("run_at", "id")
+
+
+def claim(worker, names=None, now=None):
+    """Take one due job for `worker`, or return None."""
+    now = now or timezone.now()
+    claimed = dict(status=Job.Status.RUNNING, locked_by=worker, locked_at=now, attempts=F("attempts") + 1)
+    job = None
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            job = _due(now, names).select_for_update(skip_locked=True).first()
+            if job is not None:
+                Job.objects.filter(pk=job.pk).update(**claimed)
+    else:
+        # no SKIP LOCKED: let workers race a conditional UPDATE; losers try the next id
+        for pk in _due(now, names).values_list("pk", flat=True)[:10]:
+            if Job.objects.filter(pk=pk, status=Job.Status.QUEUED).update(**claimed):
+                job = Job(pk=pk)
+                break
+    if job is None:
+        return None
+    job.refresh_from_db()
+
+    limit = REGISTRY[job.name].concurrency if job.name in REGISTRY else None
+    if limit and Job.objects.filter(name=job.name, status=Job.Status.RUNNING).count() > limit:
+        # another worker claimed the same slot at the same moment: hand ours back
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.Status.QUEUED, locked_by="", locked_at=None, attempts=F("attempts") - 1)
+        return None
+    return job
+
+
+def run(job):
+    """Execute a claimed job and record the outcome."""
+    t = REGISTRY.get(job.name)
+    try:
+        if t is None:
+            raise KeyError(f"No handler registered for {job.name!r}")
+        t.func(job.payload)
+    except Exception:
+        error = traceback.format_exc()[-4000:]
+        log.warning("Job %s #%s failed (attempt %s/%s)", job.name, job.pk, job.attempts, job.max_attempts)
+        if t is not None and job.attempts < job.max_attempts:
+            Job.objects.filter(pk=job.pk).update(
+                status=Job.Status.QUEUED, run_at=timezone.now() + timedelta(seconds=backoff(job.attempts)),
+                locked_by="", last_error=error)
+            return Job.Status.QUEUED
+        Job.objects.filter(pk=job.pk).update(status=Job.Status.FAILED, finished_at=timezone.now(), last_error=error)
+        return Job.Status.FAILED
+    Job.objects.filter(pk=job.pk).update(status=Job.Status.DONE, finished_at=timezone.now(), locked_by="")
+    return Job.Status.DONE
+
+
+def run_pending(worker=None, names=None, limit=None):
+    """Run due jobs until none are left (or `limit` ran); returns how many ran."""
+    worker = worker or worker_id()
+    n = 0
+    while limit is None or n < limit:
+        job = claim(worker, names)
+        if job is None:
+            break
+        run(job)
+        n += 1
+    return n
+
+
+# -- built-in tasks ------------------------------------------------------
+@periodic("jobs.prune", every=timedelta(hours=6))
+def prune(payload):
+    """Delete finished jobs older than JOB_RETENTION_DAYS."""
+    cutoff = timezone.now() - RETENTION
+    Job.objects.filter(status__in=[Job.Status.DONE, Job.Status.FAILED], finished_at__lt=cutoff).delete()
+
+
+def counts():
+    """{(("name", n), ("status", s)): count} of the job table."""
+    return {(("name", n), ("status", s)): c
+            for n, s, c in Job.objects.values_list("name", "status").annotate(c=Count("id")).order_by()}
+
+
+metrics.collector("jobs", "gauge", "Background jobs by name and status.", counts)
@@ -0,0 +1,57 @@
+import os
+import tempfile
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+from rest_framework.request import Request
+from rest_framework.views import APIView
+
+from accounts.models import TokenPrincipal
+from core import throttling
+
+
+class Command(BaseCommand):
+    help = ("Time BucketThrottle.allow_request per request with each backend, for one hot user "
+            "and for many users and IPs. Uses throwaway buckets; no database.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=100000)
+        parser.add_argument("--users", type=int, default=5000, help="Distinct users/IPs in the spread run")
+
+    def handle(self, *args, **opts):
+        n = opts["requests"]
+        rates = {"list": {"user": f"{n * 10}/s", "org": f"{n * 10}/s"}, "auth": {"ip": f"{n * 10}/s"}}
+        with tempfile.TemporaryDirectory() as tmp, override_settings(THROTTLE_RATES=rates):
+            backends = {"local": throttling.LocalBackend(), "shared file": throttling.SharedFileBackend(os.path.join(tmp, "buckets"))}
+            for name, backend in backends.items():
+                throttling._backend = backend
+                for label, reqs in (("one user", self._requests(1, authed=True)),
+                                    (f"{opts['users']} users", self._requests(opts["users"], authed=True)),
+                                    (f"{opts['users']} anonymous IPs", self._requests(opts["users"], authed=False))):
+                    self._run(f"{name}, {label}", reqs, n)
+            throttling._backend = None
+
+    def _requests(self, count, authed):
+        factory, view = RequestFactory(), APIView()
+        out = []
+        for i in range(count):
+            req = Request(factory.get("/api/tickets/", REMOTE_ADDR=f"10.{i // 65536}.{i // 256 % 256}.{i % 256}"))
+            if authed:
+                req.user = TokenPrincipal.from_claims(
+                    i + 1, {"organization_id": i % 50 + 1, "role": "AGENT", "is_active": True, "username": f"u{i}"})
+            else:
+                req.user = AnonymousUser()
+            out.append((req, view))
+        return out
+
+    def _run(self, label, reqs, n):
+        throttle = throttling.BucketThrottle()
+        refused = 0
+        started = time.perf_counter()
+        for i in range(n):
+            req, view = reqs[i % len(reqs)]
+            refused += not throttle.allow_request(req, view)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"{label:<32} {elapsed / n * 1e6:6.1f} µs/request   refused {refused}")
@@ -0,0 +1,69 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from accounts.models import Organization
+from tickets.models import Comment, GroupMembership, Ticket, TicketDailyStats
+from tickets.visibility import visible_tickets
+
+
+def hot_queries(org, agent):
+    """(label, queryset) for each query a hot endpoint runs."""
+    org_qs = Ticket.objects.filter(organization=org)
+    start = timezone.localdate() - timedelta(days=6)
+    yield "ticket-list (admin, first page)", org_qs.order_by("-created_at", "-id")[:25]
+    yield "ticket-list (admin, recent activity)", org_qs.order_by("-updated_at", "-id")[:25]
+    yield "ticket-list (open queue)", org_qs.filter(
+        status__in=["OPEN", "IN_PROGRESS"], assignee__isnull=True).order_by("created_at")[:25]
+    rollup_qs = TicketDailyStats.objects.filter(organization=org)
+    yield "admin-stats by_status (rollup)", rollup_qs.values("status").annotate(c=Sum("count")).order_by()
+    yield "admin-stats last_7_days (rollup)", (
+        rollup_qs.filter(day__gte=start).values("day").annotate(c=Sum("count")).order_by()
+    )
+    yield "admin-stats top_agents (rollup)", (
+        rollup_qs.values("assignee").annotate(c=Sum("count")).order_by("-c")[:5]
+    )
+    if agent is not None:
+        yield "ticket-list (agent)", visible_tickets(agent, org_qs).order_by("-created_at", "-id")[:25]
+        yield "my-stats by_status (agent)", (
+            visible_tickets(agent, org_qs).values("status").annotate(c=Count("id")).order_by()
+        )
+        yield "membership lookup (agent)", GroupMembership.objects.filter(user=agent).values("group_id")
+    ticket = org_qs.order_by("-id").first()
+    if ticket is not None:
+        yield "ticket comments", Comment.objects.filter(ticket=ticket).order_by("created_at")
+
+
+class Command(BaseCommand):
+    help = "Print EXPLAIN output for the queries behind the hot ticket endpoints."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--org", type=int, help="Organization id (default: first)")
+        parser.add_argument("--agent", type=int, help="Agent user id (default: first AGENT in org)")
+        parser.add_argument("--analyze", action="store_true",
+                            help="Run EXPLAIN ANALYZE (PostgreSQL only; executes the queries)")
+
+    def handle(self, *args, **opts):
+        org = (Organization.objects.filter(id=opts["org"]) if opts["org"]
+               else Organization.objects.order_by("id")).first()
+        if org is None:
+            raise CommandError("No organization found.")
+
+        User = get_user_model()
+        agents = User.objects.filter(organization=org, role="AGENT")
+        agent = (agents.filter(id=opts["agent"]) if opts["agent"] else agents.order_by("id")).first()
+
+        explain_opts = {}
+        if opts["analyze"]:
+            if connection.vendor != "postgresql":
+                raise CommandError("--analyze is only supported on PostgreSQL.")
+            explain_opts = {"analyze": True, "buffers": True}
+
+        self.stdout.write(f"Backend: {connection.vendor}  org={org.id}  agent={getattr(agent, 'id', None)}")
+        for label, qs in hot_queries(org, agent):
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n== {label}"))
+            self.stdout.write(qs.explain(**explain_opts))
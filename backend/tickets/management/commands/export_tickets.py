@@ -0,0 +1,42 @@
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from tickets import export
+from tickets.models import Ticket
+from tickets.visibility import visible_tickets
+
+
+class Command(BaseCommand):
+    help = "Stream an organization's tickets (optionally with comments) as CSV or NDJSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--org", type=int, required=True, help="Organization id")
+        parser.add_argument("--as-user", type=int,
+                            help="Only export what this user can see (default: whole org)")
+        parser.add_argument("--format", choices=sorted(export.FORMATS), default="csv")
+        parser.add_argument("--comments", action="store_true", help="Include comments")
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument("--output", "-o", help="File to write (default: stdout)")
+
+    def handle(self, *args, **opts):
+        qs = Ticket.objects.filter(organization_id=opts["org"])
+        if opts["as_user"]:
+            user = get_user_model().objects.filter(
+                id=opts["as_user"], organization_id=opts["org"]).first()
+            if user is None:
+                raise CommandError("User not in that organization.")
+            qs = visible_tickets(user, qs)
+
+        out = open(opts["output"], "w", newline="", encoding="utf-8") if opts["output"] else sys.stdout
+        try:
+            n = 0
+            for line in export.lines(qs, fmt=opts["format"], with_comments=opts["comments"],
+                                     chunk_size=opts["chunk_size"]):
+                out.write(line)
+                n += 1
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        self.stderr.write(f"Wrote {n} lines.")
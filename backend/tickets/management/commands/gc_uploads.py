@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from tickets import uploads
+
+
+class Command(BaseCommand):
+    help = ("Delete expired upload sessions and their chunks, orphan temp files, "
+            "and blobs no attachment references any more. Run it from cron.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Only report what would be removed")
+
+    def handle(self, *args, **opts):
+        done = uploads.gc(dry_run=opts["dry_run"])
+        verb = "Would remove" if opts["dry_run"] else "Removed"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {done['sessions']} sessions, {done['orphan_dirs']} orphan temp entries, "
+            f"{done['blobs']} blobs ({done['bytes']} bytes)."))
@@ -0,0 +1,51 @@
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from tickets.importer import FORMATS, Importer, read_records
+
+
+class Command(BaseCommand):
+    help = "Import tickets (with comments and attachment metadata) from CSV or NDJSON into an organization."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Input file, or - for stdin")
+        parser.add_argument("--org", type=int, required=True, help="Organization id")
+        parser.add_argument("--creator", required=True,
+                            help="Username used when a record's creator/author is unknown")
+        parser.add_argument("--format", choices=FORMATS, default="ndjson")
+        parser.add_argument("--chunk-size", type=int, default=1000, help="Records per commit")
+        parser.add_argument("--skip", type=int, default=0,
+                            help="Resume: skip this many records (the last 'committed through' value)")
+        parser.add_argument("--dry-run", action="store_true", help="Validate only; write nothing")
+
+    def handle(self, *args, **opts):
+        creator = get_user_model().objects.filter(
+            username=opts["creator"], organization_id=opts["org"]).first()
+        if creator is None:
+            raise CommandError("--creator must be a user of that organization.")
+
+        importer = Importer(opts["org"], creator.id, chunk_size=opts["chunk_size"], dry_run=opts["dry_run"])
+
+        def progress(s):
+            self.stdout.write(
+                f"committed through record {s['committed_through']}: "
+                f"{s['tickets']} tickets, {s['comments']} comments, {s['failed']} failed "
+                f"({s['rows_per_second']} rows/s)"
+            )
+
+        stream = sys.stdin if opts["path"] == "-" else open(opts["path"], newline="", encoding="utf-8")
+        try:
+            summary = importer.run(read_records(stream, opts["format"]), skip=opts["skip"], progress=progress)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        for err in summary["errors"]:
+            self.stderr.write(f"record {err['record']}: {err['errors']}")
+        style = self.style.WARNING if summary["failed"] else self.style.SUCCESS
+        self.stdout.write(style(
+            f"{'Validated' if summary['dry_run'] else 'Imported'} {summary['records']} records "
+            f"in {summary['seconds']}s ({summary['rows_per_second']} rows/s); {summary['failed']} failed."
+        ))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from tickets import activity, assignment, rollup
+
+
+class Command(BaseCommand):
+    help = ("Rebuild the TicketDailyStats and TicketHourlyActivity rollups and the "
+            "per-member open-ticket counters from the ticket table (all orgs, or one with --org).")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--org", type=int, help="Organization id to rebuild")
+
+    def handle(self, *args, **opts):
+        n = rollup.rebuild(organization_id=opts["org"])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {n} daily stats rows."))
+        n = activity.rebuild(organization_id=opts["org"])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {n} hourly activity rows."))
+        n = assignment.rebuild_loads(organization_id=opts["org"])
+        self.stdout.write(self.style.SUCCESS(f"Recounted {n} group memberships."))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from tickets import visibility
+
+
+class Command(BaseCommand):
+    help = "Recompute the TicketVisibility table (all orgs, or one with --org)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--org", type=int, help="Organization id to rebuild")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **opts):
+        n = visibility.rebuild(organization_id=opts["org"], chunk_size=opts["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt visibility for {n} tickets."))
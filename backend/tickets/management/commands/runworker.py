@@ -0,0 +1,39 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from tickets import jobs
+
+
+class Command(BaseCommand):
+    help = ("Run background jobs from the Job table until stopped (SIGINT/SIGTERM "
+            "finish the current job first). Start as many workers as you like.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--only", nargs="+", metavar="NAME", help="Only run jobs with these names")
+        parser.add_argument("--sleep", type=float, default=1.0, help="Seconds to wait when the queue is empty")
+        parser.add_argument("--once", action="store_true", help="Run what is due now, then exit")
+
+    def handle(self, *args, **opts):
+        worker = jobs.worker_id()
+        stopping = []
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, lambda *_: stopping.append(True))
+        self.stdout.write(f"Worker {worker} running: {', '.join(opts['only'] or sorted(jobs.REGISTRY))}")
+
+        while not stopping:
+            close_old_connections()
+            jobs.reap()
+            jobs.schedule_periodic()
+            job = jobs.claim(worker, opts["only"])
+            if job is None:
+                if opts["once"]:
+                    break
+                time.sleep(opts["sleep"])
+                continue
+            started = time.monotonic()
+            outcome = jobs.run(job)
+            self.stdout.write(f"{job.name} #{job.pk}: {outcome} in {time.monotonic() - started:.2f}s")
+        self.stdout.write("Worker stopped.")
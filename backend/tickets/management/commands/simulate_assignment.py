@@ -0,0 +1,126 @@
+import random
+import statistics
+import time
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count
+
+from accounts.models import Organization
+from tickets.assignment import OPEN, STRATEGIES, Assigner, skill_hits
+from tickets.models import Group, GroupMembership, Ticket
+
+TOPICS = ["billing", "refund", "login", "password", "shipping", "invoice", "api", "mobile", "export", "sso"]
+
+
+class Command(BaseCommand):
+    help = ("Simulate the auto-assignment strategies on a synthetic ticket stream and report "
+            "load balance, skill matches and pick speed. --db also times real ticket creates "
+            "(rolled back afterwards).")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--strategy", choices=[*STRATEGIES, "all"], default="all")
+        parser.add_argument("--agents", type=int, default=20)
+        parser.add_argument("--tickets", type=int, default=10000)
+        parser.add_argument("--capacity", type=int, default=None, help="Per-agent open ticket limit")
+        parser.add_argument("--resolve", type=float, default=0.05,
+                            help="Mean chance per agent per arriving ticket of resolving one open ticket")
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--db", action="store_true", help="Also measure creates against the database")
+        parser.add_argument("--db-tickets", type=int, default=500)
+
+    def handle(self, *args, **opts):
+        names = list(STRATEGIES) if opts["strategy"] == "all" else [opts["strategy"]]
+        for name in names:
+            self._simulate(name, opts)
+        if opts["db"]:
+            for name in names:
+                self._database(name, opts)
+
+    def _agents(self, rng, opts):
+        return [
+            {"user_id": i + 1, "open_tickets": 0, "capacity": opts["capacity"],
+             "skills": rng.sample(TOPICS, 2), "speed": rng.uniform(0.5, 1.5) * opts["resolve"]}
+            for i in range(opts["agents"])
+        ]
+
+    def _ticket(self, rng):
+        topic = rng.choice(TOPICS)
+        return SimpleNamespace(subject=f"Question about {topic}", description="", status="OPEN",
+                               priority=rng.choice(["LOW", "MEDIUM", "HIGH", "URGENT"]))
+
+    def _simulate(self, name, opts):
+        """Arrivals and resolutions over the in-memory member list; no database."""
+        rng = random.Random(opts["seed"])
+        agents = self._agents(rng, opts)
+        assigner = Assigner(None, strategy=name, members=[dict(a) for a in agents])
+        by_id = {m["user_id"]: m for m in assigner.members}
+        speed = {a["user_id"]: a["speed"] for a in agents}
+        unassigned = matched = 0
+        waits, spent = [], 0.0
+        for _ in range(opts["tickets"]):
+            ticket = self._ticket(rng)
+            started = time.perf_counter()
+            uid = assigner.pick(ticket)
+            spent += time.perf_counter() - started
+            if uid is None:
+                unassigned += 1
+            else:
+                waits.append(by_id[uid]["open_tickets"] - 1)  # tickets ahead of this one
+                matched += bool(skill_hits(by_id[uid]["skills"], ticket))
+            for m in assigner.members:
+                if m["open_tickets"] and rng.random() < speed[m["user_id"]]:
+                    m["open_tickets"] -= 1
+
+        loads = [m["open_tickets"] for m in assigner.members]
+        n = opts["tickets"]
+        self.stdout.write(self.style.MIGRATE_HEADING(f"{name} ({opts['agents']} agents, {n} tickets)"))
+        self.stdout.write(
+            f"  picks/s {n / spent:,.0f}   unassigned {unassigned}   skill match {matched / max(n - unassigned, 1):.0%}\n"
+            f"  final load min/mean/max {min(loads)}/{statistics.mean(loads):.1f}/{max(loads)}"
+            f"   stdev {statistics.pstdev(loads):.2f}\n"
+            f"  queue ahead at assignment mean {statistics.mean(waits or [0]):.1f}"
+            f"   p95 {sorted(waits or [0])[int(len(waits or [0]) * 0.95) - 1]}"
+        )
+
+    def _database(self, name, opts):
+        """Create tickets one by one through Assigner + save(), as the API does; rolled back."""
+        rng = random.Random(opts["seed"])
+        User = get_user_model()
+        with transaction.atomic():
+            org = Organization.objects.create(name=f"simulate-assignment-{name}-{rng.random()}")
+            group = Group.objects.create(organization=org, name="sim", assignment=name)
+            creator = User.objects.create(username=f"sim-creator-{org.pk}", organization=org)
+            for a in self._agents(rng, opts):
+                user = User.objects.create(username=f"sim-{org.pk}-{a['user_id']}", organization=org)
+                GroupMembership.objects.create(group=group, user=user, capacity=a["capacity"], skills=a["skills"])
+
+            n = opts["db_tickets"]
+            queries = []
+
+            def count(execute, sql, params, many, context):
+                queries.append(1)
+                return execute(sql, params, many, context)
+
+            started = time.perf_counter()
+            with connection.execute_wrapper(count):
+                for _ in range(n):
+                    draft = self._ticket(rng)
+                    t = Ticket(organization=org, group=group, created_by=creator, customer_name="sim",
+                               subject=draft.subject, priority=draft.priority)
+                    t.assignee_id = Assigner(group.pk).pick(t)
+                    t.save()
+            elapsed = time.perf_counter() - started
+
+            stored = dict(GroupMembership.objects.filter(group=group).values_list("user_id", "open_tickets"))
+            counted = dict(Ticket.objects.filter(group=group, status__in=OPEN, assignee__isnull=False)
+                           .values("assignee_id").annotate(n=Count("id")).values_list("assignee_id", "n"))
+            ok = all(stored[u] == counted.get(u, 0) for u in stored)
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{name} against the database ({n} creates)"))
+            self.stdout.write(
+                f"  creates/s {n / elapsed:,.0f}   queries per create {len(queries) / n:.1f}   "
+                f"counters match COUNT: {'yes' if ok else 'NO'}"
+            )
+            transaction.set_rollback(True)
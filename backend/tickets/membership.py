@@ -0,0 +1,130 @@
+# backend/tickets/membership.py
+"""
+Cached group membership: a user's group ids and a group's member ids.
+
+Read paths that can live with a short-lived stale answer go through here
+(the SSE viewer's group set). A warm check costs one cache get and no query. Entries live in the default Django cache for
+MEMBERSHIP_CACHE_TTL seconds (300); set CACHE_DIR to share them between
+worker processes.
+
+GroupMembership save/delete signals call invalidate() for the user and the
+group. It drops the entries at once, so later reads in the same transaction
+see the change, and again after commit, so a concurrent reader cannot keep
+a value it cached before the commit. Until that transaction ends, reads of
+those keys are not stored, so a rollback cannot leave its view cached.
+Code that bulk-writes memberships (bulk_create, QuerySet.delete) must call
+invalidate() itself.
+
+Write paths that need the transaction's own view (tickets.visibility,
+tickets.assignment, the org-admin member add/remove, and the assignee checks
+of TicketSerializer, the assign action and tickets.bulk) query
+GroupMembership directly: another worker's cache may still hold a member
+removed moments ago, and a stale entry must never decide a write.
+
+set_members() replaces a group's member set in one transaction. It inserts
+the new members with one bulk_create and does the signal handlers' work for
+them as one batch; removed members go through QuerySet.delete(), whose
+post_delete handler does theirs.
+"""
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+
+from core import metrics
+
+from . import assignment, events, stats_cache, visibility
+from .models import Group, GroupMembership
+
+TTL = getattr(settings, "MEMBERSHIP_CACHE_TTL", 300)
+PREFIX = "members"
+
+_local = threading.local()  # .dirty: keys invalidated by the open transaction
+
+
+def _dirty():
+    if not connection.in_atomic_block:
+        _local.dirty = set()
+    return getattr(_local, "dirty", set())
+
+
+def _user_key(user_id):
+    return f"{PREFIX}:user:{user_id}"
+
+
+def _group_key(group_id):
+    return f"{PREFIX}:group:{group_id}"
+
+
+def _load(keys, ids, field, other):
+    """Cached frozensets for `ids`; misses are filled with one query."""
+    by_key = {keys(i): i for i in ids}
+    found = cache.get_many(list(by_key))
+    missing = [i for k, i in by_key.items() if k not in found]
+    metrics.inc("cache_requests_total", len(found), cache="membership", result="hit")
+    metrics.inc("cache_requests_total", len(missing), cache="membership", result="miss")
+    if missing:
+        fresh = {i: set() for i in missing}
+        for a, b in GroupMembership.objects.filter(**{f"{field}__in": missing}).values_list(field, other):
+            fresh[a].add(b)
+        fresh = {keys(i): frozenset(v) for i, v in fresh.items()}
+        dirty = _dirty()
+        cache.set_many({k: v for k, v in fresh.items() if k not in dirty}, timeout=TTL)
+        found.update(fresh)
+    return {i: found[k] for k, i in by_key.items()}
+
+
+def group_ids(user_id):
+    """frozenset of the groups `user_id` belongs to."""
+    return _load(_user_key, [user_id], "user_id", "group_id")[user_id]
+
+
+def members(group_id):
+    """frozenset of the user ids in `group_id`."""
+    return members_many([group_id])[group_id]
+
+
+def members_many(group_ids):
+    """{group_id: frozenset(user ids)} with one cache round trip (and at most one query)."""
+    return _load(_group_key, set(group_ids), "group_id", "user_id")
+
+
+def is_member(user_id, group_id):
+    return group_id in group_ids(user_id)
+
+
+def invalidate(user_ids=(), group_ids=()):
+    keys = [_user_key(u) for u in user_ids] + [_group_key(g) for g in group_ids]
+    if keys:
+        if connection.in_atomic_block:
+            _local.dirty = _dirty() | set(keys)
+        cache.delete_many(keys)
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def set_members(group_id, user_ids):
+    """
+    Make `user_ids` the exact member set of the group; returns (added, removed).
+    The caller checks that the users belong to the group's org.
+    """
+    desired = set(user_ids)
+    with transaction.atomic():
+        # serializes concurrent edits of one group; the diff is taken under the lock
+        org_id = Group.objects.select_for_update().values_list("organization_id", flat=True).get(pk=group_id)
+        current = set(GroupMembership.objects.filter(group_id=group_id).values_list("user_id", flat=True))
+        added, removed = desired - current, current - desired
+        if not added and not removed:
+            return added, removed
+        if removed:
+            GroupMembership.objects.filter(group_id=group_id, user_id__in=removed).delete()
+        if added:
+            # bulk_create sends no post_save: the handler's work, once for the batch
+            GroupMembership.objects.bulk_create([GroupMembership(group_id=group_id, user_id=u) for u in added])
+            invalidate(added, [group_id])
+            assignment.recount(GroupMembership.objects.filter(group_id=group_id, user_id__in=added))
+            visibility.sync_users_in_group(added, group_id)
+            stats_cache.bump_on_commit(org_id)
+            for u in added:
+                events.membership_changed(org_id, u, group_id, member=True)
+    return added, removed
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_alter_organization_invite_code'),
+        ('tickets', '0004_alter_ticket_group'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['organization', 'created_at', 'id'], name='ticket_org_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['organization', 'updated_at', 'id'], name='ticket_org_updated_idx'),
+        ),
+    ]
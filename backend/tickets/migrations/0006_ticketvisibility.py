@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_visibility(apps, schema_editor):
+    Ticket = apps.get_model("tickets", "Ticket")
+    GroupMembership = apps.get_model("tickets", "GroupMembership")
+    TicketVisibility = apps.get_model("tickets", "TicketVisibility")
+
+    members = {}
+    for gid, uid in GroupMembership.objects.values_list("group_id", "user_id"):
+        members.setdefault(gid, set()).add(uid)
+
+    batch = []
+    rows = Ticket.objects.values_list(
+        "id", "created_by_id", "assignee_id", "group_id", "group__manager_id")
+    for tid, creator, assignee, gid, manager in rows.iterator(chunk_size=2000):
+        users = {creator}
+        if assignee is None:
+            if manager is not None:
+                users.add(manager)
+        else:
+            users.add(assignee)
+            users |= members.get(gid, set())
+        batch.extend(TicketVisibility(ticket_id=tid, user_id=u) for u in users)
+        if len(batch) >= 5000:
+            TicketVisibility.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        TicketVisibility.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0005_ticket_list_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketVisibility',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ticket', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='visibility', to='tickets.ticket')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ticket_visibility', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'ticket')},
+            },
+        ),
+        migrations.RunPython(backfill_visibility, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:11
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_alter_organization_invite_code'),
+        ('tickets', '0006_ticketvisibility'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['ticket', 'created_at'], name='comment_ticket_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='groupmembership',
+            index=models.Index(fields=['user', 'group'], name='membership_user_group_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['organization', 'status', 'priority'], name='ticket_org_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['organization', 'priority'], name='ticket_org_priority_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['organization', 'assignee', 'status'], name='ticket_org_assignee_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['organization', 'group', 'status'], name='ticket_org_group_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(condition=models.Q(('status__in', ['OPEN', 'IN_PROGRESS'])), fields=['organization', 'assignee', 'created_at'], name='ticket_open_assignee_idx'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+
+def backfill_daily_stats(apps, schema_editor):
+    Ticket = apps.get_model("tickets", "Ticket")
+    TicketDailyStats = apps.get_model("tickets", "TicketDailyStats")
+    rows = (
+        Ticket.objects.annotate(day=TruncDate("created_at"))
+        .values("organization_id", "day", "group_id", "assignee_id", "status", "priority")
+        .annotate(n=Count("id"))
+        .order_by()
+    )
+    TicketDailyStats.objects.bulk_create(
+        (TicketDailyStats(
+            organization_id=r["organization_id"], day=r["day"], group_id=r["group_id"],
+            assignee_id=r["assignee_id"], status=r["status"], priority=r["priority"],
+            count=r["n"]) for r in rows.iterator()),
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_alter_organization_invite_code'),
+        ('tickets', '0007_hot_query_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('status', models.CharField(choices=[('OPEN', 'Open'), ('IN_PROGRESS', 'In Progress'), ('RESOLVED', 'Resolved'), ('CLOSED', 'Closed')], max_length=20)),
+                ('priority', models.CharField(choices=[('LOW', 'Low'), ('MEDIUM', 'Medium'), ('HIGH', 'High'), ('URGENT', 'Urgent')], max_length=20)),
+                ('count', models.IntegerField(default=0)),
+                ('assignee', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='tickets.group')),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ticket_daily_stats', to='accounts.organization')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['organization', 'day', 'group', 'assignee', 'status', 'priority'], name='dailystats_key_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_daily_stats, migrations.RunPython.noop),
+    ]
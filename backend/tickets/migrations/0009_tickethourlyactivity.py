@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:15
+
+import django.db.models.deletion
+from django.conf import settings
+from datetime import timezone as dt_timezone
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncHour
+
+
+def backfill_activity(apps, schema_editor):
+    # same approximation as tickets.activity.rebuild: resolved at last update
+    Ticket = apps.get_model("tickets", "Ticket")
+    TicketHourlyActivity = apps.get_model("tickets", "TicketHourlyActivity")
+    dims = ("organization_id", "group_id", "assignee_id", "priority")
+    acc = {}
+
+    def add(rows, field, sign):
+        for r in rows.annotate(h=TruncHour(field, tzinfo=dt_timezone.utc)).values("h", *dims).annotate(n=Count("id")).order_by():
+            slot = acc.setdefault((r["h"],) + tuple(r[d] for d in dims), {"created": 0, "resolved": 0, "backlog_delta": 0})
+            slot["created" if sign > 0 else "resolved"] += r["n"]
+            slot["backlog_delta"] += sign * r["n"]
+
+    add(Ticket.objects.all(), "created_at", +1)
+    add(Ticket.objects.filter(status__in=["RESOLVED", "CLOSED"]), "updated_at", -1)
+    TicketHourlyActivity.objects.bulk_create(
+        (TicketHourlyActivity(hour=k[0], organization_id=k[1], group_id=k[2],
+                              assignee_id=k[3], priority=k[4], **v) for k, v in acc.items()),
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_alter_organization_invite_code'),
+        ('tickets', '0008_ticketdailystats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketHourlyActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField()),
+                ('priority', models.CharField(choices=[('LOW', 'Low'), ('MEDIUM', 'Medium'), ('HIGH', 'High'), ('URGENT', 'Urgent')], max_length=20)),
+                ('created', models.IntegerField(default=0)),
+                ('resolved', models.IntegerField(default=0)),
+                ('backlog_delta', models.IntegerField(default=0)),
+                ('assignee', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hourly_activity', to='tickets.group')),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ticket_hourly_activity', to='accounts.organization')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['organization', 'hour', 'group', 'assignee', 'priority'], name='activity_key_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_activity, migrations.RunPython.noop),
+    ]
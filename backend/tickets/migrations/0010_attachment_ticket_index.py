@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0009_tickethourlyactivity'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attachment',
+            index=models.Index(fields=['ticket', 'uploaded_at'], name='attachment_ticket_uploaded_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:32
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_alter_organization_invite_code'),
+        ('tickets', '0012_job'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ticket_id', models.BigIntegerField()),
+                ('op', models.CharField(choices=[('UPSERT', 'Upsert'), ('DELETE', 'Delete'), ('SHOWN', 'Shown'), ('HIDDEN', 'Hidden')], max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='accounts.organization')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['organization', 'id'], name='ticketchange_org_cursor_idx'), models.Index(fields=['created_at'], name='ticketchange_created_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0013_ticket_change_log'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='assignment',
+            field=models.CharField(choices=[('MANUAL', 'Manual'), ('ROUND_ROBIN', 'Round robin'), ('LEAST_LOADED', 'Least loaded'), ('SKILL_WEIGHTED', 'Skill weighted')], default='MANUAL', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='group',
+            name='last_assignee_id',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='groupmembership',
+            name='capacity',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='groupmembership',
+            name='open_tickets',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='groupmembership',
+            name='skills',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
@@ -1,13 +1,24 @@
+import uuid
+
 from django.db import models
 from django.conf import settings
 
 
 class Group(models.Model):
+    class Assignment(models.TextChoices):
+        MANUAL = "MANUAL", "Manual"
+        ROUND_ROBIN = "ROUND_ROBIN", "Round robin"
+        LEAST_LOADED = "LEAST_LOADED", "Least loaded"
+        SKILL_WEIGHTED = "SKILL_WEIGHTED", "Skill weighted"
+
     organization = models.ForeignKey(
         "accounts.Organization", on_delete=models.CASCADE, related_name="groups")
     name = models.CharField(max_length=120)
     manager = models.ForeignKey(settings.AUTH_USER_MODEL, null=True,
                                 blank=True, on_delete=models.SET_NULL, related_name="managed_groups")
+    # tickets.assignment: how new unassigned tickets get an assignee
+    assignment = models.CharField(max_length=20, choices=Assignment.choices, default=Assignment.MANUAL)
+    last_assignee_id = models.BigIntegerField(null=True, blank=True)  # round-robin position
 
     class Meta:
         unique_together = ("organization", "name")
@@ -20,9 +31,18 @@ class GroupMembership(models.Model):
         Group, on_delete=models.CASCADE, related_name="memberships")
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="group_memberships")
+    # Open (OPEN/IN_PROGRESS) tickets of this group assigned to the user,
+    # kept by tickets.assignment.move_load alongside the rollup
+    open_tickets = models.PositiveIntegerField(default=0)
+    capacity = models.PositiveIntegerField(null=True, blank=True)  # skip auto-assign at this load
+    skills = models.JSONField(default=list, blank=True)  # keywords matched against new tickets
 
     class Meta:
         unique_together = ("group", "user")
+        indexes = [
+            # "which groups is this user in" (visibility, assignment checks)
+            models.Index(fields=["user", "group"], name="membership_user_group_idx"),
+        ]
 
     def __str__(self): return f"{self.user} in {self.group}"
 
@@ -57,6 +77,24 @@ class Ticket(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # keyset pagination of the ticket list (see tickets.pagination)
+            models.Index(fields=["organization", "created_at", "id"], name="ticket_org_created_idx"),
+            models.Index(fields=["organization", "updated_at", "id"], name="ticket_org_updated_idx"),
+            # stats breakdowns and list filters
+            models.Index(fields=["organization", "status", "priority"], name="ticket_org_status_idx"),
+            models.Index(fields=["organization", "priority"], name="ticket_org_priority_idx"),
+            models.Index(fields=["organization", "assignee", "status"], name="ticket_org_assignee_idx"),
+            models.Index(fields=["organization", "group", "status"], name="ticket_org_group_idx"),
+            # open work queues are a small slice of a large table
+            models.Index(
+                fields=["organization", "assignee", "created_at"],
+                name="ticket_open_assignee_idx",
+                condition=models.Q(status__in=["OPEN", "IN_PROGRESS"]),
+            ),
+        ]
+
 
 class Comment(models.Model):
     ticket = models.ForeignKey(
@@ -66,11 +104,191 @@ class Comment(models.Model):
     body = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["ticket", "created_at"], name="comment_ticket_created_idx"),
+        ]
+
+
+class Blob(models.Model):
+    """
+    Content-addressed file body: one row and one file per distinct SHA-256.
+    ref_count is the number of attachments pointing at it; blobs at zero are
+    removed by `manage.py gc_uploads`.
+    """
+    sha256 = models.CharField(max_length=64, unique=True)
+    size = models.BigIntegerField()
+    file = models.FileField(upload_to="blobs/")
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self): return self.sha256
+
 
 class Attachment(models.Model):
     ticket = models.ForeignKey(
         Ticket, on_delete=models.CASCADE, related_name="attachments")
+    # file is blob.file for de-duplicated uploads; kept for older rows
     file = models.FileField(upload_to="attachments/")
+    blob = models.ForeignKey(
+        Blob, null=True, blank=True, on_delete=models.PROTECT, related_name="attachments")
+    filename = models.CharField(max_length=255, blank=True)
+    size = models.BigIntegerField(null=True, blank=True)
     uploaded_by = models.ForeignKey(
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     uploaded_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["ticket", "uploaded_at"], name="attachment_ticket_uploaded_idx"),
+        ]
+
+
+class UploadSession(models.Model):
+    """
+    A chunked upload in progress. Chunks live on disk under
+    UPLOAD_TEMP_DIR/<id>/ until complete; see tickets.uploads.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name="upload_sessions")
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+")
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    chunk_size = models.IntegerField()
+    sha256 = models.CharField(max_length=64, blank=True)  # client's claim, checked on complete
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    @property
+    def total_chunks(self):
+        return max(1, -(-self.size // self.chunk_size))
+
+
+class TicketVisibility(models.Model):
+    """
+    Materialised "user can see ticket" pairs for non-admin roles.
+    Maintained by tickets.signals / tickets.visibility; never edit by hand.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="ticket_visibility")
+    ticket = models.ForeignKey(
+        Ticket, on_delete=models.CASCADE, related_name="visibility")
+
+    class Meta:
+        unique_together = ("user", "ticket")
+
+
+class TicketDailyStats(models.Model):
+    """
+    Ticket counts per (organization, created day, group, assignee, status,
+    priority). Maintained by tickets.rollup; readers always Sum("count")
+    because racing first inserts may leave more than one row per key.
+    """
+    organization = models.ForeignKey(
+        "accounts.Organization", on_delete=models.CASCADE, related_name="ticket_daily_stats")
+    day = models.DateField()
+    group = models.ForeignKey(Group, on_delete=models.CASCADE, related_name="daily_stats")
+    assignee = models.ForeignKey(
+        settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL, related_name="+")
+    status = models.CharField(max_length=20, choices=Ticket.Status.choices)
+    priority = models.CharField(max_length=20, choices=Ticket.Priority.choices)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["organization", "day", "group", "assignee", "status", "priority"],
+                         name="dailystats_key_idx"),
+        ]
+
+
+class TicketHourlyActivity(models.Model):
+    """
+    Ticket events per (organization, UTC hour, group, assignee, priority):
+    tickets created, tickets resolved, and the net change in open tickets
+    (backlog_delta). Maintained by tickets.activity; rows are additive.
+    """
+    organization = models.ForeignKey(
+        "accounts.Organization", on_delete=models.CASCADE, related_name="ticket_hourly_activity")
+    hour = models.DateTimeField()
+    group = models.ForeignKey(Group, on_delete=models.CASCADE, related_name="hourly_activity")
+    assignee = models.ForeignKey(
+        settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL, related_name="+")
+    priority = models.CharField(max_length=20, choices=Ticket.Priority.choices)
+    created = models.IntegerField(default=0)
+    resolved = models.IntegerField(default=0)
+    backlog_delta = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["organization", "hour", "group", "assignee", "priority"],
+                         name="activity_key_idx"),
+        ]
+
+
+class TicketChange(models.Model):
+    """
+    Append-only change log behind GET /api/tickets/changes/ (see tickets.changelog).
+    The id is the feed cursor. Rows with user=NULL apply to the whole org;
+    rows with a user record that user gaining (SHOWN) or losing (HIDDEN)
+    sight of a ticket that did not itself change. A deleted ticket gets one
+    DELETE row per user who could see it, plus a user=NULL DELETE row that
+    only org-wide roles read.
+    """
+    class Op(models.TextChoices):
+        UPSERT = "UPSERT", "Upsert"
+        DELETE = "DELETE", "Delete"
+        SHOWN = "SHOWN", "Shown"
+        HIDDEN = "HIDDEN", "Hidden"
+
+    organization = models.ForeignKey(
+        "accounts.Organization", on_delete=models.CASCADE, related_name="+")
+    ticket_id = models.BigIntegerField()  # no FK: tombstones outlive the ticket
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.CASCADE, related_name="+")
+    op = models.CharField(max_length=10, choices=Op.choices)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["organization", "id"], name="ticketchange_org_cursor_idx"),
+            models.Index(fields=["created_at"], name="ticketchange_created_idx"),
+        ]
+
+
+class Job(models.Model):
+    """
+    A unit of background work for `manage.py runworker`; see tickets.jobs.
+    `key` de-duplicates pending work: at most one queued/running job per key.
+    """
+    class Status(models.TextChoices):
+        QUEUED = "QUEUED", "Queued"
+        RUNNING = "RUNNING", "Running"
+        DONE = "DONE", "Done"
+        FAILED = "FAILED", "Failed"
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    key = models.CharField(max_length=200, null=True, blank=True)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.QUEUED)
+    run_at = models.DateTimeField()
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=5)
+    last_error = models.TextField(blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "run_at"], name="job_due_idx"),
+            models.Index(fields=["name", "status"], name="job_name_status_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["key"], condition=models.Q(status__in=["QUEUED", "RUNNING"]),
+                name="job_pending_key_uniq",
+            ),
+        ]
+
+    def __str__(self): return f"{self.name} #{self.pk} ({self.status})"
@@ -0,0 +1,52 @@
+from rest_framework.pagination import CursorPagination
+
+
+class TicketCursorPagination(CursorPagination):
+    """
+    Keyset pagination for the ticket list.
+    Pages are addressed by an opaque cursor on (created_at, id) - or
+    (updated_at, id) for "recent activity" - so deep pages cost the same as
+    the first one and no COUNT(*) is ever run.
+    """
+    page_size = 25
+    page_size_query_param = "page_size"
+    max_page_size = 200
+
+    # ?ordering=<key> -> (position field, tie-breaker); backed by the
+    # (organization, created_at, id) / (organization, updated_at, id) indexes
+    orderings = {
+        "-created_at": ("-created_at", "-id"),
+        "created_at": ("created_at", "id"),
+        "-updated_at": ("-updated_at", "-id"),
+        "updated_at": ("updated_at", "id"),
+    }
+    ordering = orderings["-created_at"]
+
+    def get_ordering(self, request, queryset, view):
+        key = request.query_params.get("ordering", "")
+        return self.orderings.get(key, self.ordering)
+
+
+class TimelineCursorPagination(CursorPagination):
+    """
+    Newest-first cursor pagination over a ticket's comments/attachments,
+    keyed on (<time_field>, id) and backed by the (ticket, <time_field>)
+    index. ?ordering=<time_field> pages oldest-first instead.
+    """
+    time_field = "created_at"
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+    def get_ordering(self, request, queryset, view):
+        if request.query_params.get("ordering") == self.time_field:
+            return (self.time_field, "id")
+        return (f"-{self.time_field}", "-id")
+
+
+class CommentCursorPagination(TimelineCursorPagination):
+    time_field = "created_at"
+
+
+class AttachmentCursorPagination(TimelineCursorPagination):
+    time_field = "uploaded_at"
@@ -1,15 +1,11 @@
-from rest_framework.permissions import BasePermission
-
-
-def uorg_id(org):
-    return getattr(org, "id", None)
+from rest_framework.permissions import SAFE_METHODS, BasePermission
 
 
 class IsSameOrg(BasePermission):
     def has_object_permission(self, request, view, obj):
-        uorg = getattr(request.user, "organization", None)
-        oorg = getattr(obj, "organization", None)
-        return uorg and oorg and uorg_id(uorg) == uorg_id(oorg)
+        uorg = getattr(request.user, "organization_id", None)
+        oorg = getattr(obj, "organization_id", None)
+        return uorg is not None and uorg == oorg
 
 
 class IsSupervisorOrOwner(BasePermission):
@@ -19,3 +15,11 @@ class IsSupervisorOrOwner(BasePermission):
         return getattr(obj, "created_by_id", None) == request.user.id
 
 
+class IsAuthorOrSupervisor(BasePermission):
+    """Anyone may read; only the author (view.owner_field) or an admin/supervisor may change."""
+    def has_object_permission(self, request, view, obj):
+        if request.method in SAFE_METHODS:
+            return True
+        if getattr(request.user, "role", "") in ("SUPERVISOR", "ADMIN"):
+            return True
+        return getattr(obj, f"{view.owner_field}_id", None) == request.user.id
@@ -0,0 +1,137 @@
+# backend/tickets/reports.py
+"""
+Time-series ticket report served from TicketHourlyActivity.
+
+Buckets are hour/day/week/month in any IANA time zone. The cost depends on
+the number of buckets x series returned, not on the ticket volume or the
+length of the range. Hourly rows are UTC-aligned, so zones with
+sub-hour offsets (e.g. Asia/Kolkata) get boundaries off by that fraction.
+
+Backlog (open tickets at the end of each bucket) is walked backwards
+from the live open count in TicketDailyStats, using the backlog_delta
+events recorded after each bucket.
+"""
+from datetime import timedelta, timezone as dt_timezone
+
+from django.db.models import Sum
+from django.db.models.functions import Trunc
+
+from .activity import OPEN_STATUSES
+from .models import TicketDailyStats, TicketHourlyActivity
+
+BUCKETS = ("hour", "day", "week", "month")
+# split name -> (key field, label field)
+SPLITS = {
+    "group": ("group_id", "group__name"),
+    "priority": ("priority", "priority"),
+    "assignee": ("assignee_id", "assignee__username"),
+}
+MAX_BUCKETS = 1000
+MAX_SERIES = 50
+
+
+def floor(dt, bucket):
+    if bucket == "hour":
+        return dt.replace(minute=0, second=0, microsecond=0)
+    day = dt.replace(hour=0, minute=0, second=0, microsecond=0)
+    if bucket == "day":
+        return day
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def step(dt, bucket):
+    if bucket == "hour":
+        return (dt.astimezone(dt_timezone.utc) + timedelta(hours=1)).astimezone(dt.tzinfo)
+    if bucket == "day":
+        return dt + timedelta(days=1)
+    if bucket == "week":
+        return dt + timedelta(days=7)
+    return dt.replace(year=dt.year + dt.month // 12, month=dt.month % 12 + 1)
+
+
+def bucket_starts(start, end, bucket):
+    """Local bucket starts covering [start, end]; both aware, in the report zone."""
+    cur = floor(start, bucket)
+    out = []
+    while cur <= end:
+        out.append(cur)
+        if len(out) > MAX_BUCKETS:
+            raise ValueError(f"Too many buckets; at most {MAX_BUCKETS} per report.")
+        cur = step(cur, bucket)
+    return out, cur
+
+
+def _wall(dt, tz):
+    return dt.astimezone(tz).replace(tzinfo=None)
+
+
+def ticket_series(organization_id, start, end, bucket="day", tz=dt_timezone.utc, split=None):
+    starts, stop = bucket_starts(start.astimezone(tz), end.astimezone(tz), bucket)
+    n = len(starts)
+    index = {_wall(b, tz): i for i, b in enumerate(starts)}
+    key_field, label_field = SPLITS[split] if split else (None, None)
+    dims = list(dict.fromkeys(f for f in (key_field, label_field) if f))
+
+    events = TicketHourlyActivity.objects.filter(organization_id=organization_id)
+    in_range = (
+        events.filter(hour__gte=starts[0], hour__lt=stop)
+        .annotate(b=Trunc("hour", bucket, tzinfo=tz))
+        .values("b", *dims)
+        .annotate(created=Sum("created"), resolved=Sum("resolved"), delta=Sum("backlog_delta"))
+        .order_by()
+    )
+    after = dict(
+        events.filter(hour__gte=stop).values_list(key_field or "organization_id")
+        .annotate(d=Sum("backlog_delta")).order_by()
+    )
+    open_rows = (
+        TicketDailyStats.objects.filter(organization_id=organization_id, status__in=OPEN_STATUSES)
+        .values(*(dims or ["organization_id"])).annotate(n=Sum("count")).order_by()
+    )
+    open_now, labels = {}, {}
+    for r in open_rows:
+        key = r[key_field] if key_field else organization_id
+        open_now[key] = (open_now.get(key) or 0) + (r["n"] or 0)
+        labels[key] = r.get(label_field)
+
+    def new_series(key, label):
+        if key_field is None:
+            name = None
+        else:
+            name = {"id": key, "name": label or ("Unassigned" if split == "assignee" else None)}
+        return {"key": name, "created": [0] * n, "resolved": [0] * n, "delta": [0] * n}
+
+    series = {}
+    for r in in_range:
+        key = r[key_field] if key_field else organization_id
+        if key not in series:
+            series[key] = new_series(key, r.get(label_field))
+        s = series[key]
+        i = index.get(_wall(r["b"], tz))
+        if i is not None:
+            s["created"][i] += r["created"] or 0
+            s["resolved"][i] += r["resolved"] or 0
+            s["delta"][i] += r["delta"] or 0
+    for key, count in open_now.items():
+        if key not in series and count:
+            # open tickets with no events in range still have a backlog line
+            series[key] = new_series(key, labels.get(key))
+
+    ranked = sorted(series.items(), key=lambda kv: -(sum(kv[1]["created"]) + (open_now.get(kv[0]) or 0)))
+    out = []
+    for key, s in ranked[:MAX_SERIES]:
+        level = (open_now.get(key) or 0) - (after.get(key) or 0)
+        backlog = [0] * n
+        for i in range(n - 1, -1, -1):
+            backlog[i] = level
+            level -= s["delta"][i]
+        out.append({"key": s["key"], "created": s["created"], "resolved": s["resolved"], "backlog": backlog})
+
+    return {
+        "buckets": [b.isoformat() for b in starts],
+        "series": out,
+        "truncated": len(ranked) > MAX_SERIES,
+    }
+
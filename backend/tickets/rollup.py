@@ -0,0 +1,108 @@
+# backend/tickets/rollup.py
+"""
+Maintenance of TicketDailyStats.
+
+Each ticket counts once in the bucket of (organization, local day it was
+created, group, assignee, status, priority). Writes move that one unit
+between buckets with F() increments; see tickets.signals for the hooks.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from . import stats
+from .models import Ticket, TicketDailyStats
+
+# Ticket fields that decide which bucket a ticket is counted in
+KEY_FIELDS = ("organization", "group", "assignee", "status", "priority")
+
+
+def bucket_key(organization_id, created_at, group_id, assignee_id, status, priority):
+    return (organization_id, timezone.localdate(created_at), group_id, assignee_id, status, priority)
+
+
+def key_for(ticket):
+    return bucket_key(ticket.organization_id, ticket.created_at, ticket.group_id,
+                      ticket.assignee_id, ticket.status, ticket.priority)
+
+
+def stored_key(pk):
+    row = (Ticket.objects.filter(pk=pk)
+           .values_list("organization_id", "created_at", "group_id", "assignee_id", "status", "priority")
+           .first())
+    return bucket_key(*row) if row else None
+
+
+def bump(key, delta):
+    org_id, day, group_id, assignee_id, status, priority = key
+    match = TicketDailyStats.objects.filter(
+        organization_id=org_id, day=day, group_id=group_id,
+        assignee_id=assignee_id, status=status, priority=priority,
+    )
+    pk = match.values_list("pk", flat=True).first()
+    if pk is not None:
+        TicketDailyStats.objects.filter(pk=pk).update(count=F("count") + delta)
+    elif delta > 0:
+        TicketDailyStats.objects.create(
+            organization_id=org_id, day=day, group_id=group_id,
+            assignee_id=assignee_id, status=status, priority=priority, count=delta,
+        )
+
+
+def move(before, after):
+    move_many([(before, after)])
+
+
+def move_many(pairs):
+    """Apply many (before, after) moves with one F() update per touched bucket."""
+    deltas = Counter()
+    for before, after in pairs:
+        if before == after:
+            continue
+        if before is not None:
+            deltas[before] -= 1
+        if after is not None:
+            deltas[after] += 1
+    if not any(deltas.values()):
+        return
+    with transaction.atomic():
+        for key, delta in deltas.items():
+            if delta:
+                bump(key, delta)
+
+
+def rebuild(organization_id=None):
+    """Recompute the rollup from Ticket; returns the number of rows written."""
+    tickets = Ticket.objects.all()
+    stats = TicketDailyStats.objects.all()
+    if organization_id is not None:
+        tickets = tickets.filter(organization_id=organization_id)
+        stats = stats.filter(organization_id=organization_id)
+
+    rows = (
+        tickets.annotate(day=TruncDate("created_at"))
+        .values("organization_id", "day", "group_id", "assignee_id", "status", "priority")
+        .annotate(n=Count("id"))
+        .order_by()
+    )
+    with transaction.atomic():
+        stats.delete()
+        objs = TicketDailyStats.objects.bulk_create(
+            (TicketDailyStats(
+                organization_id=r["organization_id"], day=r["day"], group_id=r["group_id"],
+                assignee_id=r["assignee_id"], status=r["status"], priority=r["priority"],
+                count=r["n"]) for r in rows.iterator()),
+            batch_size=2000,
+        )
+    return len(objs)
+
+
+def org_stats(organization_id):
+    """Dashboard numbers for a whole org, read from the rollup only."""
+    return stats.dashboard(
+        TicketDailyStats.objects.filter(organization_id=organization_id),
+        unit="count", day_q=stats.rollup_day_q,
+    )
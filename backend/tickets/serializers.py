@@ -1,29 +1,90 @@
-from .models import Ticket, Comment, Attachment, Group, GroupMembership
+from .models import Ticket, Comment, Attachment, Group, GroupMembership, UploadSession
 from rest_framework import serializers
+from core.instrumentation import TimedSerializerMixin
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     author_name = serializers.CharField(source="author.username", read_only=True)
     class Meta:
         model = Comment
         fields = ["id","author","author_name","body","created_at"]
         read_only_fields = ["author","created_at"]
 
-class AttachmentSerializer(serializers.ModelSerializer):
+class AttachmentSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    sha256 = serializers.CharField(source="blob.sha256", read_only=True, default=None)
     class Meta:
         model = Attachment
-        fields = ["id","file","uploaded_by","uploaded_at"]
-        read_only_fields = ["uploaded_by","uploaded_at"]
+        fields = ["id","file","filename","size","sha256","uploaded_by","uploaded_at"]
+        read_only_fields = ["filename","size","uploaded_by","uploaded_at"]
+
+class UploadStartSerializer(serializers.Serializer):
+    ticket = serializers.IntegerField()
+    filename = serializers.CharField(max_length=255)
+    size = serializers.IntegerField(min_value=1)
+    sha256 = serializers.RegexField(r"^[0-9a-f]{64}$", required=False, default="")
+
+class UploadSessionSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    total_chunks = serializers.IntegerField(read_only=True)
+    class Meta:
+        model = UploadSession
+        fields = ["id","ticket","filename","size","chunk_size","total_chunks","sha256","created_at","expires_at"]
+        read_only_fields = fields
 
 
 
-class GroupSerializer(serializers.ModelSerializer):
+class GroupSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     manager_name = serializers.CharField(source="manager.username", read_only=True)
     class Meta:
         model = Group
-        fields = ["id","name","organization","manager","manager_name"]
+        fields = ["id","name","organization","manager","manager_name","assignment"]
         read_only_fields = ["organization"]
 
-class TicketSerializer(serializers.ModelSerializer):
+
+class MemberAssignmentSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """Auto-assignment settings of one member (PATCH org-admin/groups/:id/members/:user_id/)."""
+    class Meta:
+        model = GroupMembership
+        fields = ["capacity", "skills", "open_tickets"]
+        read_only_fields = ["open_tickets"]
+
+    def validate_skills(self, value):
+        if not isinstance(value, list) or not all(isinstance(s, str) and s.strip() for s in value):
+            raise serializers.ValidationError("Provide a list of non-empty keywords.")
+        return [s.strip().lower() for s in value][:50]
+
+class SparseFieldsMixin:
+    """Honours ?fields=a,b,c by dropping every other field from the output."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        raw = request.query_params.get("fields") if request else None
+        if raw:
+            wanted = {f.strip() for f in raw.split(",") if f.strip()}
+            for name in set(self.fields) - wanted:
+                self.fields.pop(name)
+
+
+class TicketListSerializer(SparseFieldsMixin, TimedSerializerMixin, serializers.ModelSerializer):
+    """
+    Read-only list row: scalar columns only. Counts and last activity come
+    from annotations added by TicketViewSet.get_queryset, never from the
+    related managers, so a page costs one query.
+    """
+    assignee_name = serializers.CharField(source="assignee.username", read_only=True)
+    group_name = serializers.CharField(source="group.name", read_only=True)
+    comment_count = serializers.IntegerField(read_only=True)
+    attachment_count = serializers.IntegerField(read_only=True)
+    last_activity_at = serializers.DateTimeField(read_only=True)
+
+    class Meta:
+        model = Ticket
+        fields = ["id","organization","group","group_name",
+                  "customer_name","subject","status","priority",
+                  "assignee","assignee_name","created_by","created_at","updated_at",
+                  "comment_count","attachment_count","last_activity_at"]
+        read_only_fields = fields
+
+
+class TicketSerializer(SparseFieldsMixin, TimedSerializerMixin, serializers.ModelSerializer):
     comments = CommentSerializer(many=True, read_only=True)
     attachments = AttachmentSerializer(many=True, read_only=True)
     assignee_name = serializers.CharField(source="assignee.username", read_only=True)
@@ -44,25 +105,47 @@ class TicketSerializer(serializers.ModelSerializer):
 
     def validate(self, data):
         request = self.context["request"]
-        user_org = getattr(request.user, "organization", None)
+        user_org = getattr(request.user, "organization_id", None)
         grp = data.get("group") or getattr(self.instance, "group", None)
 
         if not user_org:
             raise serializers.ValidationError("User has no organization; contact an admin.")
 
-        if not grp or grp.organization_id != user_org.id:
+        if not grp or grp.organization_id != user_org:
             raise serializers.ValidationError("Group must belong to your organization.")
 
         # If assignee provided, must be member of the group
         assignee = data.get("assignee")
         if assignee:
-            is_member = GroupMembership.objects.filter(group=grp, user=assignee).exists()
-            if not is_member:
+            if not GroupMembership.objects.filter(user_id=assignee.pk, group_id=grp.pk).exists():
                 raise serializers.ValidationError("Assignee must be a member of the ticket's group.")
         return data
 
 
-class GroupMembershipSerializer(serializers.ModelSerializer):
+class TicketBulkItemSerializer(serializers.Serializer):
+    """
+    One item of POST /api/tickets/bulk/. Group and assignee are checked
+    against lookup sets in the context (built once per batch by
+    tickets.bulk) instead of a query per item.
+    """
+    group = serializers.IntegerField()
+    customer_name = serializers.CharField(max_length=120)
+    subject = serializers.CharField(max_length=180)
+    description = serializers.CharField(required=False, allow_blank=True, default="")
+    status = serializers.ChoiceField(choices=Ticket.Status.choices, default=Ticket.Status.OPEN)
+    priority = serializers.ChoiceField(choices=Ticket.Priority.choices, default=Ticket.Priority.MEDIUM)
+    assignee = serializers.IntegerField(required=False, allow_null=True)
+
+    def validate(self, data):
+        if data["group"] not in self.context["groups"]:
+            raise serializers.ValidationError("Group must belong to your organization.")
+        assignee = data.get("assignee")
+        if assignee and (data["group"], assignee) not in self.context["members"]:
+            raise serializers.ValidationError("Assignee must be a member of the ticket's group.")
+        return data
+
+
+class GroupMembershipSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = GroupMembership
         fields = ["id", "group", "user", "created_at"]
@@ -0,0 +1,186 @@
+# backend/tickets/signals.py
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from accounts.models import Organization
+
+from . import activity, assignment, changelog, events, membership, rollup, stats_cache, uploads, visibility
+from .models import Attachment, Comment, Group, GroupMembership, Ticket, TicketVisibility
+
+# Fields that change who can see a ticket
+VISIBILITY_FIELDS = {"created_by", "assignee", "group"}
+
+
+def group_org(group_id):
+    return Group.objects.filter(pk=group_id).values_list("organization_id", flat=True).first()
+
+
+def invalidate_stats_for_group(group_id, org_id=None):
+    org_id = org_id or group_org(group_id)
+    if org_id is not None:
+        stats_cache.bump_on_commit(org_id)
+
+
+def cascades_from(origin, model):
+    """
+    Whether this delete cascades from deleting `model` row(s) (`origin` as
+    passed to pre/post_delete). Rows written here must not point at them:
+    the foreign keys would fail at commit.
+    """
+    if isinstance(origin, QuerySet):
+        return issubclass(origin.model, model)
+    return isinstance(origin, model)
+
+
+def deleted_pks(origin, model):
+    """Pks of the `model` rows whose delete() this cascade started from, else an empty set."""
+    if not cascades_from(origin, model):
+        return set()
+    return set(origin.values_list("pk", flat=True)) if isinstance(origin, QuerySet) else {origin.pk}
+
+
+@receiver(pre_save, sender=Ticket)
+def ticket_remember_bucket(sender, instance, update_fields=None, **kwargs):
+    instance._rollup_before = None
+    if instance._state.adding or instance.pk is None:
+        return
+    if update_fields is None or set(rollup.KEY_FIELDS) & set(update_fields):
+        instance._rollup_before = rollup.stored_key(instance.pk)
+
+
+@receiver(post_save, sender=Ticket)
+def ticket_saved(sender, instance, created, update_fields=None, **kwargs):
+    if created or update_fields is None or VISIBILITY_FIELDS & set(update_fields):
+        visibility.sync_tickets([instance.pk])
+    if created:
+        after = rollup.key_for(instance)
+        rollup.move(None, after)
+        assignment.move_load([(None, after)])
+        activity.record(None, after, created_at=instance.created_at)
+    elif getattr(instance, "_rollup_before", None) is not None:
+        after = rollup.key_for(instance)
+        rollup.move(instance._rollup_before, after)
+        assignment.move_load([(instance._rollup_before, after)])
+        activity.record(instance._rollup_before, after)
+    stats_cache.bump_on_commit(instance.organization_id)
+    changelog.record(instance.organization_id, [instance.pk])
+    events.ticket_changed(instance, before=getattr(instance, "_rollup_before", None), created=created)
+
+
+@receiver(pre_delete, sender=Ticket)
+def ticket_remember_viewers(sender, instance, **kwargs):
+    # the TicketVisibility rows are deleted with the ticket; the tombstones go to these users
+    instance._viewer_ids = list(TicketVisibility.objects.filter(ticket_id=instance.pk).values_list("user_id", flat=True))
+
+
+@receiver(post_delete, sender=Ticket)
+def ticket_deleted(sender, instance, origin=None, **kwargs):
+    users = deleted_pks(origin, get_user_model())
+    if instance.assignee_id in users:
+        instance.assignee_id = None  # as SET_NULL already did to the rollup rows
+    if cascades_from(origin, Organization):
+        # the org's rollup, activity, change log and memberships all go with it
+        events.ticket_deleted(instance)
+        return
+    if not cascades_from(origin, Group):
+        # otherwise the group's rollup, activity and member rows go with it
+        before = rollup.key_for(instance)
+        rollup.move(before, None)
+        assignment.move_load([(before, None)])
+        activity.record(before, None)
+    stats_cache.bump_on_commit(instance.organization_id)
+    viewers = [u for u in getattr(instance, "_viewer_ids", ()) if u not in users]
+    changelog.record_deleted(instance.organization_id, instance.pk, viewers)
+    events.ticket_deleted(instance)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    if created:
+        changelog.touch(instance.ticket_id)
+        events.comment_added(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, origin=None, **kwargs):
+    if not cascades_from(origin, Organization):
+        changelog.touch(instance.ticket_id)
+
+
+@receiver(post_save, sender=Attachment)
+def attachment_saved(sender, instance, created, **kwargs):
+    if created:
+        changelog.touch(instance.ticket_id)
+
+
+@receiver(post_delete, sender=Attachment)
+def attachment_deleted(sender, instance, origin=None, **kwargs):
+    uploads.release(instance.blob_id)
+    if not cascades_from(origin, Organization):
+        changelog.touch(instance.ticket_id)
+
+
+@receiver(post_save, sender=GroupMembership)
+def membership_saved(sender, instance, created, **kwargs):
+    membership.invalidate([instance.user_id], [instance.group_id])
+    if created:
+        assignment.recount(GroupMembership.objects.filter(pk=instance.pk))
+    visibility.sync_user_in_group(instance.user_id, instance.group_id)
+    org_id = group_org(instance.group_id)
+    invalidate_stats_for_group(instance.group_id, org_id)
+    if org_id is not None:
+        events.membership_changed(org_id, instance.user_id, instance.group_id, member=True)
+
+
+@receiver(post_delete, sender=GroupMembership)
+def membership_deleted(sender, instance, origin=None, **kwargs):
+    membership.invalidate([instance.user_id], [instance.group_id])
+    if cascades_from(origin, Organization):
+        return  # visibility rows and the change log go with the org
+    visibility.sync_user_in_group(instance.user_id, instance.group_id, only_remove=True)
+    org_id = group_org(instance.group_id)
+    invalidate_stats_for_group(instance.group_id, org_id)
+    if org_id is not None:
+        events.membership_changed(org_id, instance.user_id, instance.group_id, member=False)
+
+
+@receiver(pre_save, sender=Group)
+def group_remember_manager(sender, instance, **kwargs):
+    instance._previous_manager_id = (
+        Group.objects.filter(pk=instance.pk).values_list("manager_id", flat=True).first()
+        if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, **kwargs):
+    before = getattr(instance, "_previous_manager_id", None)
+    if created or before == instance.manager_id:
+        return
+    for uid in (before, instance.manager_id):
+        if uid is not None:
+            visibility.sync_user_in_group(uid, instance.pk)
+    stats_cache.bump_on_commit(instance.organization_id)
+    events.refresh(instance.organization_id)
+
+
+@receiver(pre_delete, sender=settings.AUTH_USER_MODEL)
+def user_remember_assigned(sender, instance, origin=None, **kwargs):
+    if cascades_from(origin, Organization):
+        return  # the tickets go too
+    # the delete sets these tickets' assignee to NULL with QuerySet.update(), which sends no signals
+    instance._assigned_ticket_ids = list(Ticket.objects.filter(assignee_id=instance.pk).values_list("id", flat=True))
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def user_deleted(sender, instance, **kwargs):
+    ids = getattr(instance, "_assigned_ticket_ids", ())
+    if not ids:
+        return
+    # now unassigned: group members lose sight, the manager gains it
+    visibility.sync_tickets(ids)
+    changelog.record(instance.organization_id, ids)
+    stats_cache.bump_on_commit(instance.organization_id)
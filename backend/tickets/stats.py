@@ -0,0 +1,58 @@
+# backend/tickets/stats.py
+"""
+Dashboard numbers in two queries, for any ticket-shaped queryset.
+
+  1. one aggregate() with a conditional Count/Sum per status and priority
+  2. one GROUP BY assignee with a conditional Count/Sum per day of the
+     window; top agents and the daily histogram are both folded from it
+
+`unit` picks what is aggregated: "id" counts Ticket rows, "count" sums
+TicketDailyStats counters. `day_q(day)` returns the Q selecting one day.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from .models import Ticket
+
+
+def ticket_day_q(day):
+    # a local-midnight range instead of created_at__date, so the
+    # (organization, created_at) index stays usable
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return Q(created_at__gte=start, created_at__lt=start + timedelta(days=1))
+
+
+def rollup_day_q(day):
+    return Q(day=day)
+
+
+def dashboard(qs, unit="id", day_q=ticket_day_q, days=7, top=5):
+    agg = Count if unit == "id" else Sum
+    qs = qs.order_by()
+
+    breakdown = {f"s_{v}": agg(unit, filter=Q(status=v)) for v in Ticket.Status.values}
+    breakdown.update({f"p_{v}": agg(unit, filter=Q(priority=v)) for v in Ticket.Priority.values})
+    totals = qs.aggregate(total=agg(unit), **breakdown)
+
+    start = timezone.localdate() - timedelta(days=days - 1)
+    window = [start + timedelta(days=i) for i in range(days)]
+    per_day = {f"d{i}": agg(unit, filter=day_q(d)) for i, d in enumerate(window)}
+    per_agent = list(qs.values("assignee__username").annotate(n=agg(unit), **per_day))
+
+    series = [{"date": str(d), "count": sum(r[f"d{i}"] or 0 for r in per_agent)}
+              for i, d in enumerate(window)]
+    ranked = sorted((r for r in per_agent if r["n"]), key=lambda r: -r["n"])[:top]
+
+    def nonzero(prefix, values):
+        return {v: totals[f"{prefix}{v}"] for v in values if totals[f"{prefix}{v}"]}
+
+    return {
+        "total_tickets": totals["total"] or 0,
+        "by_status": nonzero("s_", Ticket.Status.values),
+        "by_priority": nonzero("p_", Ticket.Priority.values),
+        "last_7_days": series,
+        "top_agents": [{"agent": r["assignee__username"] or "Unassigned", "count": r["n"]}
+                       for r in ranked],
+    }
@@ -0,0 +1,79 @@
+# backend/tickets/stats_cache.py
+"""
+Cache for the dashboard stats endpoints.
+
+Entries are keyed by (scope, org, user, org version). Anything that can
+change an org's numbers - ticket writes, membership and manager changes -
+bumps the org version after commit (see tickets.signals), which orphans
+every cached entry of that org at once; the TTL only bounds staleness if a
+bump is ever lost. Works on any Django cache backend (locmem, file, ...).
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from core import metrics
+
+TTL = getattr(settings, "STATS_CACHE_TTL", 300)
+PREFIX = "stats"
+
+
+def _version_key(org_id):
+    return f"{PREFIX}:ver:{org_id}"
+
+
+def _incr(key):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # missing (never set or evicted): start from a clock value so a
+        # restarted counter can't collide with versions still in the cache
+        cache.add(key, time.time_ns(), timeout=None)
+        return cache.get(key)
+
+
+def version(org_id):
+    v = cache.get(_version_key(org_id))
+    return v if v is not None else _incr(_version_key(org_id))
+
+
+def bump(org_id):
+    if org_id is not None:
+        _incr(_version_key(org_id))
+
+
+def bump_on_commit(org_id):
+    # after commit, so a reader can't re-cache pre-commit numbers under the new version
+    transaction.on_commit(lambda: bump(org_id))
+
+
+def _count(outcome):
+    try:
+        cache.incr(f"{PREFIX}:{outcome}")
+    except ValueError:
+        if not cache.add(f"{PREFIX}:{outcome}", 1, timeout=None):
+            cache.incr(f"{PREFIX}:{outcome}")
+
+
+def cached(org_id, scope, compute, user_id=None):
+    """Return compute() for this org/scope, serving from cache while current."""
+    key = f"{PREFIX}:{scope}:{org_id}:{user_id or '-'}:{version(org_id)}"
+    data = cache.get(key)
+    if data is not None:
+        _count("hits")
+        metrics.inc("cache_requests_total", cache="stats", result="hit")
+        return data
+    _count("misses")
+    metrics.inc("cache_requests_total", cache="stats", result="miss")
+    data = compute()
+    cache.set(key, data, TTL)
+    return data
+
+
+def counters():
+    hits = cache.get(f"{PREFIX}:hits", 0)
+    misses = cache.get(f"{PREFIX}:misses", 0)
+    total = hits + misses
+    return {"hits": hits, "misses": misses, "hit_ratio": round(hits / total, 4) if total else None}
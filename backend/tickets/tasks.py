@@ -0,0 +1,41 @@
+# backend/tickets/tasks.py
+"""Background job handlers (see tickets.jobs); imported by TicketsConfig.ready()."""
+from datetime import timedelta
+
+from accounts import revocation
+
+from . import activity, assignment, changelog, jobs, rollup, uploads, visibility
+
+
+@jobs.periodic("uploads.gc", every=timedelta(hours=1), max_attempts=1)
+def gc_uploads(payload):
+    uploads.gc()
+
+
+@jobs.task("tickets.rebuild_visibility", concurrency=1, timeout=timedelta(hours=1))
+def rebuild_visibility(payload):
+    visibility.rebuild(organization_id=payload.get("organization"))
+
+
+@jobs.task("tickets.rebuild_stats", concurrency=1, timeout=timedelta(hours=1))
+def rebuild_stats(payload):
+    rollup.rebuild(organization_id=payload.get("organization"))
+    activity.rebuild(organization_id=payload.get("organization"))
+    assignment.rebuild_loads(organization_id=payload.get("organization"))
+
+
+@jobs.task("tickets.assign_backlog", concurrency=2)
+def assign_backlog(payload):
+    """{"group": id}: auto-assign that group's unassigned open tickets."""
+    while assignment.assign_backlog(payload["group"]):
+        pass
+
+
+@jobs.periodic("tickets.prune_changes", every=timedelta(hours=24))
+def prune_changes(payload):
+    changelog.prune()
+
+
+@jobs.periodic("accounts.prune_revoked", every=timedelta(hours=24))
+def prune_revoked(payload):
+    revocation.prune()
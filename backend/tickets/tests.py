@@ -0,0 +1,820 @@
+# backend/tickets/tests.py
+import hashlib
+import json
+import os
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.test import APITestCase
+
+from accounts.models import Organization, User
+from core import instrumentation, metrics, throttling
+from core.instrumentation import RequestTimingMiddleware
+
+from . import assignment, export, jobs, membership, rollup, stats, uploads, visibility
+from .models import (
+    Attachment,
+    Group,
+    GroupMembership,
+    Job,
+    Ticket,
+    TicketChange,
+    TicketDailyStats,
+    TicketHourlyActivity,
+    TicketVisibility,
+)
+from .pagination import TicketCursorPagination
+
+
+class OrgTestCase(APITestCase):
+    """One organization: an admin, a group manager and two agents in one group."""
+
+    def setUp(self):
+        cache.clear()
+        throttling.backend().reset()
+        self.org = Organization.objects.create(name="Acme")
+        self.admin = self.make_user("admin", "ADMIN")
+        self.mgr = self.make_user("mgr")
+        self.a1 = self.make_user("a1")
+        self.a2 = self.make_user("a2")
+        self.group = Group.objects.create(organization=self.org, name="Support", manager=self.mgr)
+        for u in (self.a1, self.a2):
+            GroupMembership.objects.create(group=self.group, user=u)
+
+    def make_user(self, username, role="AGENT", org=None):
+        return User.objects.create_user(
+            username=username, password="pw-12345678", organization=org or self.org, role=role,
+        )
+
+    def login(self, user):
+        self.client.force_authenticate(user)
+
+    def make_ticket(self, **kwargs):
+        kwargs = {"organization": self.org, "group": self.group, "created_by": self.mgr,
+                  "customer_name": "Cust", "subject": "Help", **kwargs}
+        return Ticket.objects.create(**kwargs)
+
+
+class AutoAssignmentTests(OrgTestCase):
+    def test_round_robin_rotates_across_api_creates(self):
+        self.group.assignment = Group.Assignment.ROUND_ROBIN
+        self.group.save()
+        self.login(self.admin)
+        picked = []
+        for i in range(4):
+            r = self.client.post("/api/tickets/", {"group": self.group.id, "customer_name": "c", "subject": f"s{i}"},
+                                 format="json")
+            self.assertEqual(r.status_code, 201, r.data)
+            picked.append(r.data["assignee"])
+        self.assertEqual(picked, [self.a1.id, self.a2.id, self.a1.id, self.a2.id])
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.last_assignee_id, self.a2.id)
+        loads = dict(GroupMembership.objects.filter(group=self.group).values_list("user_id", "open_tickets"))
+        self.assertEqual(loads, {self.a1.id: 2, self.a2.id: 2})
+
+    def test_create_locks_and_loads_only_what_it_needs(self):
+        self.login(self.admin)
+        body = {"group": self.group.id, "customer_name": "c", "subject": "s"}
+        with mock.patch.object(assignment, "Assigner", wraps=assignment.Assigner) as assigner:
+            self.assertEqual(self.client.post("/api/tickets/", body, format="json").status_code, 201)
+        assigner.assert_not_called()  # a manual group takes no Group row lock
+        self.group.assignment = Group.Assignment.LEAST_LOADED
+        self.group.save()
+        with CaptureQueriesContext(connection) as ctx:
+            r = self.client.post("/api/tickets/", body, format="json")
+        self.assertEqual((r.status_code, r.data["assignee"]), (201, self.a1.id))
+        sql = [q["sql"] for q in ctx.captured_queries]
+        insert = next(i for i, q in enumerate(sql) if q.startswith('INSERT INTO "tickets_ticket"'))
+        self.assertFalse([q for q in sql[:insert] if '"accounts_user"."password"' in q])  # picked id saved as is
+
+
+class BulkTests(OrgTestCase):
+    def test_create_reports_per_item_errors(self):
+        self.login(self.admin)
+        items = [
+            {"group": self.group.id, "customer_name": "c", "subject": "ok", "assignee": self.a1.id},
+            {"group": self.group.id, "customer_name": "c", "subject": "not a member", "assignee": self.mgr.id},
+            {"group": {}, "customer_name": "c", "subject": "bad group"},
+            {"group": [self.group.id], "customer_name": "c", "subject": "bad group", "assignee": {"id": 1}},
+            "not an object",
+        ]
+        r = self.client.post("/api/tickets/bulk/", {"items": items}, format="json")
+        self.assertEqual(r.status_code, 200, r.data)
+        self.assertEqual((r.data["ok"], r.data["failed"]), (1, 4))
+        self.assertEqual([x["ok"] for x in r.data["results"]], [True, False, False, False, False])
+        self.assertEqual(Ticket.objects.get().assignee_id, self.a1.id)
+
+    def test_status_and_assign_reject_unhashable_values(self):
+        t = self.make_ticket()
+        self.login(self.admin)
+        r = self.client.post("/api/tickets/bulk/status/", {"items": [
+            {"id": [t.id], "status": "CLOSED"}, {"id": t.id, "status": ["CLOSED"]}, {"id": t.id, "status": "RESOLVED"},
+        ]}, format="json")
+        self.assertEqual(r.status_code, 200, r.data)
+        self.assertEqual([x["ok"] for x in r.data["results"]], [False, False, True])
+        r = self.client.post("/api/tickets/bulk/assign/", {"items": [
+            {"id": {"x": 1}, "assignee": self.a1.id}, {"id": t.id, "assignee": {}}, {"id": t.id, "assignee": self.a2.id},
+        ]}, format="json")
+        self.assertEqual(r.status_code, 200, r.data)
+        self.assertEqual([x["ok"] for x in r.data["results"]], [False, False, True])
+        t.refresh_from_db()
+        self.assertEqual((t.status, t.assignee_id), (Ticket.Status.RESOLVED, self.a2.id))
+
+    def test_agent_cannot_assign(self):
+        t = self.make_ticket()
+        self.login(self.a1)
+        r = self.client.post("/api/tickets/bulk/assign/", {"items": [{"id": t.id, "assignee": self.a1.id}]},
+                             format="json")
+        self.assertEqual(r.data["failed"], 1)
+
+    def test_rejects_missing_items(self):
+        self.login(self.admin)
+        self.assertEqual(self.client.post("/api/tickets/bulk/", {"items": []}, format="json").status_code, 400)
+
+
+class GroupMemberTests(OrgTestCase):
+    def url(self, user=None):
+        return f"/api/org-admin/groups/{self.group.id}/members/" + (f"{user.id}/" if user else "")
+
+    def test_add_and_remove_ignore_a_stale_membership_cache(self):
+        a3 = self.make_user("a3")
+        self.login(self.admin)
+        # as another worker's cache might hold: a1 already removed, a3 already added
+        cache.set(membership._group_key(self.group.id), frozenset({self.a2.id, a3.id}))
+        self.assertEqual(self.client.delete(self.url(self.a1)).status_code, 204)
+        self.assertFalse(GroupMembership.objects.filter(group=self.group, user=self.a1).exists())
+        self.assertEqual(self.client.post(self.url(a3)).status_code, 201)
+        self.assertTrue(GroupMembership.objects.filter(group=self.group, user=a3).exists())
+        self.assertEqual(self.client.post(self.url(a3)).status_code, 200)
+
+    def test_assignee_checks_ignore_a_stale_membership_cache(self):
+        t = self.make_ticket()
+        GroupMembership.objects.filter(group=self.group, user=self.a1).delete()
+        # as another worker's cache might still hold: a1 a member
+        cache.set(membership._group_key(self.group.id), frozenset({self.a1.id, self.a2.id}))
+        cache.set(membership._user_key(self.a1.id), frozenset({self.group.id}))
+        self.login(self.admin)
+        r = self.client.post(f"/api/tickets/{t.id}/assign/", {"assignee": self.a1.id}, format="json")
+        self.assertEqual(r.status_code, 400, r.data)
+        r = self.client.post("/api/tickets/", {"group": self.group.id, "customer_name": "c", "subject": "s",
+                                               "assignee": self.a1.id}, format="json")
+        self.assertEqual(r.status_code, 400, r.data)
+        item = {"group": self.group.id, "customer_name": "c", "subject": "s", "assignee": self.a1.id}
+        self.assertEqual(self.client.post("/api/tickets/bulk/", {"items": [item]}, format="json").data["failed"], 1)
+        r = self.client.post("/api/tickets/bulk/assign/", {"items": [{"id": t.id, "assignee": self.a1.id}]},
+                             format="json")
+        self.assertEqual(r.data["failed"], 1)
+        t.refresh_from_db()
+        self.assertIsNone(t.assignee_id)
+        self.assertEqual(Ticket.objects.count(), 1)
+
+    def test_add_requires_user_in_org(self):
+        other = self.make_user("outsider", org=Organization.objects.create(name="Other"))
+        self.login(self.admin)
+        self.assertEqual(self.client.post(self.url(other)).status_code, 400)
+
+    def test_put_sets_exact_members(self):
+        a3 = self.make_user("a3")
+        t = self.make_ticket(assignee=self.a2)
+        self.login(self.admin)
+        r = self.client.put(self.url(), {"members": [self.a1.id, a3.id]}, format="json")
+        self.assertEqual(r.status_code, 200, r.data)
+        self.assertEqual((r.data["added"], r.data["removed"]), ([a3.id], [self.a2.id]))
+        self.assertEqual(set(GroupMembership.objects.filter(group=self.group).values_list("user_id", flat=True)),
+                         {self.a1.id, a3.id})
+        self.assertEqual(membership.members(self.group.id), {self.a1.id, a3.id})
+        self.login(a3)
+        self.assertEqual(self.client.get(f"/api/tickets/{t.id}/").status_code, 200)
+
+    def test_put_rejects_bad_payloads(self):
+        self.login(self.admin)
+        self.assertEqual(self.client.put(self.url(), {"members": ["x"]}, format="json").status_code, 400)
+        self.assertEqual(self.client.put(self.url(), {"members": [999999]}, format="json").status_code, 400)
+
+
+@override_settings(DEBUG=True)
+class RequestTimingTests(OrgTestCase):
+    def test_traced_request_reports_db_and_serialize_time(self):
+        self.make_ticket()
+        self.login(self.admin)
+        with mock.patch.object(instrumentation, "SAMPLE_RATE", 1.0):
+            r = self.client.get("/api/tickets/")
+        timing = r["Server-Timing"]
+        for part in ("app;dur=", "db;dur=", "view;dur=", "serialize;dur="):
+            self.assertIn(part, timing)
+        self.assertNotIn('desc="0 queries"', timing)
+        self.assertGreaterEqual(instrumentation.stats()["GET ticket-list"]["traced"], 1)
+
+    def test_drf_serializers_are_not_patched(self):
+        self.assertEqual(serializers.Serializer.data.fget.__module__, "rest_framework.serializers")
+        self.assertEqual(serializers.ListSerializer.data.fget.__module__, "rest_framework.serializers")
+
+    def test_middleware_stays_async_under_asgi(self):
+        async def view(request):
+            return HttpResponse("ok")
+
+        mw = RequestTimingMiddleware(view)
+        self.assertTrue(iscoroutinefunction(mw))
+        response = async_to_sync(mw)(RequestFactory().get("/x"))
+        self.assertIn("app;dur=", response["Server-Timing"])
+
+
+class MetricsTests(OrgTestCase):
+    def test_token_is_required_when_set(self):
+        with self.settings(METRICS_TOKEN="s3cret"):
+            self.assertEqual(self.client.get("/metrics").status_code, 401)
+            r = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer s3cret")
+        self.assertEqual(r.status_code, 200)
+        self.assertIn("# TYPE csp_http_requests_total counter", r.content.decode())
+
+    def test_exited_worker_counters_survive_pid_reuse(self):
+        with tempfile.TemporaryDirectory() as d, mock.patch.object(metrics, "DIR", d):
+            pid, start = metrics._identity()
+            # a worker that exited; this process now has its pid
+            with open(os.path.join(d, f"{pid}-not-{start}.json"), "w") as f:
+                json.dump({"pid": pid, "start": f"not-{start}",
+                           "counters": [["test_total", [], 5]], "gauges": [["test_open", [], 3]]}, f)
+            self.addCleanup(metrics._counters.pop, ("test_total", ()), None)
+            metrics.inc("test_total", 2)
+            totals = metrics.collect()
+            self.assertEqual(totals["test_total", ()], 7)
+            self.assertNotIn(("test_open", ()), totals)
+            self.assertEqual(sorted(os.listdir(d)), sorted([".lock", metrics.RETIRED, f"{pid}-{start}.json"]))
+            self.assertEqual(metrics.collect()["test_total", ()], 7)  # folded in once
+
+
+class ChangesFeedTests(OrgTestCase):
+    def feed(self, user, cursor=None):
+        self.login(user)
+        r = self.client.get("/api/tickets/changes/", {"cursor": cursor} if cursor is not None else {})
+        self.assertEqual(r.status_code, 200, r.data)
+        return r.data
+
+    def test_first_call_resets(self):
+        data = self.feed(self.a1)
+        self.assertTrue(data["reset"])
+        self.assertEqual(data["tickets"], [])
+
+    def test_updates_reach_only_viewers(self):
+        cursors = {u: self.feed(u)["cursor"] for u in (self.admin, self.mgr, self.a1)}
+        t = self.make_ticket()  # unassigned: creator/manager and admins see it
+        self.assertEqual([x["id"] for x in self.feed(self.mgr, cursors[self.mgr])["tickets"]], [t.id])
+        self.assertEqual([x["id"] for x in self.feed(self.admin, cursors[self.admin])["tickets"]], [t.id])
+        self.assertEqual(self.feed(self.a1, cursors[self.a1])["tickets"], [])
+
+    def test_delete_tombstones_go_only_to_users_who_saw_the_ticket(self):
+        t = self.make_ticket()
+        cursors = {u: self.feed(u)["cursor"] for u in (self.admin, self.mgr, self.a1)}
+        tid = t.id
+        t.delete()
+        self.assertEqual(self.feed(self.mgr, cursors[self.mgr])["deleted"], [tid])
+        self.assertEqual(self.feed(self.admin, cursors[self.admin])["deleted"], [tid])
+        self.assertEqual(self.feed(self.a1, cursors[self.a1])["deleted"], [])
+
+    def test_lost_visibility_is_a_tombstone(self):
+        t = self.make_ticket(assignee=self.a1)
+        cursor = self.feed(self.a2)["cursor"]
+        GroupMembership.objects.filter(group=self.group, user=self.a2).delete()
+        data = self.feed(self.a2, cursor)
+        self.assertEqual(data["deleted"], [t.id])
+
+    def test_rejects_bad_cursor(self):
+        self.login(self.a1)
+        self.assertEqual(self.client.get("/api/tickets/changes/", {"cursor": "x"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/tickets/changes/", {"cursor": 0, "limit": 0}).status_code, 400)
+
+    def test_deleting_an_organization_with_tickets(self):
+        t = self.make_ticket(assignee=self.a1)
+        t.comments.create(author=self.a1, body="hi")
+        Attachment.objects.create(ticket=t, file="attachments/a.txt", filename="a.txt", size=1, uploaded_by=self.a1)
+        self.make_ticket(created_by=self.a2, status=Ticket.Status.CLOSED)
+        other = Organization.objects.create(name="Other")
+        self.feed(self.admin)
+        self.org.delete()
+        connection.check_constraints()
+        self.assertFalse(Ticket.objects.exists())
+        self.assertFalse(TicketChange.objects.exclude(organization=other).exists())
+
+
+class ImportTests(OrgTestCase):
+    def run_import(self, records, **data):
+        body = "".join(json.dumps(r) + "\n" for r in records).encode()
+        self.login(self.admin)
+        return self.client.post("/api/tickets/import/", {
+            "file": SimpleUploadedFile("in.ndjson", body), "fmt": "ndjson", **data,
+        }, format="multipart")
+
+    def record(self, **extra):
+        return {"group": "Support", "customer_name": "c", "subject": "s", "assignee": "a1", **extra}
+
+    def test_imports_tickets_and_reports_failures(self):
+        r = self.run_import([self.record(), self.record(group="Nope"), self.record(comments=[{"body": "hi"}])])
+        self.assertEqual(r.status_code, 207, r.data)
+        self.assertEqual((r.data["tickets"], r.data["comments"], r.data["failed"]), (2, 1, 1))
+        self.assertEqual(Ticket.objects.filter(assignee=self.a1).count(), 2)
+
+    def test_dry_run_writes_nothing(self):
+        r = self.run_import([self.record()], dry_run="1")
+        self.assertEqual(r.status_code, 200, r.data)
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_attachments_must_be_files_of_this_org(self):
+        with tempfile.TemporaryDirectory() as media, self.settings(MEDIA_ROOT=media):
+            own = default_storage.save("attachments/ok.txt", ContentFile(b"hello"))
+            Attachment.objects.create(ticket=self.make_ticket(), file=own, filename="ok.txt", size=5,
+                                      uploaded_by=self.mgr)
+            # another tenant's file, at a path an admin here could guess
+            victim = Organization.objects.create(name="Victim")
+            owner = self.make_user("owner", org=victim)
+            group = Group.objects.create(organization=victim, name="HR", manager=owner)
+            payroll = default_storage.save("attachments/payroll.csv", ContentFile(b"salary,secret\n"))
+            Attachment.objects.create(
+                ticket=Ticket.objects.create(organization=victim, group=group, created_by=owner,
+                                             customer_name="c", subject="s"),
+                file=payroll, filename="payroll.csv", size=14, uploaded_by=owner)
+
+            r = self.run_import([
+                self.record(subject="imported", attachments=[{"file": own}]),
+                self.record(attachments=[{"file": payroll}]),
+                self.record(attachments=[{"file": "../../etc/passwd"}]),
+                self.record(attachments=[{"file": "/etc/passwd"}]),
+                self.record(attachments=[{"file": "attachments/missing.txt"}]),
+            ])
+            self.assertEqual((r.data["tickets"], r.data["attachments"], r.data["failed"]), (1, 1, 4), r.data)
+            self.assertEqual(Attachment.objects.filter(file=payroll).count(), 1)
+            attachment = Ticket.objects.get(subject="imported").attachments.get()
+            self.login(self.admin)
+            url = f"/api/tickets/{attachment.ticket_id}/attachments/{attachment.id}/download/"
+            self.assertEqual(b"".join(self.client.get(url).streaming_content), b"hello")
+
+
+class ExportTests(OrgTestCase):
+    def test_ndjson_keeps_microseconds(self):
+        t = self.make_ticket(assignee=self.a1)
+        Ticket.objects.filter(pk=t.pk).update(created_at=t.created_at.replace(microsecond=123456))
+        row = json.loads(next(export.ndjson_lines(Ticket.objects.all())))
+        self.assertEqual(row["created_at"], t.created_at.replace(microsecond=123456).isoformat())
+
+    def test_export_streams_visible_tickets(self):
+        self.make_ticket(assignee=self.a1)
+        self.login(self.admin)
+        r = self.client.get("/api/tickets/export/?fmt=csv")
+        self.assertEqual(r.status_code, 200)
+        lines = b"".join(r.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[0].startswith("id,created_at"))
+
+    def test_export_streams_asynchronously_under_asgi(self):
+        for i in range(3):
+            self.make_ticket(assignee=self.a1, subject=f"T{i}")
+        access = self.client.post("/api/token/", {"username": "admin", "password": "pw-12345678"},
+                                  format="json").data["access"]
+
+        async def export_rows():
+            r = await self.async_client.get("/api/tickets/export/", {"fmt": "ndjson"},
+                                            headers={"Authorization": f"Bearer {access}"})
+            self.assertTrue(r.is_async)  # sent chunk by chunk, not drained into a list first
+            return b"".join([chunk async for chunk in r.streaming_content]).decode().splitlines()
+
+        rows = async_to_sync(export_rows)()
+        self.assertEqual([json.loads(line)["subject"] for line in rows], ["T0", "T1", "T2"])
+
+    def test_async_lines_come_in_batches(self):
+        for i in range(5):
+            self.make_ticket(subject=f"T{i}")
+
+        async def chunks():
+            lines = export.lines(Ticket.objects.all(), fmt="ndjson")
+            return [chunk.count("\n") async for chunk in export.alines(lines, batch=2)]
+
+        self.assertEqual(async_to_sync(chunks)(), [2, 2, 1])
+
+
+class PaginationTests(OrgTestCase):
+    def walk(self, url):
+        ids, pages = [], 0
+        while url:
+            r = self.client.get(url)
+            self.assertEqual(r.status_code, 200, r.data)
+            ids += [row["id"] for row in r.data["results"]]
+            url, pages = r.data["next"], pages + 1
+        return ids, pages
+
+    def test_cursor_pages_cover_every_ticket_once(self):
+        made = [self.make_ticket(subject=f"T{i}").id for i in range(12)]
+        self.login(self.admin)
+        ids, pages = self.walk("/api/tickets/?page_size=5")
+        self.assertEqual((ids, pages), (made[::-1], 3))
+        ids, _ = self.walk("/api/tickets/?page_size=5&ordering=created_at")
+        self.assertEqual(ids, made)
+
+    def test_updated_at_ordering_and_limits(self):
+        first, second = self.make_ticket(), self.make_ticket()
+        first.subject = "touched"
+        first.save()
+        self.login(self.admin)
+        ids, _ = self.walk("/api/tickets/?ordering=-updated_at")
+        self.assertEqual(ids, [first.id, second.id])
+        with mock.patch.object(TicketCursorPagination, "max_page_size", 1):
+            self.assertEqual(len(self.client.get("/api/tickets/", {"page_size": 200}).data["results"]), 1)
+        self.assertEqual(self.client.get("/api/tickets/", {"cursor": "bogus"}).status_code, 404)
+
+
+class StatsQueryTests(OrgTestCase):
+    """Dashboard numbers cost two queries on a cold cache (tickets.stats), none on a hit."""
+
+    def setUp(self):
+        super().setUp()
+        for i in range(6):
+            self.make_ticket(assignee=self.a1 if i % 2 else None,
+                             status=Ticket.Status.CLOSED if i % 3 == 0 else Ticket.Status.OPEN)
+
+    def test_my_stats_for_an_agent(self):
+        self.login(self.a1)
+        cache.clear()
+        with self.assertNumQueries(2):
+            r = self.client.get("/api/my/stats/")
+        self.assertEqual((r.data["scope"], r.data["total_tickets"]), ("me", 3))
+        self.assertEqual(sum(d["count"] for d in r.data["last_7_days"]), 3)
+        with self.assertNumQueries(0):
+            self.client.get("/api/my/stats/")
+
+    def test_org_stats_from_the_rollup(self):
+        self.login(self.admin)
+        cache.clear()
+        with self.assertNumQueries(2):
+            r = self.client.get("/api/admin/stats/")
+        self.assertEqual(r.data["total_tickets"], 6)
+        self.assertEqual(r.data["by_status"], {"OPEN": 4, "CLOSED": 2})
+        r = self.client.get("/api/my/stats/")
+        self.assertEqual((r.data["scope"], r.data["total_tickets"]), ("org", 6))
+
+    def test_dashboard_over_any_ticket_queryset(self):
+        cache.clear()
+        with self.assertNumQueries(2):
+            data = stats.dashboard(Ticket.objects.filter(assignee=self.a1))
+        self.assertEqual(data["top_agents"], [{"agent": "a1", "count": 3}])
+
+    def test_admin_stats_are_admin_only(self):
+        self.login(self.a1)
+        self.assertEqual(self.client.get("/api/admin/stats/").status_code, 403)
+
+
+class TicketListQueryTests(OrgTestCase):
+    def setUp(self):
+        super().setUp()
+        for i in range(30):
+            t = self.make_ticket(assignee=self.a1 if i % 2 else None, subject=f"T{i}")
+            t.comments.create(author=self.a1, body="hi")
+
+    def test_list_page_is_one_query(self):
+        for user in (self.admin, self.a2):
+            self.login(user)
+            with self.assertNumQueries(1):
+                r = self.client.get("/api/tickets/")
+            self.assertEqual(r.status_code, 200)
+            self.assertEqual(len(r.data["results"]), 25 if user is self.admin else 15)
+            self.assertEqual(r.data["results"][0]["comment_count"], 1)
+
+    def test_sparse_fields_skip_annotations(self):
+        self.login(self.admin)
+        with self.assertNumQueries(1) as ctx:
+            r = self.client.get("/api/tickets/?fields=id,subject")
+        self.assertEqual(set(r.data["results"][0]), {"id", "subject"})
+        self.assertNotIn("tickets_comment", ctx.captured_queries[0]["sql"])
+
+    def test_detail_without_comments_skips_prefetch(self):
+        t = Ticket.objects.first()
+        self.login(self.admin)
+        with self.assertNumQueries(1):
+            r = self.client.get(f"/api/tickets/{t.pk}/?fields=id,subject,status")
+        self.assertEqual(set(r.data), {"id", "subject", "status"})
+        with self.assertNumQueries(3):
+            self.client.get(f"/api/tickets/{t.pk}/")
+
+    def test_rows_are_slim(self):
+        t = self.make_ticket()
+        t.comments.create(author=self.mgr, body="hi")
+        self.login(self.admin)
+        row = self.client.get("/api/tickets/").data["results"][0]
+        self.assertNotIn("comments", row)
+        self.assertEqual((row["comment_count"], row["attachment_count"]), (1, 0))
+
+
+class VisibilityTests(OrgTestCase):
+    def visible(self, user):
+        self.login(user)
+        return {row["id"] for row in self.client.get("/api/tickets/?page_size=200").data["results"]}
+
+    def test_rules(self):
+        own = self.make_ticket(created_by=self.a1)
+        unassigned = self.make_ticket()
+        assigned = self.make_ticket(assignee=self.a2)
+        outsider = self.make_user("outsider")
+        self.assertEqual(self.visible(self.admin), {own.id, unassigned.id, assigned.id})
+        self.assertEqual(self.visible(self.mgr), {own.id, unassigned.id, assigned.id})
+        self.assertEqual(self.visible(self.a1), {own.id, assigned.id})
+        self.assertEqual(self.visible(outsider), set())
+        self.assertEqual(self.client.get(f"/api/tickets/{assigned.id}/").status_code, 404)
+
+    def test_table_follows_writes_and_matches_a_rebuild(self):
+        t = self.make_ticket()
+        self.assertNotIn(t.id, self.visible(self.a1))
+        t.assignee = self.a2
+        t.save()
+        self.assertIn(t.id, self.visible(self.a1))
+        GroupMembership.objects.filter(group=self.group, user=self.a1).delete()
+        self.assertNotIn(t.id, self.visible(self.a1))
+        self.group.manager = self.a1
+        self.group.save()
+        self.make_ticket()
+        rows = set(TicketVisibility.objects.values_list("user_id", "ticket_id"))
+        visibility.rebuild(organization_id=self.org.id)
+        self.assertEqual(set(TicketVisibility.objects.values_list("user_id", "ticket_id")), rows)
+
+    def test_deleting_the_assignee_resyncs_the_ticket(self):
+        t = self.make_ticket(assignee=self.a2, created_by=self.admin)
+        self.assertIn(t.id, self.visible(self.a1))
+        self.a2.delete()
+        t.refresh_from_db()
+        self.assertIsNone(t.assignee_id)
+        self.assertNotIn(t.id, self.visible(self.a1))
+        self.assertIn(t.id, self.visible(self.mgr))
+        self.assertEqual(set(TicketVisibility.objects.filter(ticket=t).values_list("user_id", flat=True)),
+                         {self.admin.id, self.mgr.id})
+
+    def test_deleting_a_creator_deletes_their_tickets(self):
+        t = self.make_ticket(assignee=self.a1, created_by=self.a1)
+        self.make_ticket(assignee=self.a2, created_by=self.a1)
+        User.objects.filter(pk__in=[self.a1.pk, self.a2.pk]).delete()
+        connection.check_constraints()  # no change-log row may point at a deleted user
+        self.assertFalse(Ticket.objects.exists())
+        self.assertEqual(list(TicketChange.objects.filter(ticket_id=t.id, op=TicketChange.Op.DELETE)
+                              .values_list("user_id", flat=True)), [None])
+
+
+class RollupTests(OrgTestCase):
+    def admin_stats(self):
+        self.login(self.admin)
+        r = self.client.get("/api/admin/stats/")
+        self.assertEqual(r.status_code, 200)
+        return r.data
+
+    def test_rollup_follows_writes_and_matches_a_rebuild(self):
+        t = self.make_ticket(assignee=self.a1)
+        self.make_ticket(priority=Ticket.Priority.HIGH)
+        t.status = Ticket.Status.CLOSED
+        t.save()
+        self.make_ticket().delete()
+        data = self.admin_stats()
+        self.assertEqual(data["total_tickets"], 2)
+        self.assertEqual(data["by_status"], {"OPEN": 1, "CLOSED": 1})
+        rows = self.counters()
+        rollup.rebuild(organization_id=self.org.id)
+        self.assertEqual(self.counters(), rows)
+
+    def counters(self):
+        # decrements may leave zero rows behind; a rebuild writes none
+        return set(TicketDailyStats.objects.filter(count__gt=0)
+                   .values_list("day", "group_id", "assignee_id", "status", "priority", "count"))
+
+    def test_bulk_writes_move_the_rollup(self):
+        tickets = [self.make_ticket(assignee=self.a1) for _ in range(3)]
+        self.login(self.admin)
+        r = self.client.post("/api/tickets/bulk/status/",
+                             {"items": [{"id": t.id, "status": "RESOLVED"} for t in tickets[:2]]}, format="json")
+        self.assertEqual(r.data["ok"], 2)
+        self.assertEqual(self.admin_stats()["by_status"], {"OPEN": 1, "RESOLVED": 2})
+        rows = self.counters()
+        rollup.rebuild(organization_id=self.org.id)
+        self.assertEqual(self.counters(), rows)
+
+
+class StatsCacheTests(OrgTestCase):
+    def admin_stats(self):
+        self.login(self.admin)
+        r = self.client.get("/api/admin/stats/")
+        self.assertEqual(r.status_code, 200)
+        return r.data
+
+    def test_cache_is_dropped_after_a_write_commits(self):
+        self.make_ticket()
+        self.assertEqual(self.admin_stats()["total_tickets"], 1)
+        with self.assertNumQueries(0):
+            self.client.get("/api/admin/stats/")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.make_ticket()
+        self.assertEqual(self.admin_stats()["total_tickets"], 2)
+    def test_membership_change_drops_my_stats(self):
+        self.make_ticket(assignee=self.a1)
+        self.login(self.a2)
+        self.assertEqual(self.client.get("/api/my/stats/").data["total_tickets"], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            GroupMembership.objects.filter(group=self.group, user=self.a2).delete()
+        self.assertEqual(self.client.get("/api/my/stats/").data["total_tickets"], 0)
+
+    def test_hit_counters(self):
+        self.admin_stats()
+        self.admin_stats()
+        r = self.client.get("/api/admin/stats/cache/")
+        self.assertEqual((r.data["hits"], r.data["misses"], r.data["hit_ratio"]), (1, 1, 0.5))
+
+
+class ReportTests(OrgTestCase):
+    def test_created_and_resolved_series(self):
+        self.make_ticket()
+        t = self.make_ticket()
+        t.status = Ticket.Status.RESOLVED
+        t.save()
+        self.login(self.admin)
+        r = self.client.get("/api/reports/tickets/", {"bucket": "day", "tz": "Europe/Berlin"})
+        self.assertEqual(r.status_code, 200, r.data)
+        self.assertEqual(len(r.data["buckets"]), 31)
+        series = r.data["series"][0]
+        self.assertEqual((sum(series["created"]), sum(series["resolved"])), (2, 1))
+
+    def test_rejects_bad_parameters(self):
+        self.login(self.admin)
+        url = "/api/reports/tickets/"
+        for params in ({"tz": "Nowhere/City"}, {"bucket": "year"}, {"split": "status"},
+                       {"from": "soon"}, {"from": "2024-02-01", "to": "2024-01-01"}):
+            self.assertEqual(self.client.get(url, params).status_code, 400, params)
+        self.login(self.a1)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+    def test_deleting_a_group_with_tickets(self):
+        t = self.make_ticket(assignee=self.a1)
+        self.make_ticket(status=Ticket.Status.RESOLVED)
+        other = Group.objects.create(organization=self.org, name="Billing", manager=self.mgr)
+        kept = self.make_ticket(group=other)
+        self.login(self.admin)
+        self.assertEqual(self.client.delete(f"/api/org-admin/groups/{self.group.id}/").status_code, 204)
+        connection.check_constraints()
+        self.assertEqual(list(Ticket.objects.values_list("id", flat=True)), [kept.id])
+        self.assertFalse(TicketHourlyActivity.objects.filter(group_id=self.group.id).exists())
+        self.assertTrue(TicketChange.objects.filter(ticket_id=t.id, op=TicketChange.Op.DELETE).exists())
+        r = self.client.get("/api/reports/tickets/")
+        self.assertEqual(sum(r.data["series"][0]["created"]), 1)
+
+
+class CommentTimelineTests(OrgTestCase):
+    def test_pages_and_permissions(self):
+        t = self.make_ticket(assignee=self.a1)
+        made = [t.comments.create(author=self.a1, body=f"c{i}").id for i in range(5)]
+        url = f"/api/tickets/{t.id}/comments/"
+        self.login(self.a1)
+        r = self.client.get(url, {"page_size": 2})
+        self.assertEqual([c["id"] for c in r.data["results"]], made[:-3:-1])
+        self.assertIsNotNone(r.data["next"])
+        r = self.client.get(url, {"ordering": "created_at", "page_size": 2})
+        self.assertEqual([c["id"] for c in r.data["results"]], made[:2])
+        r = self.client.post(url, {"body": "new"}, format="json")
+        self.assertEqual(r.status_code, 201, r.data)
+        self.login(self.a2)
+        self.assertEqual(self.client.delete(f"{url}{r.data['id']}/").status_code, 403)
+        outsider = self.make_user("outsider")
+        self.login(outsider)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class UploadTests(OrgTestCase):
+    def setUp(self):
+        super().setUp()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        media_settings = self.settings(MEDIA_ROOT=media.name, UPLOAD_TEMP_DIR=os.path.join(media.name, "tmp"))
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+        chunk_size = mock.patch.object(uploads, "CHUNK_SIZE", 4)
+        chunk_size.start()
+        self.addCleanup(chunk_size.stop)
+        self.ticket = self.make_ticket(assignee=self.a1)
+        self.login(self.a1)
+
+    def upload(self, data, sha256=""):
+        r = self.client.post("/api/uploads/", {"ticket": self.ticket.id, "filename": "notes.txt",
+                                               "size": len(data), "sha256": sha256}, format="json")
+        self.assertEqual(r.status_code, 201, r.data)
+        return r.data
+
+    def put_chunk(self, session, index, data):
+        return self.client.put(f"/api/uploads/{session['id']}/chunks/{index}/", data,
+                               content_type="application/octet-stream")
+
+    def test_chunks_in_any_order_then_dedup(self):
+        data = b"hello world"
+        session = self.upload(data, hashlib.sha256(data).hexdigest())
+        self.assertEqual(session["total_chunks"], 3)
+        for i in (2, 0):
+            self.assertEqual(self.put_chunk(session, i, data[i * 4:i * 4 + 4]).status_code, 200)
+        self.assertEqual(self.client.get(f"/api/uploads/{session['id']}/").data["received"], [0, 2])
+        self.assertEqual(self.client.post(f"/api/uploads/{session['id']}/complete/").status_code, 400)
+        self.assertEqual(self.put_chunk(session, 1, data[4:8]).status_code, 200)
+        r = self.client.post(f"/api/uploads/{session['id']}/complete/")
+        self.assertEqual(r.status_code, 201, r.data)
+        again = self.upload(data, hashlib.sha256(data).hexdigest())
+        self.assertTrue(again["deduplicated"])
+        attachments = self.ticket.attachments.all()
+        self.assertEqual(len({a.blob_id for a in attachments}), 1)
+        self.assertEqual(attachments[0].blob.ref_count, 2)
+
+    def test_rejects_bad_chunks_and_hashes(self):
+        data = b"hello world"
+        session = self.upload(data, "0" * 64)
+        self.assertEqual(self.put_chunk(session, 0, b"abc").status_code, 400)
+        self.assertEqual(self.put_chunk(session, 3, b"abcd").status_code, 400)
+        for i in range(3):
+            self.put_chunk(session, i, data[i * 4:i * 4 + 4])
+        r = self.client.post(f"/api/uploads/{session['id']}/complete/")
+        self.assertEqual((r.status_code, r.data["detail"]), (400, "SHA-256 mismatch."))
+        self.login(self.a2)
+        self.assertEqual(self.client.get(f"/api/uploads/{session['id']}/").status_code, 404)
+
+    def test_range_download(self):
+        r = self.client.post(f"/api/tickets/{self.ticket.id}/attachments/",
+                             {"file": SimpleUploadedFile("a.txt", b"0123456789")}, format="multipart")
+        self.assertEqual(r.status_code, 201, r.data)
+        url = f"/api/tickets/{self.ticket.id}/attachments/{r.data['id']}/download/"
+        r = self.client.get(url, HTTP_RANGE="bytes=2-5")
+        self.assertEqual((r.status_code, r["Content-Range"]), (206, "bytes 2-5/10"))
+        self.assertEqual(b"".join(r.streaming_content), b"2345")
+        self.assertEqual(self.client.get(url, HTTP_RANGE="bytes=20-").status_code, 416)
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with self.settings(ATTACHMENT_SENDFILE="x-accel-redirect"):
+            self.assertTrue(self.client.get(url)["X-Accel-Redirect"].startswith("/protected-media/blobs/"))
+        outsider = self.make_user("outsider")
+        self.login(outsider)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class JobTests(OrgTestCase):
+    def setUp(self):
+        super().setUp()
+        self.calls = []
+        self.fail = False
+
+        def handler(payload):
+            self.calls.append(payload)
+            if self.fail:
+                raise RuntimeError("boom")
+
+        jobs.task("test.job", max_attempts=2)(handler)
+        self.addCleanup(jobs.REGISTRY.pop, "test.job")
+
+    def test_runs_queued_jobs(self):
+        jobs.enqueue("test.job", {"n": 1})
+        self.assertEqual(jobs.run_pending(names=["test.job"]), 1)
+        self.assertEqual(self.calls, [{"n": 1}])
+        self.assertEqual(Job.objects.get().status, Job.Status.DONE)
+        with self.assertRaises(KeyError):
+            jobs.enqueue("no.such.job")
+
+    def test_key_keeps_one_pending_job(self):
+        first = jobs.enqueue("test.job", key="k")
+        self.assertEqual(jobs.enqueue("test.job", key="k").pk, first.pk)
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_failures_back_off_then_fail(self):
+        self.fail = True
+        job = jobs.enqueue("test.job")
+        jobs.run_pending(names=["test.job"])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.Status.QUEUED, 1))
+        self.assertGreater(job.run_at, timezone.now())
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        jobs.run_pending(names=["test.job"])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.Status.FAILED, 2))
+        self.assertIn("RuntimeError: boom", job.last_error)
+
+    def test_stuck_jobs_are_requeued(self):
+        job = jobs.enqueue("test.job")
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.Status.RUNNING, attempts=1, locked_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(jobs.reap(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.QUEUED)
+
+
+@override_settings(THROTTLE_RATES={"list": {"user": "3/min", "org": "100/min"}})
+class ListThrottleTests(OrgTestCase):
+    def test_user_bucket(self):
+        self.login(self.a1)
+        codes = [self.client.get("/api/tickets/").status_code for _ in range(4)]
+        self.assertEqual(codes, [200, 200, 200, 429])
+        self.assertIn("Retry-After", self.client.get("/api/tickets/"))
+        self.login(self.a2)
+        self.assertEqual(self.client.get("/api/tickets/").status_code, 200)
@@ -0,0 +1,268 @@
+# backend/tickets/uploads.py
+"""
+Chunked, resumable attachment uploads with content-addressed storage.
+
+Protocol (see the upload views):
+  1. start(): declare ticket, filename, size and optionally the SHA-256.
+     Returns a session with chunk_size / total_chunks. If the hash is
+     already stored for this org, the attachment is made at once.
+  2. write_chunk(): PUT each chunk, in any order or in parallel. A chunk is
+     streamed to UPLOAD_TEMP_DIR/<session>/<index> through a private temp
+     file and renamed into place, so concurrent or repeated writes of the
+     same chunk never expose a partial file. received() lists what is on
+     disk, so a client can resume after a failure.
+  3. complete(): streams the chunks in order into one file, hashing it as it
+     goes, then stores it as blobs/<aa>/<bb>/<sha256>. When that blob already
+     exists, the new copy is dropped and the blob's ref_count is raised.
+
+Everything is plain local-disk I/O in blocks of IO_BLOCK bytes; no file
+is ever held in memory. Abandoned sessions, orphan temp dirs and blobs
+whose ref_count fell to zero are removed by `manage.py gc_uploads` (gc()).
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Attachment, Blob, UploadSession
+
+IO_BLOCK = 1024 * 1024
+CHUNK_SIZE = getattr(settings, "UPLOAD_CHUNK_SIZE", 4 * 1024 * 1024)
+MAX_SIZE = getattr(settings, "UPLOAD_MAX_SIZE", 100 * 1024 * 1024)
+SESSION_TTL = getattr(settings, "UPLOAD_SESSION_TTL", timedelta(hours=24))
+
+
+class UploadError(Exception):
+    """Client-side problem with an upload; args[0] is the response body."""
+
+
+def temp_root():
+    return getattr(settings, "UPLOAD_TEMP_DIR", os.path.join(settings.MEDIA_ROOT, "uploads", "tmp"))
+
+
+def session_dir(session_id):
+    return os.path.join(temp_root(), str(session_id))
+
+
+def blob_name(sha256):
+    return f"blobs/{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+
+def _blob_path(sha256):
+    return os.path.join(settings.MEDIA_ROOT, blob_name(sha256))
+
+
+# -- blobs ---------------------------------------------------------------
+def _adopt(path, sha256, size):
+    """
+    Make the finished file at `path` the blob for `sha256`, or drop it if that
+    blob exists already. Returns the Blob; call inside a transaction.
+    """
+    blob = Blob.objects.select_for_update().filter(sha256=sha256).first()
+    final = _blob_path(sha256)
+    if blob is not None and os.path.exists(final):
+        os.remove(path)
+        return blob
+    # new content, or a row whose file went missing: ours has the same bytes
+    os.makedirs(os.path.dirname(final), exist_ok=True)
+    os.replace(path, final)
+    if blob is not None:
+        return blob
+    try:
+        with transaction.atomic():
+            return Blob.objects.create(sha256=sha256, size=size, file=blob_name(sha256))
+    except IntegrityError:
+        # a concurrent upload of the same bytes won the insert; its file and ours are identical
+        return Blob.objects.select_for_update().get(sha256=sha256)
+
+
+def _attach(ticket, user, blob, filename):
+    Blob.objects.filter(pk=blob.pk).update(ref_count=F("ref_count") + 1)
+    return Attachment.objects.create(
+        ticket=ticket, uploaded_by=user, blob=blob, file=blob.file.name,
+        filename=filename[:255], size=blob.size,
+    )
+
+
+def release(blob_id):
+    """One attachment fewer points at blob_id (called from the post_delete signal)."""
+    if blob_id is not None:
+        Blob.objects.filter(pk=blob_id, ref_count__gt=0).update(ref_count=F("ref_count") - 1)
+
+
+def store_file(ticket, user, fileobj, filename):
+    """Single-request upload (multipart): hash while spooling to disk, then de-duplicate."""
+    os.makedirs(temp_root(), exist_ok=True)
+    digest, size = hashlib.sha256(), 0
+    fd, path = tempfile.mkstemp(dir=temp_root(), suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            for piece in fileobj.chunks(IO_BLOCK):
+                digest.update(piece)
+                size += len(piece)
+                out.write(piece)
+        if size > MAX_SIZE:
+            raise UploadError({"detail": f"File exceeds the {MAX_SIZE} byte limit."})
+        with transaction.atomic():
+            return _attach(ticket, user, _adopt(path, digest.hexdigest(), size), filename)
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+# -- sessions ------------------------------------------------------------
+def start(ticket, user, filename, size, sha256=""):
+    """Open a session, or return (None, attachment) when the org already holds this content."""
+    if size > MAX_SIZE:
+        raise UploadError({"size": [f"Must be at most {MAX_SIZE} bytes."]})
+    if sha256:
+        blob = Blob.objects.filter(
+            sha256=sha256, size=size,
+            # only content this org already has, so hashes can't probe other orgs' files
+            attachments__ticket__organization_id=ticket.organization_id,
+        ).first()
+        if blob is not None:
+            with transaction.atomic():
+                return None, _attach(ticket, user, blob, filename)
+    session = UploadSession.objects.create(
+        ticket=ticket, user=user, filename=filename[:255], size=size,
+        chunk_size=CHUNK_SIZE, sha256=sha256,
+        expires_at=timezone.now() + SESSION_TTL,
+    )
+    os.makedirs(session_dir(session.pk), exist_ok=True)
+    return session, None
+
+
+def expected_size(session, index):
+    if index == session.total_chunks - 1:
+        return session.size - index * session.chunk_size
+    return session.chunk_size
+
+
+def received(session):
+    try:
+        names = os.listdir(session_dir(session.pk))
+    except FileNotFoundError:
+        return []
+    return sorted(int(n) for n in names if n.isdigit())
+
+
+def write_chunk(session, index, stream):
+    """Stream one chunk from a file-like `stream` to disk; validates its length."""
+    if not 0 <= index < session.total_chunks:
+        raise UploadError({"detail": f"Chunk index must be between 0 and {session.total_chunks - 1}."})
+    want = expected_size(session, index)
+    folder = session_dir(session.pk)
+    os.makedirs(folder, exist_ok=True)
+    fd, part = tempfile.mkstemp(dir=folder, suffix=".part")
+    try:
+        got = 0
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                piece = stream.read(min(IO_BLOCK, want + 1 - got))
+                if not piece:
+                    break
+                got += len(piece)
+                if got > want:
+                    break
+                out.write(piece)
+        if got != want:
+            raise UploadError({"detail": f"Chunk {index} must be exactly {want} bytes."})
+        os.replace(part, os.path.join(folder, str(index)))
+    finally:
+        if os.path.exists(part):
+            os.remove(part)
+    UploadSession.objects.filter(pk=session.pk).update(expires_at=timezone.now() + SESSION_TTL)
+    return want
+
+
+def complete(session):
+    """Assemble, hash and store the upload; returns the new Attachment."""
+    missing = sorted(set(range(session.total_chunks)) - set(received(session)))
+    if missing:
+        raise UploadError({"detail": "Upload is incomplete.", "missing": missing[:100]})
+    folder = session_dir(session.pk)
+    fd, assembled = tempfile.mkstemp(dir=folder, suffix=".part")
+    digest, size = hashlib.sha256(), 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            for index in range(session.total_chunks):
+                with open(os.path.join(folder, str(index)), "rb") as src:
+                    while piece := src.read(IO_BLOCK):
+                        digest.update(piece)
+                        size += len(piece)
+                        out.write(piece)
+        sha256 = digest.hexdigest()
+        if size != session.size:
+            raise UploadError({"detail": f"Assembled {size} bytes, expected {session.size}."})
+        if session.sha256 and session.sha256 != sha256:
+            raise UploadError({"detail": "SHA-256 mismatch.", "sha256": sha256})
+        with transaction.atomic():
+            # a parallel complete() of the same session may have finished first
+            if not UploadSession.objects.select_for_update().filter(pk=session.pk).exists():
+                raise UploadError({"detail": "Upload was already completed or aborted."})
+            attachment = _attach(session.ticket, session.user, _adopt(assembled, sha256, size), session.filename)
+            UploadSession.objects.filter(pk=session.pk).delete()
+    finally:
+        if os.path.exists(assembled):
+            os.remove(assembled)
+    transaction.on_commit(lambda: shutil.rmtree(folder, ignore_errors=True))
+    return attachment
+
+
+def abort(session):
+    folder = session_dir(session.pk)
+    session.delete()
+    shutil.rmtree(folder, ignore_errors=True)
+
+
+# -- garbage collection --------------------------------------------------
+def gc(now=None, dry_run=False):
+    """
+    Remove expired sessions (and their chunks), temp dirs with no session,
+    and blobs nobody references that are older than SESSION_TTL.
+    Returns counts per kind.
+    """
+    now = now or timezone.now()
+    done = {"sessions": 0, "orphan_dirs": 0, "blobs": 0, "bytes": 0}
+
+    for session in UploadSession.objects.filter(expires_at__lt=now):
+        done["sessions"] += 1
+        if not dry_run:
+            abort(session)
+
+    root = temp_root()
+    live = {str(pk) for pk in UploadSession.objects.values_list("pk", flat=True)}
+    cutoff = (now - SESSION_TTL).timestamp()
+    if os.path.isdir(root):
+        for name in os.listdir(root):
+            path = os.path.join(root, name)
+            if name not in live and os.path.getmtime(path) < cutoff:
+                done["orphan_dirs"] += 1
+                if not dry_run:
+                    if os.path.isdir(path):
+                        shutil.rmtree(path, ignore_errors=True)
+                    else:
+                        os.remove(path)
+
+    for blob_id in Blob.objects.filter(ref_count=0, created_at__lt=now - SESSION_TTL).values_list("pk", flat=True):
+        with transaction.atomic():
+            # re-check under the row lock: an upload may have adopted it meanwhile
+            blob = Blob.objects.select_for_update().filter(pk=blob_id, ref_count=0).first()
+            if blob is None or blob.attachments.exists():
+                continue
+            done["blobs"] += 1
+            done["bytes"] += blob.size
+            if not dry_run:
+                # file first, while the row lock keeps uploads of this hash waiting
+                path = _blob_path(blob.sha256)
+                if os.path.exists(path):
+                    os.remove(path)
+                blob.delete()
+    return done
@@ -1,32 +1,60 @@
 # backend/tickets/views.py
-from datetime import timedelta
-from django.db.models import Count, Q
-from django.db.models.functions import TruncDate
+import asyncio
+import io
+import json
+import os
+import zoneinfo
+from datetime import datetime, time, timedelta
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.handlers.asgi import ASGIRequest
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse, StreamingHttpResponse
+from django.db.models import Count, Max, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from django.db import transaction
 from django.utils import timezone
-from rest_framework import status, viewsets
+from django.utils.dateparse import parse_date, parse_datetime
+from django.shortcuts import get_object_or_404
+from rest_framework import serializers, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from .models import Attachment, Comment, Group, GroupMembership, Ticket
-from .permissions import IsSameOrg
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken
+from .models import Attachment, Comment, Group, GroupMembership, Ticket, UploadSession
+from . import (
+    assignment, bulk, changelog, downloads, events, export, jobs, membership, reports, rollup, stats, stats_cache,
+    uploads,
+)
+from .importer import FORMATS as IMPORT_FORMATS, Importer, read_records
+from .pagination import AttachmentCursorPagination, CommentCursorPagination, TicketCursorPagination
+from .permissions import IsAuthorOrSupervisor
+from .visibility import sees_whole_org, visible_tickets
+from accounts.authentication import ClaimsJWTAuthentication
+from core import instrumentation
 from accounts.permissions import IsOrgAdmin
 from .serializers import (
     AttachmentSerializer,
     CommentSerializer,
     GroupSerializer,
+    TicketListSerializer,
     TicketSerializer,
     GroupMembershipSerializer,
+    MemberAssignmentSerializer,
+    UploadSessionSerializer,
+    UploadStartSerializer,
 )
 from django.contrib.auth import get_user_model
 
 class OrgScopedMixin:
     def get_queryset(self):
-        return self.queryset.filter(organization=self.request.user.organization)
+        return self.queryset.filter(organization_id=self.request.user.organization_id)
 
     def perform_create(self, serializer):
         serializer.save(
-            organization=self.request.user.organization,
+            organization_id=self.request.user.organization_id,
             created_by=self.request.user,
         )
 
@@ -38,7 +66,7 @@ class GroupViewSet(OrgScopedMixin, viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
 
     def perform_create(self, serializer):
-        serializer.save(organization=self.request.user.organization)
+        serializer.save(organization_id=self.request.user.organization_id)
 
     @action(detail=True, methods=["get"], url_path="members")
     def members(self, request, pk=None):
@@ -69,34 +97,177 @@ class TicketViewSet(OrgScopedMixin, viewsets.ModelViewSet):
         "assignee", "created_by", "organization", "group", "group__manager"
     )
     serializer_class = TicketSerializer
+    pagination_class = TicketCursorPagination
     # Visibility is enforced by get_queryset below; avoid over-restrictive object perms here.
     permission_classes = [IsAuthenticated]
+    throttle_scope = None  # per action (core.throttling); export counts as "stats"
+
+    # Ticket writes also move TicketVisibility / TicketDailyStats rows
+    # (tickets.signals); keep them in one transaction with the ticket.
+    @transaction.atomic
+    def perform_create(self, serializer):
+        data = serializer.validated_data
+        assigner = None
+        if data.get("assignee") is None and data["group"].assignment != Group.Assignment.MANUAL:
+            # groups with auto-assignment pick before the insert (tickets.assignment);
+            # manual groups take no lock on the Group row
+            assigner = assignment.Assigner(data["group"].pk)
+            picked = assigner.pick(Ticket(**data))
+            if picked is not None:
+                data.pop("assignee", None)
+                data["assignee_id"] = picked
+        super().perform_create(serializer)
+        if assigner is not None:
+            assigner.save()  # advances Group.last_assignee_id for ROUND_ROBIN
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+
+    def get_serializer_class(self):
+        if self.action in ("list", "changes"):
+            return TicketListSerializer
+        return TicketSerializer
+
+    def _wants_field(self, name):
+        raw = self.request.query_params.get("fields")
+        return not raw or name in {f.strip() for f in raw.split(",")}
+
+    def _with_list_annotations(self, qs):
+        # Correlated subqueries rather than Count() over joins: two LEFT JOINs
+        # would multiply rows and force a GROUP BY over the whole page.
+        def per_ticket(model, expr):
+            return Subquery(
+                model.objects.filter(ticket=OuterRef("pk"))
+                .order_by().values("ticket").annotate(v=expr).values("v")
+            )
+
+        if self._wants_field("comment_count"):
+            qs = qs.annotate(comment_count=Coalesce(per_ticket(Comment, Count("id")), 0))
+        if self._wants_field("attachment_count"):
+            qs = qs.annotate(attachment_count=Coalesce(per_ticket(Attachment, Count("id")), 0))
+        if self._wants_field("last_activity_at"):
+            qs = qs.annotate(last_activity_at=Greatest(
+                "updated_at",
+                Coalesce(per_ticket(Comment, Max("created_at")), "updated_at"),
+            ))
+        return qs
 
     def get_queryset(self):
-        qs = super().get_queryset()
-        u = self.request.user
-        role = getattr(u, "role", "")
-
-        # Admins/Supervisors see all org tickets
-        if role in ("ADMIN", "SUPERVISOR"):
-            return qs
-
-        # Agents/others:
-        # - always see tickets they created
-        # - see tickets assigned to them
-        # - if UNASSIGNED: only the group's manager can see it
-        # - once ASSIGNED: every member of that group can see it
-        my_group_ids = GroupMembership.objects.filter(
-            user=u).values_list("group_id", flat=True)
-
-        return qs.filter(
-            Q(created_by=u)
-            | Q(assignee=u)
-            | (Q(assignee__isnull=True) & Q(group__manager=u))
-            | (Q(assignee__isnull=False) & Q(group_id__in=my_group_ids))
-        ).distinct()
+        qs = self._visible(super().get_queryset())
+        if self.action in ("list", "changes"):
+            return self._with_list_annotations(qs)
+        if self.action == "retrieve":
+            # ?fields=... without comments/attachments skips the prefetch; the
+            # paginated /tickets/:id/comments/ and /attachments/ routes serve them
+            if self._wants_field("comments"):
+                qs = qs.prefetch_related(Prefetch(
+                    "comments", queryset=Comment.objects.select_related("author").order_by("created_at")))
+            if self._wants_field("attachments"):
+                qs = qs.prefetch_related("attachments")
+        return qs
+
+    def _visible(self, qs):
+        # rules live in tickets.visibility (shared with MyStatsView)
+        return visible_tickets(self.request.user, qs)
+
+    # --- Bulk operations: {"items": [...]} -> {"results": [per-item result]} ---
+    def _bulk(self, request, op):
+        items = request.data.get("items") if isinstance(request.data, dict) else None
+        if not isinstance(items, list) or not items:
+            return Response({"detail": "Provide a non-empty 'items' list."}, status=400)
+        if len(items) > bulk.MAX_ITEMS:
+            return Response({"detail": f"At most {bulk.MAX_ITEMS} items per request."}, status=400)
+        if not request.user.organization_id:
+            return Response({"detail": "User has no organization; contact an admin."}, status=400)
+        results = op(request.user, items)
+        return Response({
+            "ok": sum(1 for r in results if r["ok"]),
+            "failed": sum(1 for r in results if not r["ok"]),
+            "results": results,
+        })
+
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk_create(self, request):
+        return self._bulk(request, bulk.create_tickets)
+
+    @action(detail=False, methods=["post"], url_path="bulk/status")
+    def bulk_status(self, request):
+        return self._bulk(request, bulk.set_status)
+
+    @action(detail=False, methods=["post"], url_path="bulk/assign")
+    def bulk_assign(self, request):
+        return self._bulk(request, bulk.assign)
+
+    @action(detail=False, methods=["get"], url_path="export", throttle_scope="stats")
+    def export(self, request):
+        """Stream every visible ticket: ?fmt=csv|ndjson&comments=1"""
+        fmt = request.query_params.get("fmt", "csv")
+        if fmt not in export.FORMATS:
+            return Response({"detail": "fmt must be csv or ndjson."}, status=400)
+        with_comments = request.query_params.get("comments") in ("1", "true")
+        lines = export.lines(self.get_queryset(), fmt=fmt, with_comments=with_comments)
+        if isinstance(request._request, ASGIRequest):
+            lines = export.alines(lines)  # a sync iterator would be buffered whole
+        response = StreamingHttpResponse(lines, content_type=export.FORMATS[fmt])
+        response["Content-Disposition"] = f'attachment; filename="tickets.{fmt}"'
+        return response
+
+    @action(detail=False, methods=["get"], url_path="changes")
+    def changes(self, request):
+        """
+        Delta sync: ?cursor=<n>&limit=<n> -> tickets changed since the cursor
+        (list rows) and ids to drop. Without a cursor, or with one older than
+        the retained log, returns reset=true and the current cursor.
+        """
+        try:
+            raw = request.query_params.get("cursor")
+            cursor = int(raw) if raw not in (None, "") else None
+            limit = int(request.query_params.get("limit") or 500)
+        except ValueError:
+            return Response({"detail": "cursor and limit must be integers."}, status=400)
+        if (cursor is not None and cursor < 0) or not 1 <= limit <= changelog.MAX_LIMIT:
+            return Response({"detail": f"cursor must be >= 0 and limit 1-{changelog.MAX_LIMIT}."}, status=400)
+        if not request.user.organization_id:
+            return Response({"detail": "User has no organization; contact an admin."}, status=400)
+        result = changelog.feed(request.user, cursor, limit, self.get_queryset())
+        result["tickets"] = self.get_serializer(result["tickets"], many=True).data
+        return Response(result)
+
+    @action(detail=False, methods=["post"], url_path="import", permission_classes=[IsOrgAdmin])
+    def import_tickets(self, request):
+        """
+        Multipart upload: file=<csv|ndjson>, fmt=csv|ndjson, dry_run=1, skip=<n>.
+        For very large migrations use `manage.py import_tickets`.
+        """
+        upload = request.FILES.get("file")
+        fmt = request.data.get("fmt", "ndjson")
+        if upload is None:
+            return Response({"detail": "Attach the export as 'file'."}, status=400)
+        if fmt not in IMPORT_FORMATS:
+            return Response({"detail": "fmt must be csv or ndjson."}, status=400)
+        try:
+            skip = int(request.data.get("skip") or 0)
+        except (TypeError, ValueError):
+            return Response({"detail": "skip must be an integer."}, status=400)
+
+        importer = Importer(
+            request.user.organization_id, request.user.id,
+            dry_run=request.data.get("dry_run") in ("1", "true"),
+        )
+        stream = io.TextIOWrapper(upload.file, encoding="utf-8", newline="")
+        try:
+            summary = importer.run(read_records(stream, fmt), skip=skip)
+        except (ValueError, UnicodeDecodeError) as e:
+            return Response({"detail": f"Unreadable input: {e}", **importer.summary()}, status=400)
+        return Response(summary, status=200 if not summary["failed"] else 207)
 
     @action(detail=True, methods=["post"], url_path="assign")
+    @transaction.atomic
     def assign(self, request, pk=None):
         ticket = self.get_object()
 
@@ -119,7 +290,7 @@ class TicketViewSet(OrgScopedMixin, viewsets.ModelViewSet):
             return Response({"detail": "Ticket has no group; set a group first."}, status=400)
 
         # Assignee must be a member of the ticket's group
-        if not GroupMembership.objects.filter(group_id=ticket.group_id, user_id=assignee_id).exists():
+        if not GroupMembership.objects.filter(user_id=assignee_id, group_id=ticket.group_id).exists():
             return Response({"detail": "Assignee must be a member of the ticket's group."}, status=400)
 
         ticket.assignee_id = assignee_id
@@ -127,6 +298,7 @@ class TicketViewSet(OrgScopedMixin, viewsets.ModelViewSet):
         return Response(TicketSerializer(ticket, context={"request": request}).data, status=200)
 
     @action(detail=True, methods=['post'], url_path='close')
+    @transaction.atomic
     def close(self, request, pk=None):
         ticket = self.get_object()
 
@@ -170,26 +342,204 @@ class TicketViewSet(OrgScopedMixin, viewsets.ModelViewSet):
         return Response(TicketSerializer(ticket, context={"request": request}).data, status=status.HTTP_200_OK)
 
 
-# --- Comments ---
-class CommentViewSet(OrgScopedMixin, viewsets.ModelViewSet):
-    queryset = Comment.objects.all().select_related("ticket", "author")
-    serializer_class = CommentSerializer
-    permission_classes = [IsAuthenticated, IsSameOrg]
+# --- Comments & attachments (nested under /api/tickets/:ticket_pk/) ---
+class TicketChildMixin:
+    """
+    Scopes a ticket's comments/attachments to tickets the caller can see
+    (same rules as TicketViewSet) and supports ?since=<ISO datetime> for
+    incremental fetches.
+    """
+    time_field = "created_at"
+    owner_field = None
+
+    def get_ticket(self):
+        if not hasattr(self, "_ticket"):
+            visible = visible_tickets(
+                self.request.user, Ticket.objects.filter(organization_id=self.request.user.organization_id))
+            self._ticket = get_object_or_404(visible, pk=self.kwargs["ticket_pk"])
+        return self._ticket
+
+    def get_queryset(self):
+        qs = self.queryset.filter(ticket=self.get_ticket())
+        raw = self.request.query_params.get("since")
+        if raw:
+            since = serializers.DateTimeField().to_internal_value(raw)
+            qs = qs.filter(**{f"{self.time_field}__gt": since})
+        return qs
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user,
-                        ticket_id=self.kwargs["ticket_pk"])
+        serializer.save(ticket=self.get_ticket(), **{self.owner_field: self.request.user})
 
 
-# --- Attachments ---
-class AttachmentViewSet(OrgScopedMixin, viewsets.ModelViewSet):
-    queryset = Attachment.objects.all().select_related("ticket", "uploaded_by")
-    serializer_class = AttachmentSerializer
-    permission_classes = [IsAuthenticated, IsSameOrg]
+class CommentViewSet(TicketChildMixin, viewsets.ModelViewSet):
+    queryset = Comment.objects.all().select_related("author")
+    serializer_class = CommentSerializer
+    pagination_class = CommentCursorPagination
+    permission_classes = [IsAuthenticated, IsAuthorOrSupervisor]
+    time_field = "created_at"
+    owner_field = "author"
 
-    def perform_create(self, serializer):
-        serializer.save(uploaded_by=self.request.user,
-                        ticket_id=self.kwargs["ticket_pk"])
+
+class AttachmentViewSet(TicketChildMixin, viewsets.ModelViewSet):
+    queryset = Attachment.objects.all().select_related("uploaded_by", "blob")
+    serializer_class = AttachmentSerializer
+    pagination_class = AttachmentCursorPagination
+    permission_classes = [IsAuthenticated, IsAuthorOrSupervisor]
+    time_field = "uploaded_at"
+    owner_field = "uploaded_by"
+
+    def create(self, request, *args, **kwargs):
+        # single-request multipart upload; stored de-duplicated like chunked ones
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response({"file": ["No file was submitted."]}, status=400)
+        try:
+            attachment = uploads.store_file(self.get_ticket(), request.user, upload, upload.name)
+        except uploads.UploadError as e:
+            return Response(e.args[0], status=400)
+        return Response(self.get_serializer(attachment).data, status=status.HTTP_201_CREATED)
+
+    def download(self, request, *args, **kwargs):
+        """GET/HEAD the file; same visibility as the ticket. Supports Range and If-None-Match."""
+        attachment = self.get_object()
+        name = attachment.filename or os.path.basename(attachment.file.name)
+        try:
+            return downloads.serve(
+                request, attachment.file.path, name,
+                etag_value=attachment.blob.sha256 if attachment.blob_id else None,
+                storage_name=attachment.file.name,
+            )
+        except (FileNotFoundError, IsADirectoryError, SuspiciousFileOperation):
+            # older rows may name a missing file or a path outside storage
+            return Response({"detail": "File is missing."}, status=404)
+
+
+# --- Chunked uploads ---
+class UploadViewSet(viewsets.ViewSet):
+    """
+    POST /api/uploads/ {ticket, filename, size, sha256?} -> session (or the attachment if already stored)
+    PUT  /api/uploads/:id/chunks/:index/ <raw bytes>   (any order, parallel, retry-safe)
+    GET  /api/uploads/:id/                              -> session + received chunk indexes (resume)
+    POST /api/uploads/:id/complete/                     -> attachment
+    DELETE /api/uploads/:id/                            -> abort
+    """
+    permission_classes = [IsAuthenticated]
+    lookup_value_regex = "[0-9a-f-]{36}"
+
+    def _session(self, pk):
+        return get_object_or_404(
+            UploadSession.objects.select_related("ticket", "user"), pk=pk, user=self.request.user)
+
+    def _status(self, session):
+        return {**UploadSessionSerializer(session).data, "received": uploads.received(session)}
+
+    def _attachment(self, attachment, **extra):
+        return {**AttachmentSerializer(attachment, context={"request": self.request}).data, **extra}
+
+    def create(self, request):
+        ser = UploadStartSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        d = ser.validated_data
+        ticket = visible_tickets(
+            request.user, Ticket.objects.filter(organization_id=request.user.organization_id)
+        ).filter(pk=d["ticket"]).first()
+        if ticket is None:
+            return Response({"ticket": ["Ticket not found."]}, status=400)
+        try:
+            session, attachment = uploads.start(ticket, request.user, d["filename"], d["size"], d["sha256"])
+        except uploads.UploadError as e:
+            return Response(e.args[0], status=400)
+        if attachment is not None:
+            return Response({"attachment": self._attachment(attachment), "deduplicated": True},
+                            status=status.HTTP_201_CREATED)
+        return Response(self._status(session), status=status.HTTP_201_CREATED)
+
+    def retrieve(self, request, pk=None):
+        return Response(self._status(self._session(pk)))
+
+    def destroy(self, request, pk=None):
+        uploads.abort(self._session(pk))
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=True, methods=["put"], url_path=r"chunks/(?P<index>\d+)")
+    def chunk(self, request, pk=None, index=None):
+        session = self._session(pk)
+        # read the raw body straight off the socket; DRF never parses it
+        try:
+            size = uploads.write_chunk(session, int(index), request.stream or io.BytesIO())
+        except uploads.UploadError as e:
+            return Response(e.args[0], status=400)
+        return Response({"index": int(index), "size": size})
+
+    @action(detail=True, methods=["post"])
+    def complete(self, request, pk=None):
+        session = self._session(pk)
+        try:
+            attachment = uploads.complete(session)
+        except uploads.UploadError as e:
+            return Response(e.args[0], status=400)
+        return Response(self._attachment(attachment), status=status.HTTP_201_CREATED)
+
+
+# --- Real-time events (SSE; async, so serve it through core.asgi) ---
+EVENTS_HEARTBEAT = 20  # seconds; keeps proxies from closing idle streams
+
+
+@sync_to_async
+def _event_viewer(request):
+    """JWT from the Authorization header or ?token= (EventSource can't send headers)."""
+    auth = ClaimsJWTAuthentication()
+    raw = request.GET.get("token")
+    if not raw:
+        header = auth.get_header(request)
+        raw = auth.get_raw_token(header) if header else None
+    if not raw:
+        return None
+    try:
+        user = auth.get_user(auth.get_validated_token(raw))
+    except (InvalidToken, AuthenticationFailed):
+        return None
+    groups = set(membership.group_ids(user.id))  # a private copy: Subscription.render edits it
+    return user.organization_id, {"id": user.id, "role": user.role, "groups": groups}
+
+
+async def ticket_events(request):
+    """
+    GET /api/events/tickets/ - text/event-stream of ticket.created / updated /
+    assigned / closed / commented / deleted / hidden and tickets.refresh for
+    the caller's org, filtered by the ticket visibility rules.
+    """
+    found = await _event_viewer(request)
+    if found is None:
+        return JsonResponse({"detail": "Authentication credentials were not provided or are invalid."}, status=401)
+    org_id, viewer = found
+
+    async def stream():
+        sub = events.hub.subscribe(org_id, viewer)
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(sub.queue.get(), EVENTS_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                if sub.overflowed:
+                    # too far behind: drop the backlog and make the client refetch
+                    while not sub.queue.empty():
+                        sub.queue.get_nowait()
+                    sub.overflowed = False
+                    event = {"type": "tickets.refresh"}
+                out = sub.render(event)
+                if out is not None:
+                    yield f"event: {out['type']}\ndata: {json.dumps(out)}\n\n"
+        finally:
+            events.hub.unsubscribe(sub)
+
+    response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # nginx: don't buffer the stream
+    return response
 
 
 # --- Admin stats ---
@@ -201,105 +551,103 @@ class IsAdminOrSupervisor(IsAuthenticated):
 
 class AdminStatsView(APIView):
     permission_classes = [IsAdminOrSupervisor]
+    throttle_scope = "stats"
 
     def get(self, request):
-        org = request.user.organization
-        qs = Ticket.objects.filter(organization=org)
-
-        total = qs.count()
-        by_status = dict(qs.values("status").annotate(
-            c=Count("id")).values_list("status", "c"))
-        by_priority = dict(qs.values("priority").annotate(
-            c=Count("id")).values_list("priority", "c"))
-
-        today = timezone.now().date()
-        start = today - timedelta(days=6)
-        daily = (
-            qs.filter(created_at__date__gte=start)
-            .annotate(d=TruncDate("created_at"))
-            .values("d")
-            .annotate(c=Count("id"))
-        )
-        by_day = {str(row["d"]): row["c"] for row in daily}
-        days = [start + timedelta(days=i) for i in range(7)]
-        last7 = [{"date": str(d), "count": by_day.get(str(d), 0)}
-                 for d in days]
-
-        top_agents = list(
-            qs.values("assignee__username").annotate(
-                count=Count("id")).order_by("-count")[:5]
-        )
+        # served from the TicketDailyStats rollup, not the ticket table
+        org_id = request.user.organization_id
+        return Response(stats_cache.cached(org_id, "org", lambda: rollup.org_stats(org_id)))
 
-        return Response(
-            {
-                "total_tickets": total,
-                "by_status": by_status,
-                "by_priority": by_priority,
-                "last_7_days": last7,
-                "top_agents": [
-                    {"agent": r["assignee__username"]
-                        or "Unassigned", "count": r["count"]}
-                    for r in top_agents
-                ],
-            }
-        )
+
+class StatsCacheView(APIView):
+    """Hit/miss counters of the stats cache."""
+    permission_classes = [IsAdminOrSupervisor]
+    throttle_scope = "stats"
+
+    def get(self, request):
+        return Response(stats_cache.counters())
+
+
+class RouteTimingView(APIView):
+    """Per-route request counts, latency and SQL totals of this worker (core.instrumentation)."""
+    permission_classes = [IsAdminOrSupervisor]
+    throttle_scope = "stats"
+
+    def get(self, request):
+        return Response(instrumentation.stats())
+
+
+class TicketReportView(APIView):
+    """
+    Created / resolved / backlog series for the org.
+    ?from=&to= (ISO date or datetime, naive = in tz; default last 30 days),
+    ?bucket=hour|day|week|month, ?tz=<IANA name>, ?split=group|priority|assignee
+    """
+    permission_classes = [IsAdminOrSupervisor]
+    throttle_scope = "stats"
+
+    def get(self, request):
+        p = request.query_params
+        try:
+            tz = zoneinfo.ZoneInfo(p.get("tz") or settings.TIME_ZONE)
+        except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+            return Response({"detail": "Unknown time zone."}, status=400)
+
+        bucket = p.get("bucket", "day")
+        if bucket not in reports.BUCKETS:
+            return Response({"detail": f"bucket must be one of {', '.join(reports.BUCKETS)}."}, status=400)
+        split = p.get("split") or None
+        if split and split not in reports.SPLITS:
+            return Response({"detail": f"split must be one of {', '.join(reports.SPLITS)}."}, status=400)
+
+        try:
+            end = self._parse_when(p.get("to"), tz, end_of_day=True) or timezone.now()
+            start = self._parse_when(p.get("from"), tz) or end - timedelta(days=30)
+        except ValueError:
+            return Response({"detail": "from/to must be ISO dates or datetimes."}, status=400)
+        if start > end:
+            return Response({"detail": "'from' must not be after 'to'."}, status=400)
+
+        try:
+            data = reports.ticket_series(
+                request.user.organization_id, start, end, bucket=bucket, tz=tz, split=split)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=400)
+        return Response({"bucket": bucket, "tz": str(tz), "split": split, **data})
+
+    @staticmethod
+    def _parse_when(raw, tz, end_of_day=False):
+        if not raw:
+            return None
+        dt = parse_datetime(raw)
+        if dt is None:
+            d = parse_date(raw)
+            if d is None:
+                raise ValueError(raw)
+            dt = datetime.combine(d, time.max if end_of_day else time.min)
+        return dt.replace(tzinfo=tz) if timezone.is_naive(dt) else dt
 
 
 class MyStatsView(APIView):
     permission_classes = [IsAuthenticated]
+    throttle_scope = "stats"
 
     def get(self, request):
         u = request.user
-        org = u.organization
+        org_id = u.organization_id
 
-        # mirror TicketViewSet visibility
-        if getattr(u, "role", "") in ("ADMIN", "SUPERVISOR"):
-            qs = Ticket.objects.filter(organization=org)
-            scope = "org"
-        else:
-            my_group_ids = GroupMembership.objects.filter(
-                user=u).values_list("group_id", flat=True)
-            qs = Ticket.objects.filter(organization=org).filter(
-                Q(created_by=u)
-                | Q(assignee=u)
-                | (Q(assignee__isnull=True) & Q(group__manager=u))
-                | (Q(assignee__isnull=False) & Q(group_id__in=my_group_ids))
-            ).distinct()
-            scope = "me"
-
-        total = qs.count()
-        by_status = dict(qs.values_list(
-            "status").annotate(c=Count("id")).order_by())
-        by_priority = dict(qs.values_list(
-            "priority").annotate(c=Count("id")).order_by())
-
-        today = timezone.now().date()
-        start = today - timedelta(days=6)
-        daily = (qs.filter(created_at__date__gte=start)
-                   .annotate(d=TruncDate("created_at"))
-                   .values("d").annotate(c=Count("id")))
-        by_day = {str(r["d"]): r["c"] for r in daily}
-        days = [start + timedelta(days=i) for i in range(7)]
-        last7 = [{"date": str(d), "count": by_day.get(str(d), 0)}
-                 for d in days]
-
-        top_agents = list(
-            qs.values("assignee__username").annotate(
-                count=Count("id")).order_by("-count")[:5]
-        )
+        if sees_whole_org(u):
+            data = stats_cache.cached(org_id, "org", lambda: rollup.org_stats(org_id))
+            return Response({"scope": "org", **data})
 
-        return Response({
-            "scope": scope,
-            "total_tickets": total,
-            "by_status": by_status,
-            "by_priority": by_priority,
-            "last_7_days": last7,
-            "top_agents": [
-                {"agent": r["assignee__username"]
-                    or "Unassigned", "count": r["count"]}
-                for r in top_agents
-            ],
-        })
+        data = stats_cache.cached(org_id, "me", lambda: self.visible_stats(u), user_id=u.id)
+        return Response({"scope": "me", **data})
+
+    @staticmethod
+    def visible_stats(u):
+        # same visibility as TicketViewSet; two queries (see tickets.stats)
+        return stats.dashboard(
+            visible_tickets(u, Ticket.objects.filter(organization_id=u.organization_id)))
 
 
 # Org admin version of groups
@@ -309,21 +657,58 @@ class OrgGroupViewSet(OrgScopedMixin, viewsets.ModelViewSet):
     permission_classes = [IsOrgAdmin]
 
     def perform_create(self, serializer):
-        serializer.save(organization=self.request.user.organization)
+        serializer.save(organization_id=self.request.user.organization_id)
 
-    @action(detail=True, methods=["get"], url_path="members")
-    def members(self, request, pk=None):
-        group = self.get_object()
-        users = (group.memberships.select_related("user")
-                 .values("user_id","user__username","user__first_name","user__last_name","user__role","user__is_active"))
-        data = [{
+    MEMBER_FIELDS = ("group_id", "user_id", "user__username", "user__first_name", "user__last_name",
+                     "user__role", "user__is_active", "open_tickets", "capacity", "skills")
+
+    @staticmethod
+    def _member_row(u):
+        return {
             "id": u["user_id"],
             "username": u["user__username"],
             "name": (u["user__first_name"] + " " + u["user__last_name"]).strip() or u["user__username"],
             "role": u["user__role"],
             "is_active": u["user__is_active"],
-        } for u in users]
-        return Response(data)
+            "open_tickets": u["open_tickets"],
+            "capacity": u["capacity"],
+            "skills": u["skills"],
+        }
+
+    def _member_rows(self, **filters):
+        rows = GroupMembership.objects.filter(**filters).order_by("user__username").values(*self.MEMBER_FIELDS)
+        return [(u["group_id"], self._member_row(u)) for u in rows]
+
+    @action(detail=True, methods=["get", "put"], url_path="members")
+    def members(self, request, pk=None):
+        """GET lists members; PUT {"members": [user ids]} makes that the exact member set."""
+        group = self.get_object()
+        if request.method == "PUT":
+            wanted = request.data.get("members") if isinstance(request.data, dict) else None
+            if not isinstance(wanted, list) or not all(isinstance(u, int) for u in wanted):
+                return Response({"detail": "Provide 'members' as a list of user ids."}, status=400)
+            known = set(get_user_model().objects.filter(id__in=wanted, organization=request.user.organization_id)
+                        .values_list("id", flat=True))
+            unknown = sorted(set(wanted) - known)
+            if unknown:
+                return Response({"detail": "Users not in your organization.", "users": unknown}, status=400)
+            added, removed = membership.set_members(group.pk, known)
+            return Response({
+                "added": sorted(added), "removed": sorted(removed),
+                "members": [row for _, row in self._member_rows(group_id=group.pk)],
+            })
+        return Response([row for _, row in self._member_rows(group_id=group.pk)])
+
+    @action(detail=False, methods=["get"], url_path="roster")
+    def roster(self, request):
+        """Every group of the org with its manager and members - two queries."""
+        by_group = {}
+        for gid, row in self._member_rows(group__organization=request.user.organization_id):
+            by_group.setdefault(gid, []).append(row)
+        return Response([
+            {**GroupSerializer(g, context={"request": request}).data, "members": by_group.get(g.pk, [])}
+            for g in self.get_queryset().order_by("name")
+        ])
 
     @action(detail=True, methods=["post"], url_path="set-manager")
     def set_manager(self, request, pk=None):
@@ -335,7 +720,7 @@ class OrgGroupViewSet(OrgScopedMixin, viewsets.ModelViewSet):
 
         User = get_user_model()
         try:
-            user = User.objects.get(id=uid, organization=request.user.organization)
+            user = User.objects.get(id=uid, organization_id=request.user.organization_id)
         except User.DoesNotExist:
             return Response({"detail": "User not in your organization."}, status=400)
 
@@ -343,8 +728,8 @@ class OrgGroupViewSet(OrgScopedMixin, viewsets.ModelViewSet):
         group.save(update_fields=["manager"])
         return Response(GroupSerializer(group, context={"request": request}).data)
 
-    # Add/remove members without needing membership id
-    @action(detail=True, methods=["post", "delete"], url_path=r"members/(?P<user_id>\d+)")
+    # Add/remove members without needing membership id; PATCH sets capacity/skills
+    @action(detail=True, methods=["post", "delete", "patch"], url_path=r"members/(?P<user_id>\d+)")
     def change_member(self, request, pk=None, user_id=None):
         group = self.get_object()
         try:
@@ -352,16 +737,36 @@ class OrgGroupViewSet(OrgScopedMixin, viewsets.ModelViewSet):
         except (TypeError, ValueError):
             return Response({"detail": "Invalid user id"}, status=400)
 
-        # must be same org
-        if not GroupMembership.objects.filter(group=group, group__organization=request.user.organization).exists():
-            return Response({"detail": "Invalid group/org."}, status=400)
-
-        if request.method == "POST":
-            GroupMembership.objects.get_or_create(group=group, user_id=uid)
-        else:  # DELETE
+        if request.method == "DELETE":
+            # decided on the row, not the membership cache (which may be stale in this worker)
             GroupMembership.objects.filter(group=group, user_id=uid).delete()
+            return Response(status=204)
+        created = False
+        if request.method == "POST":
+            # get_object() already scoped the group to the caller's org; the user must be in it too
+            if not get_user_model().objects.filter(id=uid, organization=request.user.organization_id).exists():
+                return Response({"detail": "User not in your organization."}, status=400)
+            _, created = GroupMembership.objects.get_or_create(group=group, user_id=uid)
+        else:  # PATCH
+            member = get_object_or_404(GroupMembership, group=group, user_id=uid)
+            ser = MemberAssignmentSerializer(member, data=request.data, partial=True)
+            ser.is_valid(raise_exception=True)
+            ser.save()
+        # just this member, not the whole list (the roster endpoint has that)
+        rows = self._member_rows(group_id=group.pk, user_id=uid)
+        return Response(rows[0][1] if rows else None, status=201 if created else 200)
+
+    @action(detail=True, methods=["post"], url_path="auto-assign")
+    def auto_assign(self, request, pk=None):
+        """Assign the group's unassigned open tickets now (?background=1 queues a job instead)."""
+        group = self.get_object()
+        if group.assignment == Group.Assignment.MANUAL:
+            return Response({"detail": "Set the group's assignment strategy first."}, status=400)
+        if request.query_params.get("background") in ("1", "true"):
+            job = jobs.enqueue("tickets.assign_backlog", {"group": group.pk}, key=f"assign_backlog:{group.pk}")
+            return Response({"job": job.pk}, status=202)
+        return Response({"assigned": assignment.assign_backlog(group.pk)})
 
-        return self.members(request, pk=pk)
 
 class OrgMembershipViewSet(OrgScopedMixin, viewsets.ModelViewSet):
     queryset = GroupMembership.objects.select_related("group", "user", "group__organization")
@@ -0,0 +1,173 @@
+# backend/tickets/visibility.py
+"""
+Who can see which ticket.
+
+Rules (agents and other non-admin roles):
+  - always see tickets they created
+  - see tickets assigned to them
+  - if UNASSIGNED: only the group's manager can see it
+  - once ASSIGNED: every member of that group can see it
+Admins/Supervisors see every ticket in their org.
+
+Instead of evaluating those four ORs (plus DISTINCT) per request, the answer
+is materialised in TicketVisibility(user, ticket) and kept current by the
+signal handlers in tickets.signals. Code that bypasses model signals
+(QuerySet.update, bulk_create, ...) must call sync_tickets() itself.
+Deleting a user is one: Django nulls Ticket.assignee with an UPDATE, and
+tickets.signals.user_deleted resyncs those tickets.
+
+Every dropped row is also written to the change log as HIDDEN, so delta
+sync can send a tombstone (tickets.changelog).
+"""
+from functools import reduce
+from operator import or_
+
+from django.db.models import Q
+
+from . import changelog
+from .models import GroupMembership, Ticket, TicketVisibility
+
+ORG_WIDE_ROLES = ("ADMIN", "SUPERVISOR")
+
+
+def sees_whole_org(user):
+    return getattr(user, "role", "") in ORG_WIDE_ROLES
+
+
+def visible_tickets(user, qs=None):
+    """Narrow an org-scoped ticket queryset to what `user` may see."""
+    if qs is None:
+        qs = Ticket.objects.filter(organization_id=user.organization_id)
+    if sees_whole_org(user):
+        return qs
+    # (user, ticket) is unique, so the join never duplicates rows
+    return qs.filter(visibility__user=user)
+
+
+def can_see(viewer, audience):
+    """
+    The same rules for a single ticket without touching the database, for
+    filtering pushed events (tickets.events). viewer: {"id", "role", "groups"};
+    audience: {"created_by", "assignee", "group", "manager"}.
+    """
+    if viewer["role"] in ORG_WIDE_ROLES:
+        return True
+    uid = viewer["id"]
+    if uid == audience["created_by"]:
+        return True
+    if audience["assignee"] is None:
+        return uid == audience["manager"]
+    return uid == audience["assignee"] or audience["group"] in viewer["groups"]
+
+
+def _desired_pairs(rows, members_by_group):
+    pairs = set()
+    for t in rows:
+        pairs.add((t["id"], t["created_by_id"]))
+        if t["assignee_id"] is None:
+            if t["group__manager_id"] is not None:
+                pairs.add((t["id"], t["group__manager_id"]))
+        else:
+            pairs.add((t["id"], t["assignee_id"]))
+            pairs.update((t["id"], uid) for uid in members_by_group.get(t["group_id"], ()))
+    return pairs
+
+
+def _apply(desired, existing, log_added=False):
+    """log_added: also log gained rows (SHOWN) - when the tickets themselves did not change."""
+    add = desired - existing
+    drop = existing - desired
+    if add:
+        TicketVisibility.objects.bulk_create(
+            [TicketVisibility(ticket_id=t, user_id=u) for t, u in add],
+            ignore_conflicts=True,  # concurrent syncs may race to insert the same row
+        )
+        if log_added:
+            changelog.record_visibility(add, changelog.Op.SHOWN)
+    if drop:
+        by_ticket = {}
+        for t, u in drop:
+            by_ticket.setdefault(t, []).append(u)
+        TicketVisibility.objects.filter(
+            reduce(or_, (Q(ticket_id=t, user_id__in=us) for t, us in by_ticket.items()))
+        ).delete()
+        changelog.record_visibility(drop, changelog.Op.HIDDEN)
+
+
+def sync_tickets(ticket_ids):
+    """Recompute the visibility rows of the given tickets."""
+    ticket_ids = list(ticket_ids)
+    if not ticket_ids:
+        return
+    rows = list(
+        Ticket.objects.filter(id__in=ticket_ids)
+        .values("id", "created_by_id", "assignee_id", "group_id", "group__manager_id")
+    )
+    members_by_group = {}
+    assigned_groups = {t["group_id"] for t in rows if t["assignee_id"] is not None}
+    if assigned_groups:
+        for gid, uid in GroupMembership.objects.filter(
+                group_id__in=assigned_groups).values_list("group_id", "user_id"):
+            members_by_group.setdefault(gid, set()).add(uid)
+
+    existing = set(
+        TicketVisibility.objects.filter(ticket_id__in=ticket_ids)
+        .values_list("ticket_id", "user_id")
+    )
+    _apply(_desired_pairs(rows, members_by_group), existing)
+
+
+def sync_user_in_group(user_id, group_id, only_remove=False):
+    """
+    Recompute one user's rows for the tickets of one group - used when the
+    user joins/leaves the group or becomes/stops being its manager.
+    """
+    sync_users_in_group([user_id], group_id, only_remove)
+
+
+def sync_users_in_group(user_ids, group_id, only_remove=False):
+    """sync_user_in_group for many users at once (bulk membership edits)."""
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+    existing = set(
+        TicketVisibility.objects.filter(user_id__in=user_ids, ticket__group_id=group_id)
+        .values_list("ticket_id", "user_id")
+    )
+    members = set(GroupMembership.objects.filter(group_id=group_id, user_id__in=user_ids)
+                  .values_list("user_id", flat=True))
+    rule = (
+        Q(created_by_id__in=user_ids)
+        | Q(assignee_id__in=user_ids)
+        | Q(assignee__isnull=True, group__manager_id__in=user_ids)
+    )
+    if members:
+        rule |= Q(assignee__isnull=False)
+    desired = set()
+    for t in Ticket.objects.filter(group_id=group_id).filter(rule).values(
+            "id", "created_by_id", "assignee_id", "group__manager_id"):
+        if t["assignee_id"] is not None:
+            desired.update((t["id"], u) for u in members)
+        elif t["group__manager_id"] in user_ids:
+            desired.add((t["id"], t["group__manager_id"]))
+        desired.update((t["id"], u) for u in (t["created_by_id"], t["assignee_id"]) if u in user_ids)
+    if only_remove:
+        # during cascades tickets may be mid-deletion; never insert then
+        desired &= existing
+    _apply(desired, existing, log_added=True)
+
+
+def rebuild(organization_id=None, chunk_size=2000):
+    """Full recompute; returns the number of tickets processed."""
+    qs = Ticket.objects.order_by("id")
+    if organization_id is not None:
+        qs = qs.filter(organization_id=organization_id)
+    done = 0
+    last = 0
+    while True:
+        ids = list(qs.filter(id__gt=last).values_list("id", flat=True)[:chunk_size])
+        if not ids:
+            return done
+        sync_tickets(ids)
+        done += len(ids)
+        last = ids[-1]
@@ -8,6 +8,8 @@ export async function login(username, password) {
 }
 
 export function logout() {
+  const refresh = localStorage.getItem("refresh");
+  if (refresh) api.post("/token/revoke/", { refresh }).catch(() => {});
   localStorage.removeItem("access");
   localStorage.removeItem("refresh");
 }
@@ -35,6 +35,8 @@ api.interceptors.response.use(
           { refresh }
         );
         localStorage.setItem("access", data.access);
+        // refresh tokens rotate: the one just used is now revoked
+        if (data.refresh) localStorage.setItem("refresh", data.refresh);
         isRefreshing = false;
         onRefreshed(data.access);
       } catch (e) {
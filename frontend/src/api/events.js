@@ -0,0 +1,66 @@
+// src/api/events.js
+import { useEffect } from "react";
+import { useQueryClient } from "@tanstack/react-query";
+import api from "./axios";
+
+const LIST_KEYS = [["tickets"], ["dash-recent"], ["dash-stats"], ["admin-stats"]];
+
+/**
+ * Subscribe to /api/events/tickets/ (server-sent events) and invalidate the
+ * affected queries, so pages refetch only when something actually changed.
+ */
+export function useTicketEvents(enabled = true) {
+  const qc = useQueryClient();
+
+  useEffect(() => {
+    if (!enabled) return undefined;
+    let source = null;
+    let retry = null;
+    let closed = false;
+
+    const invalidateLists = () =>
+      LIST_KEYS.forEach((queryKey) => qc.invalidateQueries({ queryKey }));
+
+    const onTicket = (e) => {
+      const { ticket } = JSON.parse(e.data);
+      const id = String(ticket.id);
+      invalidateLists();
+      qc.invalidateQueries({ queryKey: ["ticket", id] });
+      if (e.type === "ticket.commented" || e.type === "ticket.closed") {
+        qc.invalidateQueries({ queryKey: ["ticket-comments", id] });
+      }
+    };
+
+    const connect = () => {
+      const token = localStorage.getItem("access");
+      if (!token || closed) return;
+      source = new EventSource(
+        `${import.meta.env.VITE_API_BASE}/events/tickets/?token=${encodeURIComponent(token)}`
+      );
+      [
+        "ticket.created",
+        "ticket.updated",
+        "ticket.assigned",
+        "ticket.closed",
+        "ticket.commented",
+        "ticket.deleted",
+        "ticket.hidden",
+      ].forEach((type) => source.addEventListener(type, onTicket));
+      source.addEventListener("tickets.refresh", invalidateLists);
+      // (re)connected: catch up on anything missed while we were away
+      source.onopen = invalidateLists;
+      source.onerror = () => {
+        // most often an expired access token: a normal API call refreshes it
+        source.close();
+        retry = setTimeout(() => api.get("/me/").finally(connect), 5000);
+      };
+    };
+
+    connect();
+    return () => {
+      closed = true;
+      clearTimeout(retry);
+      source?.close();
+    };
+  }, [enabled, qc]);
+}
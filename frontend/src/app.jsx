@@ -2,6 +2,7 @@ import { Outlet, NavLink, useNavigate } from "react-router-dom";
 import { useQuery } from "@tanstack/react-query";
 import { me } from "./api/users";
 import { logout } from "./api/auth";
+import { useTicketEvents } from "./api/events";
 import ThemeToggle from "./components/ThemeToggle";   // ⬅️ add this
 import "./index.css";
 
@@ -9,6 +10,8 @@ export default function App() {
   const nav = useNavigate();
   const { data: user } = useQuery({ queryKey:["me"], queryFn: me });
   const isAdmin = user?.role === "ADMIN" || user?.role === "SUPERVISOR";
+  // server pushes ticket changes; queries refetch only when invalidated
+  useTicketEvents(!!user);
 
   function doLogout() { logout(); nav("/login"); }
 
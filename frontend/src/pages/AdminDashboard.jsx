@@ -476,19 +476,17 @@ function GroupsTab() {
     if (!selected && groups?.length) setSelected(groups[0].id);
   }, [groups, selected]);
 
-  const {
-    data: members,
-    refetch: refetchMembers,
-    isFetching: loadingMembers,
-  } = useQuery({
-    queryKey: ["org-group-members", selected],
-    queryFn: async () =>
-      selected
-        ? (await api.get(`/org-admin/groups/${selected}/members/`)).data
-        : [],
-    enabled: !!selected,
+  // every group with its members in one request, instead of one per group
+  const { data: roster, isFetching: loadingMembers } = useQuery({
+    queryKey: ["org-roster"],
+    queryFn: async () => (await api.get("/org-admin/groups/roster/")).data,
     retry: false,
   });
+  const members = useMemo(
+    () => (roster ?? []).find((g) => g.id === selected)?.members ?? [],
+    [roster, selected]
+  );
+  const refetchMembers = () => qc.invalidateQueries({ queryKey: ["org-roster"] });
 
   const changeManager = useMutation({
     mutationFn: ({ groupId, manager }) =>
@@ -737,13 +735,13 @@ function MembershipsTab() {
   const add = useMutation({
     mutationFn: ({ group, user }) =>
       api.post(`/org-admin/groups/${group}/members/${user}/`).then((r) => r.data),
-    onSuccess: () => qc.invalidateQueries({ queryKey: ["org-group-members"] }),
+    onSuccess: () => qc.invalidateQueries({ queryKey: ["org-roster"] }),
   });
 
   const remove = useMutation({
     mutationFn: ({ group, user }) =>
       api.delete(`/org-admin/groups/${group}/members/${user}/`).then((r) => r.data),
-    onSuccess: () => qc.invalidateQueries({ queryKey: ["org-group-members"] }),
+    onSuccess: () => qc.invalidateQueries({ queryKey: ["org-roster"] }),
   });
 
   const [g, setG] = useState("");
@@ -34,7 +34,11 @@ export default function Dashboard() {
   const { data: recent, isLoading: rLoad } = useQuery({
     queryKey: ["dash-recent"],
     queryFn: async () =>
-      (await api.get("/tickets/?ordering=-created_at&page_size=6")).data,
+      (
+        await api.get(
+          "/tickets/?ordering=-created_at&page_size=6&fields=id,subject,group_name,status,assignee_name,created_at"
+        )
+      ).data,
     retry: false,
     refetchOnWindowFocus: false,
     staleTime: 30_000,
@@ -85,6 +85,10 @@ function GroupsTab(){
     mutationFn: (body)=> api.post("/org-admin/groups/", body).then(r=>r.data),
     onSuccess: ()=> qc.invalidateQueries({queryKey:["org-groups"]}),
   });
+  const setAssignment = useMutation({
+    mutationFn: ({id, assignment})=> api.patch(`/org-admin/groups/${id}/`, {assignment}).then(r=>r.data),
+    onSuccess: ()=> qc.invalidateQueries({queryKey:["org-groups"]}),
+  });
   return (
     <div className="grid gap-4 md:grid-cols-2">
       <section className="card card-p">
@@ -95,7 +99,13 @@ function GroupsTab(){
         <h3 className="text-base font-semibold">Groups</h3>
         <ul className="list-disc pl-5">
           {(groups??[]).map(g=>(
-            <li key={g.id}><b>{g.name}</b>{g.manager_name?` — manager: ${g.manager_name}`:""}</li>
+            <li key={g.id}>
+              <b>{g.name}</b>{g.manager_name?` — manager: ${g.manager_name}`:""}
+              <select className="select ml-2" value={g.assignment} disabled={setAssignment.isPending}
+                      onChange={(e)=>setAssignment.mutate({id:g.id, assignment:e.target.value})}>
+                {ASSIGNMENT.map(([v,label])=> <option key={v} value={v}>{label}</option>)}
+              </select>
+            </li>
           ))}
         </ul>
       </section>
@@ -103,6 +113,13 @@ function GroupsTab(){
   );
 }
 
+const ASSIGNMENT = [
+  ["MANUAL","Manual assignment"],
+  ["ROUND_ROBIN","Round robin"],
+  ["LEAST_LOADED","Least loaded"],
+  ["SKILL_WEIGHTED","Skill weighted"],
+];
+
 function GroupForm({ onSubmit, submitting }){
   const [f,setF]=useState({name:"", manager:null});
   const change = e=> setF(s=>({...s, [e.target.name]: e.target.value}));
@@ -120,8 +137,8 @@ function MembersTab(){
   const { data: groups } = useQuery({ queryKey:["org-groups"], queryFn: async()=> (await api.get("/org-admin/groups/")).data });
   const { data: users }  = useQuery({ queryKey:["org-users"],  queryFn: async()=> (await api.get("/org-admin/users/")).data });
   const add = useMutation({
-    mutationFn: (body)=> api.post("/org-admin/memberships/", body).then(r=>r.data),
-    onSuccess: ()=> qc.invalidateQueries({queryKey:["org-groups"]}),
+    mutationFn: ({group, user})=> api.post(`/org-admin/groups/${group}/members/${user}/`).then(r=>r.data),
+    onSuccess: ()=> qc.invalidateQueries({queryKey:["org-roster"]}),
   });
   const [g,setG]=useState(""); const [u,setU]=useState("");
   return (
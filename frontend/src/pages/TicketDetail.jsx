@@ -1,9 +1,30 @@
 // src/pages/TicketDetail.jsx
-import { useEffect, useState } from "react";
+import { useEffect, useMemo, useState } from "react";
 import { useParams } from "react-router-dom";
-import { useQuery, useMutation, useQueryClient } from "@tanstack/react-query";
+import {
+  useInfiniteQuery,
+  useQuery,
+  useMutation,
+  useQueryClient,
+} from "@tanstack/react-query";
 import api from "../api/axios";
 
+// everything except the nested comments/attachments, which are paged separately
+const DETAIL_FIELDS = [
+  "id",
+  "subject",
+  "description",
+  "status",
+  "priority",
+  "customer_name",
+  "group",
+  "group_name",
+  "group_manager_id",
+  "group_manager_name",
+  "assignee",
+  "assignee_name",
+].join(",");
+
 export default function TicketDetail() {
   const { id } = useParams();
   const qc = useQueryClient();
@@ -15,8 +36,27 @@ export default function TicketDetail() {
     error: tErr,
   } = useQuery({
     queryKey: ["ticket", id],
-    queryFn: async () => (await api.get(`/tickets/${id}/`)).data,
+    queryFn: async () =>
+      (await api.get(`/tickets/${id}/?fields=${DETAIL_FIELDS}`)).data,
+  });
+
+  // comments come newest-first in cursor pages; shown oldest-first
+  const {
+    data: commentPages,
+    fetchNextPage: loadOlder,
+    hasNextPage: hasOlder,
+    isFetchingNextPage: loadingOlder,
+  } = useInfiniteQuery({
+    queryKey: ["ticket-comments", id],
+    queryFn: async ({ pageParam }) =>
+      (await api.get(pageParam ?? `/tickets/${id}/comments/`)).data,
+    initialPageParam: null,
+    getNextPageParam: (last) => last?.next ?? undefined,
   });
+  const comments = useMemo(
+    () => (commentPages?.pages ?? []).flatMap((p) => p?.results ?? []).reverse(),
+    [commentPages]
+  );
 
   const { data: me } = useQuery({
     queryKey: ["me"],
@@ -67,6 +107,7 @@ export default function TicketDetail() {
     onSuccess: () => {
       setResolution("");
       qc.invalidateQueries({ queryKey: ["ticket", id] });
+      qc.invalidateQueries({ queryKey: ["ticket-comments", id] });
     },
   });
 
@@ -87,9 +128,18 @@ export default function TicketDetail() {
         <h3 className="mt-5 text-sm font-semibold text-slate-900 dark:text-slate-100">
           Comments
         </h3>
+        {hasOlder && (
+          <button
+            className="btn mt-2"
+            onClick={() => loadOlder()}
+            disabled={loadingOlder}
+          >
+            {loadingOlder ? "Loading…" : "Load older comments"}
+          </button>
+        )}
         <ul className="mt-2 space-y-2">
-          {ticket.comments?.length ? (
-            ticket.comments.map((c) => (
+          {comments.length ? (
+            comments.map((c) => (
               <li
                 key={c.id}
                 className="rounded-xl border border-slate-200 bg-slate-50 px-3 py-2 dark:border-slate-800 dark:bg-slate-800/40"
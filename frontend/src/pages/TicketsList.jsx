@@ -1,8 +1,11 @@
 import { useMemo, useState } from "react";
-import { useQuery } from "@tanstack/react-query";
+import { useInfiniteQuery } from "@tanstack/react-query";
 import api from "../api/axios";
 import { Link } from "react-router-dom";
 
+// only the columns this table renders (sparse fieldset, see TicketListSerializer)
+const LIST_FIELDS = "id,subject,customer_name,status,priority,assignee_name";
+
 const statusOrder = ["OPEN", "IN_PROGRESS", "RESOLVED", "CLOSED"];
 const priorityOrder = ["LOW", "MEDIUM", "HIGH", "URGENT"];
 
@@ -11,10 +14,22 @@ function SortIcon({ dir }) {
 }
 
 export default function TicketsList() {
-  const { data } = useQuery({
-    queryKey: ["tickets"],
-    queryFn: async () => (await api.get("/tickets/")).data,
-  });
+  // server pages with an opaque cursor; "next" is a full URL or null
+  const { data, fetchNextPage, hasNextPage, isFetchingNextPage } =
+    useInfiniteQuery({
+      queryKey: ["tickets"],
+      queryFn: async ({ pageParam }) =>
+        (await api.get(pageParam ?? `/tickets/?fields=${LIST_FIELDS}`)).data,
+      initialPageParam: null,
+      getNextPageParam: (last) => last?.next ?? undefined,
+      // kept fresh by useTicketEvents instead of refetching on every focus
+      staleTime: 5 * 60_000,
+      refetchOnWindowFocus: false,
+    });
+  const tickets = useMemo(
+    () => (data?.pages ?? []).flatMap((p) => p?.results ?? p ?? []),
+    [data]
+  );
 
   const [sortBy, setSortBy] = useState("subject");
   const [sortDir, setSortDir] = useState("asc");
@@ -28,7 +43,7 @@ export default function TicketsList() {
   };
 
   const rows = useMemo(() => {
-    const arr = [...(data ?? [])];
+    const arr = [...tickets];
     const dir = sortDir === "asc" ? 1 : -1;
     arr.sort((a, b) => {
       let av, bv;
@@ -54,7 +69,7 @@ export default function TicketsList() {
       return 0;
     });
     return arr;
-  }, [data, sortBy, sortDir]);
+  }, [tickets, sortBy, sortDir]);
 
   const Th = ({ id, children, className = "" }) => (
     <th className={`py-2 px-4 font-semibold ${className}`}>
@@ -128,6 +143,17 @@ export default function TicketsList() {
               )}
             </tbody>
           </table>
+          {hasNextPage && (
+            <div className="pt-4 text-center">
+              <button
+                className="btn"
+                onClick={() => fetchNextPage()}
+                disabled={isFetchingNextPage}
+              >
+                {isFetchingNextPage ? "Loading…" : "Load more"}
+              </button>
+            </div>
+          )}
         </div>
       </div>
     </div>